@@ -699,6 +699,11 @@ class AgentAuditor(AgentBase):
         try:
             with open(dest, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2)
+            # Index trié à côté de la map : les lecteurs n'ont plus à parser ni trier
+            # (écrit après la map, donc mtime >= celui de project_map.json)
+            dest.with_name("project_map.keys.txt").write_text(
+                "\n".join(sorted(data)), encoding="utf-8"
+            )
             self.logger.info(
                 f"🗺️ Cartographie générée : {count_files} fichiers valides (vs {len(list(root.rglob('*.py')))} total)."
             )
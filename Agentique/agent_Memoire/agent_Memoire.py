@@ -502,7 +502,7 @@ class AgentMemoire(AgentBase):
         des chemins sécurisés à l'Auditor.
 
         Args:
-            contenu (Any): Donnée à écrire (Dict -> JSON, Str -> Texte).
+            contenu (Any): Donnée à écrire (Dict -> JSON, Str -> Texte, Bytes -> tel quel).
             type_memoire (str): Clé de dossier cible (ex: "reflexive", "persistante").
         """
         try:
@@ -523,17 +523,20 @@ class AgentMemoire(AgentBase):
             # Assurer que le dossier parent existe
             full_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 3. Écriture (JSON ou Texte)
-            with open(full_path, "w", encoding="utf-8") as f:
-                if isinstance(contenu, (dict, list)):
-                    # Import local pour éviter les dépendances circulaires
-                    from agentique.base.contrats_interface import CustomJSONEncoder
+            # 3. Écriture (Bytes déjà sérialisés, JSON ou Texte)
+            if isinstance(contenu, bytes):
+                full_path.write_bytes(contenu)
+            else:
+                with open(full_path, "w", encoding="utf-8") as f:
+                    if isinstance(contenu, (dict, list)):
+                        # Import local pour éviter les dépendances circulaires
+                        from agentique.base.contrats_interface import CustomJSONEncoder
 
-                    json.dump(
-                        contenu, f, cls=CustomJSONEncoder, ensure_ascii=False, indent=2
-                    )
-                else:
-                    f.write(str(contenu))
+                        json.dump(
+                            contenu, f, cls=CustomJSONEncoder, ensure_ascii=False, indent=2
+                        )
+                    else:
+                        f.write(str(contenu))
 
             self.logger.info(
                 f"💾 Mémoire sauvegardée ({type_memoire}) : {full_path.name}"
@@ -549,7 +552,9 @@ class AgentMemoire(AgentBase):
     # ================================================================
     # ✅ NOUVELLE MÉTHODE : VECTORISATION DÉDIÉE AUX RÈGLES
     # ================================================================
-    def vectoriser_regle(self, contenu_regle: str, metadata: Dict) -> bool:
+    def vectoriser_regle(
+        self, contenu_regle: str, metadata: Dict, vecteur: Optional[Any] = None
+    ) -> bool:
         """
         Injecte une nouvelle loi dans le "Moteur Législatif" (Index Vectoriel Dédié).
 
@@ -561,6 +566,7 @@ class AgentMemoire(AgentBase):
         Args:
             contenu_regle (str): Le texte impératif de la règle.
             metadata (Dict): Contexte de création (ex: Trigger, Date, Origine).
+            vecteur (np.ndarray, optional): Embedding pré-calculé de la règle.
         """
         if not self.moteur_regles:
             self.logger.log_error(
@@ -573,7 +579,9 @@ class AgentMemoire(AgentBase):
             metadata["type"] = "regle_gouvernance"
             metadata["sub_type"] = "vector_store_dedie"
 
-            self.moteur_regles.ajouter_fragment(texte=contenu_regle, meta=metadata)
+            self.moteur_regles.ajouter_fragment(
+                texte=contenu_regle, meta=metadata, vecteur=vecteur
+            )
             self.logger.info(
                 f"⚖️ Règle vectorisée dans le moteur législatif (ID: {metadata.get('trigger', 'N/A')})"
             )
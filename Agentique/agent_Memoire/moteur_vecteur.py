@@ -151,7 +151,9 @@ class MoteurVectoriel(AgentBase):
     # -------------------------------
     # Ajout et recherche
     # -------------------------------
-    def ajouter_fragment(self, texte: str, meta: dict | None = None) -> None:
+    def ajouter_fragment(
+        self, texte: str, meta: dict | None = None, vecteur: np.ndarray | None = None
+    ) -> None:
         """
         Pipeline d'ingestion : Texte -> Vecteur -> Stockage.
 
@@ -165,6 +167,8 @@ class MoteurVectoriel(AgentBase):
         Args:
             texte (str): Le contenu brut à vectoriser.
             meta (dict, optional): Métadonnées contextuelles (Timestamp, Source, Type).
+            vecteur (np.ndarray, optional): Embedding déjà calculé par l'appelant
+                (via `encoder`), évite un second passage dans le modèle.
         """
         if not texte or not texte.strip():
             return
@@ -181,7 +185,7 @@ class MoteurVectoriel(AgentBase):
         if "contenu" not in meta:
             meta["contenu"] = texte
 
-        v = self.model.encode([texte])[0].astype(np.float32)
+        v = self.encoder(texte) if vecteur is None else vecteur.astype(np.float32)
         self.index.add(np.array([v]))
 
         meta.setdefault("len", len(texte))
@@ -207,7 +211,16 @@ class MoteurVectoriel(AgentBase):
         """
         if self.index.ntotal == 0:
             return []
-        vq = self.model.encode([requete])[0].astype(np.float32)
+        return self.rechercher_par_vecteur(self.encoder(requete), top_k=top_k)
+
+    def encoder(self, texte: str) -> np.ndarray:
+        """Vectorise un texte (float32), réutilisable comme clé de cache côté appelant."""
+        return self.model.encode([texte])[0].astype(np.float32)
+
+    def rechercher_par_vecteur(self, vq: np.ndarray, top_k: int = 5) -> list[dict]:
+        """Comme `rechercher`, à partir d'un vecteur de requête déjà calculé."""
+        if self.index.ntotal == 0:
+            return []
         D, I = self.index.search(np.array([vq]), top_k)
         out = []
         for idx, dist in zip(I[0], D[0]):
@@ -23,7 +23,7 @@ Responsabilités :
 
 import yaml
 import json
-from typing import Union, List, Any
+from typing import Union, List, Any, Dict, Iterable, Optional, Tuple
 from datetime import datetime
 
 from pathlib import Path
@@ -83,6 +83,8 @@ class AgentParole(AgentBase):
         self.get_last_prompt_cache = get_cache
         self.get_prompt_lock = get_lock
         self._prompt_callback = None
+        # Résumé système mémorisé : (mtime_ns du fichier, contenu)
+        self._cache_resume: Optional[Tuple[int, str]] = None
 
         # Chargement Config (Source Unique de Vérité pour les textes)
         self.config = self._charger_config()
@@ -107,11 +109,26 @@ class AgentParole(AgentBase):
         """Accesseur public pour que Semi puisse logger/sauvegarder le system prompt utilisé."""
         return self.config.get("prompts", {}).get(cle, "")
 
+    def recuperer_instructions(self, cles: Iterable[str]) -> Dict[str, str]:
+        """Lecture groupée des instructions (un seul appel pour tout un jeu de clés)."""
+        prompts = self.config.get("prompts", {})
+        return {cle: prompts.get(cle, "") for cle in cles}
+
     def _recuperer_resume_systeme(self) -> str:
-        """Récupère le résumé système brut."""
+        """
+        Récupère le résumé système brut.
+        Relu seulement si le fichier a changé (mtime) : un stat() au lieu d'une lecture.
+        """
         dossier_semi = Path(self.auditor.get_path("agent_dir", nom_agent="semi"))
         path = dossier_semi / "etat_systeme_resume.md"
-        return path.read_text(encoding="utf-8").strip()
+        mtime = path.stat().st_mtime_ns
+        if self._cache_resume is None or self._cache_resume[0] != mtime:
+            self._cache_resume = (mtime, path.read_text(encoding="utf-8").strip())
+        return self._cache_resume[1]
+
+    def invalider_resume_systeme(self):
+        """Oublie le résumé mémorisé (appelé après sa réécriture par Semi)."""
+        self._cache_resume = None
 
     def _formater_system_prompt(self, template: str) -> str:
         """
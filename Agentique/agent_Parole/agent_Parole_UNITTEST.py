@@ -6,7 +6,10 @@ Cible : agentique/sous_agents_gouvernes/agent_Parole/agent_Parole.py
 Objectif : Valider l'assemblage des prompts, le formatage des sections et le dispatch dynamique.
 """
 
+import os
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch, mock_open
 from typing import List
 
@@ -204,6 +207,39 @@ class TestAgentParole(unittest.TestCase):
             with self.assertRaises(FileNotFoundError):
                 self.agent._formater_system_prompt("Template {instructions_outils}")
 
+    def test_recuperer_instructions_groupees(self):
+        """La lecture groupée renvoie toutes les clés demandées ('' si absente)."""
+        res = self.agent.recuperer_instructions(
+            ["instructions_systeme", "instructions_review"]
+        )
+        self.assertEqual(
+            res, {"instructions_systeme": "Tu es une IA.", "instructions_review": ""}
+        )
+
+    # =========================================================================
+    # 4. TEST CACHE DU RÉSUMÉ SYSTÈME
+    # =========================================================================
+
+    def test_resume_systeme_memorise_par_mtime(self):
+        """Le résumé n'est relu que si le fichier change ou après invalidation."""
+        del self.agent._recuperer_resume_systeme  # On retire le mock du setUp
+        with tempfile.TemporaryDirectory() as dossier:
+            fichier = Path(dossier) / "etat_systeme_resume.md"
+            fichier.write_text("v1", encoding="utf-8")
+            self.mock_auditor.get_path.return_value = dossier
+
+            self.assertEqual(self.agent._recuperer_resume_systeme(), "v1")
+            with patch.object(Path, "read_text") as lecture:
+                self.assertEqual(self.agent._recuperer_resume_systeme(), "v1")
+                lecture.assert_not_called()
+
+            fichier.write_text("v2", encoding="utf-8")
+            os.utime(fichier, ns=(0, 1))
+            self.assertEqual(self.agent._recuperer_resume_systeme(), "v2")
+
+            self.agent.invalider_resume_systeme()
+            self.assertIsNone(self.agent._cache_resume)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -16,18 +16,50 @@ Responsabilités Architecturales :
 """
 
 import re
+import copy
 import threading
 import os
 import json
 import csv
+import fnmatch
+import mmap
 import subprocess
 from pathlib import Path
-from typing import List, Dict, Optional, Any, Set
+from typing import List, Dict, Optional, Any, Set, Tuple
 import time
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
+import numpy as np
+
+# --- IMPORT SÉCURISÉ ---
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+# orjson accepte str ou bytes et lève une sous-classe de json.JSONDecodeError
+_charger_json = orjson.loads if ORJSON_AVAILABLE else json.loads
 
 from agentique.base.META_agent import AgentBase
 from agentique.base.contrats_interface import (
@@ -50,7 +82,7 @@ from agentique.sous_agents_gouvernes.agent_Recherche.recherche_memoire import (
 from agentique.sous_agents_gouvernes.agent_Recherche.recherche_web import RechercheWeb
 
 try:
-    from whoosh.index import create_in, open_dir, exists_in
+    from whoosh.index import create_in, open_dir, exists_in, EmptyIndexError
     from whoosh.fields import Schema, TEXT, ID, DATETIME, NUMERIC
     from whoosh.qparser import MultifieldParser, OrGroup
 
@@ -59,6 +91,27 @@ try:
 except ImportError as e:
     raise RuntimeError(f"❌ ERREUR: {e}")
 
+# Exclusions de chemins compilées une seule fois (une passe regex au lieu de N scans `in`)
+# IGNORECASE : évite d'allouer une copie `.lower()` du chemin à chaque candidat
+_EXCLUSIONS_PROJET_RE = re.compile(
+    "|".join(map(re.escape, [".git", "venv", "__pycache__", "node_modules", "site-packages"])),
+    re.IGNORECASE,
+)
+_BLACKLIST_HORS_MEMOIRE_RE = re.compile(
+    "|".join(map(re.escape, ["backup", "logs", "__pycache__"])), re.IGNORECASE
+)
+_EXTENSIONS_HORS_MEMOIRE = frozenset({".py", ".yaml", ".yml", ".json", ".md"})
+
+
+class _SurveillantIndexWhoosh(FileSystemEventHandler):
+    """Marque les statistiques de l'index comme périmées à chaque écriture dans le dossier."""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def on_any_event(self, event):
+        self.agent._stats_dirty = True
+
 
 class AgentRecherche(AgentBase):
     """
@@ -92,15 +145,39 @@ class AgentRecherche(AgentBase):
         # 3. Chemins Absolus
         self.chemin_racine_memoire = Path(self.auditor.get_path("memoire"))
         self.chemin_index_whoosh = Path(self.auditor.get_path("woosh_index"))
+        self._chemin_index_whoosh_str = str(self.chemin_index_whoosh)
 
-        # 4. Outil Everything (Configurable)
+        # 4. Outil Everything (Configurable) : absent -> parcours local du projet
         self.chemin_executable_everything = self._trouver_everything_strict()
-        self.logger.info(
-            f"✅ Everything verrouillé: {self.chemin_executable_everything}"
-        )
+        if self.chemin_executable_everything is not None:
+            self.logger.info(
+                f"✅ Everything verrouillé: {self.chemin_executable_everything}"
+            )
 
-        # 5. Initialisation Moteur Textuel
+        # 4.1 Cache LRU des appels Everything : (tokens, limit) -> (horodatage, chemins)
+        #     Partagé par les pools semi-ctx et lecture-fichiers : accès sous verrou
+        conf_cache = self.configuration.get("cache", {})
+        self._cache_everything: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._verrou_everything = threading.Lock()
+        self._cache_everything_taille_max = conf_cache.get("everything_taille_max", 512)
+        self._cache_everything_ttl = conf_cache.get("everything_ttl_s", 60)
+
+        # 4.2 Cache sémantique du RAG vectoriel : clé exacte -> (vecteur requête, résultat)
+        self._cache_semantique: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._verrou_cache_semantique = threading.Lock()
+        self._cache_semantique_taille_max = conf_cache.get("semantique_taille_max", 256)
+        self._cache_semantique_seuil = conf_cache.get("semantique_seuil_similarite", 0.97)
+
+        # 5. Initialisation Moteur Textuel (handle Whoosh ouvert à la demande)
+        self._ix = None
+        self._searcher = None  # Searcher persistant, rafraîchi via refresh()
+        # Un searcher Whoosh n'est pas thread-safe : un seul thread l'utilise à la fois
+        self._verrou_searcher = threading.Lock()
+        self._stats_cache = None  # (signature TOC, doc_count) pour get_stats
+        self._stats_dirty = True  # Repassé à True par le watcher à chaque écriture
+        self._observateur_index = None
         self._garantir_existence_index_whoosh()
+        self._surveiller_index_whoosh()
 
         # 6. Outil Interne (Interface LLM)
         self.outiluration_memoire = RechercheMemoireTool(self)
@@ -129,7 +206,7 @@ class AgentRecherche(AgentBase):
         with open(path_conf, "r", encoding="utf-8") as f:
             return yaml.safe_load(f)
 
-    def _trouver_everything_strict(self) -> str:
+    def _trouver_everything_strict(self) -> Optional[str]:
         # --- CORRECTION ---
         # 1. Priorité absolue : Config YAML
         path_config = self.configuration.get("everything_exe_path")
@@ -145,11 +222,14 @@ class AgentRecherche(AgentBase):
                 return path
             except Exception:
                 continue
-        raise RuntimeError("❌ CRITIQUE : Everything (es.exe) introuvable.")
+        self.logger.log_warning(
+            "⚠️ Everything (es.exe) introuvable : recherche de fichiers par parcours local."
+        )
+        return None
 
     def _garantir_existence_index_whoosh(self):
         """Vérifie ou crée l'index Whoosh"""
-        if not exists_in(str(self.chemin_index_whoosh)):
+        if not exists_in(self._chemin_index_whoosh_str):
             self._creer_schema_whoosh()
 
     def _creer_schema_whoosh(self):
@@ -171,9 +251,65 @@ class AgentRecherche(AgentBase):
             message_turn=NUMERIC(stored=True),
         )
         os.makedirs(self.chemin_index_whoosh, exist_ok=True)
-        create_in(str(self.chemin_index_whoosh), schema)
+        self._fermer_searcher()
+        self._ix = create_in(self._chemin_index_whoosh_str, schema)
         self.logger.info("Index Whoosh initialisé.")
 
+    def _surveiller_index_whoosh(self):
+        """
+        Observer watchdog sur le dossier de l'index : tant qu'aucun événement n'arrive,
+        get_stats répond depuis le cache sans toucher au disque.
+        Sans watchdog, get_stats retombe sur la comparaison de mtime des TOC.
+        """
+        if not WATCHDOG_AVAILABLE:
+            return
+        try:
+            self._observateur_index = Observer()
+            self._observateur_index.schedule(
+                _SurveillantIndexWhoosh(self), self._chemin_index_whoosh_str, recursive=False
+            )
+            self._observateur_index.daemon = True
+            self._observateur_index.start()
+        except Exception as e:
+            self._observateur_index = None
+            self.logger.log_warning(f"⚠️ Surveillance de l'index Whoosh indisponible : {e}")
+
+    def _get_ix(self):
+        """
+        Retourne le handle Whoosh mis en cache (open_dir relit la TOC et le schéma).
+        Le handle reste valide entre les commits : chaque searcher() relit la dernière génération.
+        """
+        if self._ix is None:
+            self._ix = open_dir(self._chemin_index_whoosh_str)
+        return self._ix
+
+    def _get_searcher(self):
+        """
+        Searcher Whoosh persistant : refresh() ne rouvre les segments que si un commit
+        a eu lieu depuis, sinon il renvoie le même objet (coût quasi nul).
+        À appeler sous `_verrou_searcher`, tenu jusqu'à la fin de l'utilisation des résultats.
+        """
+        if self._searcher is None:
+            self._searcher = self._get_ix().searcher()
+        else:
+            self._searcher = self._searcher.refresh()
+        return self._searcher
+
+    def _fermer_searcher(self):
+        with self._verrou_searcher:
+            if self._searcher is not None:
+                self._searcher.close()
+                self._searcher = None
+
+    def close(self):
+        """Libère les ressources Whoosh (watcher, searcher persistant et handle d'index)."""
+        if self._observateur_index is not None:
+            self._observateur_index.stop()
+            self._observateur_index.join()
+            self._observateur_index = None
+        self._fermer_searcher()
+        self._ix = None
+
     # =========================================================================
     # 🌍 RECHERCHE WEB
     # =========================================================================
@@ -190,6 +326,8 @@ class AgentRecherche(AgentBase):
     # =========================================================================
 
     def _executer_everything(self, query: Any, limit: int = 20) -> List[str]:
+        if self.chemin_executable_everything is None:
+            return []
         if limit is None:
             limit = self.configuration.get("limites", {}).get(
                 "recherche_everything_max", 20
@@ -217,6 +355,17 @@ class AgentRecherche(AgentBase):
             fixed.append(t)
         args_query = fixed
 
+        # 1.3) Cache : même requête dans la fenêtre TTL -> pas de nouveau processus
+        cle_cache = (tuple(args_query), limit)
+        with self._verrou_everything:
+            entree = self._cache_everything.get(cle_cache)
+            if entree is not None:
+                horodatage, chemins = entree
+                if time.monotonic() - horodatage < self._cache_everything_ttl:
+                    self._cache_everything.move_to_end(cle_cache)
+                    return list(chemins)
+                del self._cache_everything[cle_cache]
+
         # 2) Commande (options AVANT requête)
         cmd = [self.chemin_executable_everything, "-n", str(limit)] + args_query
         self.logger.info(f"🚀 CMD: {cmd}")
@@ -241,10 +390,20 @@ class AgentRecherche(AgentBase):
             return []
 
         # 4) Résultat
-        out = (res.stdout or "").strip()
-        if not out:
-            return []
-        return [l.strip() for l in out.splitlines() if l.strip()]
+        # Un seul strip par ligne (map en C) au lieu de deux dans la compréhension
+        chemins = [l for l in map(str.strip, (res.stdout or "").splitlines()) if l]
+
+        with self._verrou_everything:
+            self._cache_everything[cle_cache] = (time.monotonic(), chemins)
+            if len(self._cache_everything) > self._cache_everything_taille_max:
+                self._cache_everything.popitem(last=False)
+
+        return list(chemins)
+
+    def invalider_cache_everything(self):
+        """Vide le cache Everything (à appeler après une écriture massive sur le disque)."""
+        with self._verrou_everything:
+            self._cache_everything.clear()
 
     # =========================================================================
     # 🔍 1. RECHERCHE RÈGLES
@@ -510,20 +669,43 @@ class AgentRecherche(AgentBase):
         if not chemin_persistante:
             raise RuntimeError("❌ AgentRecherche : Chemin 'persistante' introuvable.")
 
-        # 2. Exécution Vectorielle
+        moteur = self.agent_memoire.moteur_vectoriel
+
+        # 2. Cache sémantique (clé exacte puis similarité) avant la recherche + swap
         try:
-            resultats_bruts = self.agent_memoire.moteur_vectoriel.rechercher(
-                query, top_k=15
-            )
+            vecteur_requete = moteur.encoder(query)
         except Exception as e:
             raise RuntimeError(f"❌ Erreur technique Moteur Vectoriel : {e}")
 
-        souvenirs_candidats = []
+        empreinte_intention = (
+            (intention.sujet.value, intention.action.value, intention.categorie.value)
+            if intention
+            else None
+        )
+        cle_cache, resultat_cache = self._consulter_cache_semantique(
+            vecteur_requete, empreinte_intention, moteur.index.ntotal
+        )
+        if resultat_cache is not None:
+            return resultat_cache
+
+        # 3. Exécution Vectorielle
+        try:
+            resultats_bruts = moteur.rechercher_par_vecteur(vecteur_requete, top_k=15)
+        except Exception as e:
+            raise RuntimeError(f"❌ Erreur technique Moteur Vectoriel : {e}")
+
+        # 4. Traitement : Swap (colonnes parallèles, les Souvenir ne sont créés qu'au top-k)
+        scores = np.fromiter(
+            (float(item.get("score", 0.0)) for item in resultats_bruts),
+            dtype=np.float64,
+            count=len(resultats_bruts),
+        )
+        contenus: List[str] = []
+        titres: List[str] = []
+        types: List[str] = []
 
-        # 3. Traitement : Swap & Scoring
         for item in resultats_bruts:
             meta = item.get("meta", {})
-            score_vectoriel = float(item.get("score", 0.0))
             path_original = meta.get("fichier", "")
 
             contenu_final = meta.get("contenu", "") or "ERREUR_CONTENU_VIDE"
@@ -543,15 +725,12 @@ class AgentRecherche(AgentBase):
                     titre_final = resume_trouve.titre
                     type_final = "resume_consolide"
 
-            souvenirs_candidats.append(Souvenir(
-                contenu=contenu_final,
-                titre=titre_final,
-                type=type_final,
-                score=score_vectoriel,
-            ))
+            contenus.append(contenu_final)
+            titres.append(titre_final)
+            types.append(type_final)
 
-        # 4. Boosting Intention
-        if intention:
+        # 5. Boosting Intention (multiplicateur appliqué en une opération vectorielle)
+        if intention and titres:
             termes = {
                 intention.sujet.value.lower(),
                 intention.action.value.lower(),
@@ -560,16 +739,36 @@ class AgentRecherche(AgentBase):
             termes.discard("inconnu")
             termes.discard("general")
 
-            for s in souvenirs_candidats:
-                matches = sum(1 for terme in termes if terme in s.titre.lower())
-                if matches > 0:
-                    s.score = s.score * (1.0 + (boost_factor * matches))
-
-        # 5. Tri et Tronquage
-        souvenirs_candidats.sort(key=lambda x: x.score, reverse=True)
-        selection_finale = souvenirs_candidats[:top_final]
+            if termes:
+                # Un seul match ancré par titre : un lookahead optionnel par terme,
+                # chaque groupe capturé = un terme présent (sémantique de `terme in titre`)
+                intention_re = re.compile(
+                    "".join(f"(?=(?:.*?({re.escape(t)}))?)" for t in termes),
+                    re.IGNORECASE | re.DOTALL,
+                )
+                matches = np.fromiter(
+                    (
+                        sum(g is not None for g in intention_re.match(t).groups())
+                        for t in titres
+                    ),
+                    dtype=np.float64,
+                    count=len(titres),
+                )
+                scores *= 1.0 + boost_factor * matches
+
+        # 6. Tri (stable, décroissant) et Tronquage, puis matérialisation du top-k
+        ordre = np.argsort(-scores, kind="stable")[:top_final]
+        selection_finale = [
+            Souvenir(
+                contenu=contenus[i],
+                titre=titres[i],
+                type=types[i],
+                score=float(scores[i]),
+            )
+            for i in ordre
+        ]
 
-        # ✅ 6. Encapsulation (Correction du contrat)
+        # ✅ 7. Encapsulation (Correction du contrat)
         resultat_final = ResultatRechercheMemoire(
             souvenirs_bruts=selection_finale,
             nb_fichiers_scannes=len(resultats_bruts),
@@ -580,7 +779,59 @@ class AgentRecherche(AgentBase):
         # On valide l'objet final, pas la liste
         self.auditor.valider_format_sortie(resultat_final)
 
+        self._memoriser_cache_semantique(cle_cache, vecteur_requete, resultat_final)
         return resultat_final
+
+    def _consulter_cache_semantique(
+        self, vecteur: np.ndarray, empreinte_intention: Optional[tuple], taille_index: int
+    ) -> tuple:
+        """
+        Double niveau : signature exacte (64 premières dimensions quantifiées sur 8 bits),
+        puis similarité cosinus avec les requêtes en cache de même intention.
+        La taille de l'index fait partie de la clé : tout ajout invalide les entrées.
+
+        Returns:
+            (clé de cache, copie du résultat mémorisé ou None)
+        """
+        tete = vecteur[:64]
+        echelle = float(np.abs(tete).max()) or 1.0
+        signature = np.round(tete / echelle * 127).astype(np.int8).tobytes()
+        contexte = (empreinte_intention, taille_index)
+        cle = (signature, contexte)
+        norme = float(np.linalg.norm(vecteur)) or 1.0
+
+        with self._verrou_cache_semantique:
+            entree = self._cache_semantique.get(cle)
+            if entree is not None:
+                self._cache_semantique.move_to_end(cle)
+                return cle, self._copier_resultat(entree[1])
+
+            for cle_existante, (vecteur_cache, resultat) in self._cache_semantique.items():
+                if cle_existante[1] != contexte:
+                    continue
+                similarite = float(np.dot(vecteur, vecteur_cache)) / (
+                    norme * (float(np.linalg.norm(vecteur_cache)) or 1.0)
+                )
+                if similarite >= self._cache_semantique_seuil:
+                    self._cache_semantique.move_to_end(cle_existante)
+                    return cle, self._copier_resultat(resultat)
+
+        return cle, None
+
+    def _memoriser_cache_semantique(self, cle: tuple, vecteur: np.ndarray, resultat):
+        # Copie : l'appelant peut retoucher les scores du résultat qu'il a reçu
+        copie = self._copier_resultat(resultat)
+        with self._verrou_cache_semantique:
+            self._cache_semantique[cle] = (vecteur, copie)
+            if len(self._cache_semantique) > self._cache_semantique_taille_max:
+                self._cache_semantique.popitem(last=False)
+
+    @staticmethod
+    def _copier_resultat(resultat):
+        """Copie du résultat et de ses souvenirs (les contenus str, immuables, sont partagés)."""
+        copie = copy.copy(resultat)
+        copie.souvenirs_bruts = [copy.copy(s) for s in resultat.souvenirs_bruts]
+        return copie
     # =========================================================================
     # 🔍 RECHERCHE 5 : HISTORIQUE DE CONVERSATION
     # =========================================================================
@@ -609,11 +860,9 @@ class AgentRecherche(AgentBase):
             if not p.exists():
                 return []
 
-            # 1. Lister et trier par modification (plus récent à la fin)
-            fichiers = sorted(list(p.glob("interaction_*.json")), key=os.path.getmtime)
-
-            # 2. Prendre les N derniers
-            fichiers_recents = fichiers[-limit:]
+            # 1. Lister (plus récent en tête) puis 2. prendre les N derniers, remis dans l'ordre
+            fichiers_recents = self._lister_interactions_par_mtime(p)[:limit]
+            fichiers_recents.reverse()
 
             for f_path in fichiers_recents:
                 try:
@@ -640,6 +889,22 @@ class AgentRecherche(AgentBase):
             self.logger.log_error(f"Erreur lecture historique brut: {e}")
             return []
 
+    @staticmethod
+    def _lister_interactions_par_mtime(dossier: Path) -> List[Path]:
+        """
+        Liste les `interaction_*.json` du dossier, du plus récent au plus ancien.
+        Un seul passage os.scandir : sous Windows, DirEntry.stat() est servi par
+        l'énumération du dossier (pas de syscall supplémentaire par fichier).
+        """
+        with os.scandir(dossier) as it:
+            entrees = [
+                (e.stat().st_mtime, e.path)
+                for e in it
+                if e.name.startswith("interaction_") and e.name.endswith(".json") and e.is_file()
+            ]
+        entrees.sort(key=lambda x: x[0], reverse=True)
+        return [Path(chemin) for _, chemin in entrees]
+
     # =========================================================================
     # 🛠️ HELPER SWAP (Utilisé par recherche_historique)
     # =========================================================================
@@ -713,12 +978,14 @@ class AgentRecherche(AgentBase):
             candidats = self._executer_everything(
                 query, limit=5
             )  # 5 est une constante technique acceptable ici (low level)
+            session_id_bytes = str(session_id).encode("utf-8")
             for path_str in candidats:
                 path_obj = Path(path_str)
                 try:
-                    text = path_obj.read_text(encoding="utf-8")
-                    if session_id in text:
-                        data = json.loads(text)
+                    # Bytes bruts : pas d'aller-retour décodage/encodage UTF-8
+                    brut = path_obj.read_bytes()
+                    if session_id_bytes in brut:
+                        data = _charger_json(brut)
 
                         # Vérification du Tour (Match exact requis)
                         # On gère les deux formats de stockage possibles
@@ -765,20 +1032,24 @@ class AgentRecherche(AgentBase):
             return []
 
         # 2. Collecte des fichiers (triés par date de modification décroissante)
-        fichiers = sorted(
-            dossier_hist.glob("interaction_*.json"),
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        fichiers = self._lister_interactions_par_mtime(dossier_hist)
 
+        # Remise dans l'ordre chronologique (du plus vieux au plus récent pour le contexte)
         selection = fichiers[:limit]
+        selection.reverse()
         souvenirs_reconstruits: List[Souvenir] = []
 
-        # 3. Reconstitution des atomes avec Context Swapping
-        for f_path in selection:
+        # 3. Lectures disque lancées en parallèle (l'I/O libère le GIL), ordre conservé
+        lectures = []
+        if selection:
+            with ThreadPoolExecutor(max_workers=min(8, len(selection))) as executor:
+                lectures = [executor.submit(self._lire_fichier_safe, f) for f in selection]
+
+        # 4. Reconstitution des atomes avec Context Swapping
+        for f_path, lecture in zip(selection, lectures):
             try:
-                content = self._lire_fichier_safe(f_path)
-                data = json.loads(content)
+                content = lecture.result()
+                data = _charger_json(content)
                 meta = data.get("meta", {})
 
                 sid = meta.get("session_id") or data.get("session_id")
@@ -802,9 +1073,6 @@ class AgentRecherche(AgentBase):
                 self.logger.log_warning(f"Erreur lecture historique {f_path.name}: {e}")
                 continue
 
-        # 4. Remise dans l'ordre chronologique (du plus vieux au plus récent pour le contexte)
-        souvenirs_reconstruits.reverse()
-
         # 🛡️👁️‍🗨️🛡️ VALIDATION PAR L'AUDITOR
         self.auditor.valider_format_sortie(souvenirs_reconstruits)
 
@@ -884,13 +1152,14 @@ class AgentRecherche(AgentBase):
             path_str = str(path_obj).lower()
 
             # --- A. REFUS IMMÉDIAT (Blacklist) ---
-            if any(x in path_str for x in ["backup", "logs", "__pycache__"]):
+            if _BLACKLIST_HORS_MEMOIRE_RE.search(path_str):
                 continue
-            if ".env" in nom or nom.endswith(".bak") or " - copie" in nom:
+            extension = os.path.splitext(nom)[1]
+            if ".env" in nom or extension == ".bak" or " - copie" in nom:
                 continue
 
             # --- B. VALIDATION (Whitelist) ---
-            is_valid_ext = any(nom.endswith(ext) for ext in [".py", ".yaml", ".yml", ".json", ".md"])
+            is_valid_ext = extension in _EXTENSIONS_HORS_MEMOIRE
             is_github = ".github" in path_str
 
             if not (is_valid_ext or is_github):
@@ -932,13 +1201,17 @@ class AgentRecherche(AgentBase):
         """
         souvenirs = []
         try:
-            ix = open_dir(str(self.chemin_index_whoosh))
-            with ix.searcher() as searcher:
-                # Utilisation simple du parseur
-                parser = MultifieldParser(
-                    ["content", "filename"], ix.schema, group=OrGroup
-                )
-                whoosh_query = parser.parse(query_text)
+            ix = self._get_ix()
+
+            # Utilisation simple du parseur
+            parser = MultifieldParser(
+                ["content", "filename"], ix.schema, group=OrGroup
+            )
+            whoosh_query = parser.parse(query_text)
+
+            # Les hits lisent leurs champs via le searcher : verrou tenu jusqu'à la conversion
+            with self._verrou_searcher:
+                searcher = self._get_searcher()
 
                 # Recherche avec la limite dynamique
                 results = searcher.search(whoosh_query, limit=limit)
@@ -1003,11 +1276,18 @@ class AgentRecherche(AgentBase):
 
         # 2. Skip Whoosh (il tokenise la phrase), validation disque directe
         resultats_verifies = []
+        phrase_bytes = phrase_exacte.encode("utf-8")
 
         # 3. Validation disque sur TOUS les fichiers candidats
         for fichier_path in fichiers_candidats:
             try:
                 path_obj = Path(fichier_path)
+
+                # Scan d'octets mmap (memchr) : seuls les fichiers qui contiennent
+                # la phrase sont lus et décodés
+                if not self._contient_phrase_mmap(path_obj, phrase_bytes):
+                    continue
+
                 contenu_brut = path_obj.read_text(encoding='utf-8', errors='replace')
 
                 # Vérification stricte : la phrase DOIT être dedans
@@ -1034,6 +1314,15 @@ class AgentRecherche(AgentBase):
     # 🔧 UTILITAIRES BAS NIVEAU
     # =========================================================================
 
+    @staticmethod
+    def _contient_phrase_mmap(chemin: Path, phrase_bytes: bytes) -> bool:
+        """Recherche d'octets via mmap (memchr côté C), sans lire ni décoder le fichier."""
+        with open(chemin, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(phrase_bytes) != -1
+
     def _lire_fichier_safe(self, chemin: Path) -> str:
         """
         Lecture robuste : Force UTF-8.
@@ -1057,6 +1346,73 @@ class AgentRecherche(AgentBase):
     # =========================================================================
     # 🛠️ MÉTHODES DE MAINTENANCE (INDEXATION)
     # =========================================================================
+    def _champs_document_whoosh(
+        self,
+        path_f: Path,
+        contenu: str = None,
+        type_memoire: str = "persistante",
+        sujet: str = None,
+        action: str = None,
+        categorie: str = None,
+        session_id: str = None,
+        message_turn: int = None,
+    ) -> Dict[str, Any]:
+        """Construit les champs Whoosh d'un fichier (contenu lu sur disque si non fourni)."""
+        final_content = contenu
+        if not final_content and path_f.exists():
+            if path_f.suffix in [".json", ".jsonl"]:
+                data = json.loads(path_f.read_text(encoding="utf-8"))
+                final_content = self._extraire_tout_le_texte(data)
+            else:
+                final_content = path_f.read_text(encoding="utf-8")
+
+        return dict(
+            path=str(path_f),
+            filename=path_f.name,
+            content=final_content or "",
+            type_memoire=type_memoire,
+            timestamp=datetime.now(),
+            sujet_tag=sujet or "",
+            action_tag=action or "",
+            categorie_tag=categorie or "",
+            session_id=session_id or "",
+            message_turn=message_turn or 0,
+        )
+
+    def update_index_lot(self, documents: List[Dict[str, Any]]) -> int:
+        """
+        Met à jour plusieurs fichiers dans Whoosh avec un seul writer et un seul commit.
+
+        Le coût d'un commit Whoosh (écriture de segment) est fixe : N fichiers en un
+        commit coûtent bien moins que N appels à `update_index(nouveau_fichier=...)`.
+
+        Args:
+            documents (List[Dict]): Arguments d'`update_index` par fichier
+                (`nouveau_fichier` obligatoire, tags optionnels).
+
+        Returns:
+            int: Nombre de documents indexés (0 si le lot a été annulé).
+        """
+        if not documents:
+            return 0
+        if not self.chemin_index_whoosh.exists():
+            self._creer_schema_whoosh()
+
+        writer = self._get_ix().writer()
+        try:
+            for doc in documents:
+                doc = dict(doc)
+                path_f = Path(doc.pop("nouveau_fichier"))
+                writer.update_document(**self._champs_document_whoosh(path_f, **doc))
+            writer.commit()
+            self._stats_cache = None
+            self.logger.info(f"📝 Whoosh mis à jour : {len(documents)} fichier(s) en un commit")
+            return len(documents)
+        except Exception as e:
+            writer.cancel()
+            self.logger.log_error(f"❌ Erreur indexation par lot : {e}")
+            return 0
+
     def update_index(
         self,
         contenu: str = None,
@@ -1085,7 +1441,7 @@ class AgentRecherche(AgentBase):
         if not self.chemin_index_whoosh.exists():
             self._creer_schema_whoosh()
 
-        ix = open_dir(str(self.chemin_index_whoosh))
+        ix = self._get_ix()
 
         # =========================================================
         # CAS 1 : MISE À JOUR CIBLÉE (Fichier spécifique)
@@ -1094,28 +1450,20 @@ class AgentRecherche(AgentBase):
             writer = ix.writer()  # Ouverture locale
             try:
                 path_f = Path(nouveau_fichier)
-                final_content = contenu
-
-                if not final_content and path_f.exists():
-                    if path_f.suffix in [".json", ".jsonl"]:
-                        data = json.loads(path_f.read_text(encoding="utf-8"))
-                        final_content = self._extraire_tout_le_texte(data)
-                    else:
-                        final_content = path_f.read_text(encoding="utf-8")
-
                 writer.update_document(
-                    path=str(path_f),
-                    filename=path_f.name,
-                    content=final_content or "",
-                    type_memoire=type_memoire,
-                    timestamp=datetime.now(),
-                    sujet_tag=sujet or "",
-                    action_tag=action or "",
-                    categorie_tag=categorie or "",
-                    session_id=session_id or "",
-                    message_turn=message_turn or 0,
+                    **self._champs_document_whoosh(
+                        path_f,
+                        contenu,
+                        type_memoire,
+                        sujet,
+                        action,
+                        categorie,
+                        session_id,
+                        message_turn,
+                    )
                 )
                 writer.commit()
+                self._stats_cache = None
                 self.logger.info(f"📝 Whoosh mis à jour : {path_f.name}")
             except Exception as e:
                 writer.cancel()
@@ -1217,6 +1565,8 @@ class AgentRecherche(AgentBase):
 
                 # Un SEUL commit à la toute fin pour tout valider
                 writer.commit()
+                self._stats_cache = None
+                self.invalider_cache_everything()
                 self.logger.info(f"✅ Terminé : {count} documents indexés.")
 
             except Exception as e_globale:
@@ -1259,10 +1609,24 @@ class AgentRecherche(AgentBase):
             )
             return resultats
 
+        # Tags de la requête normalisés une seule fois pour toute la boucle
+        tags_requete = [t.lower() for t in tags] if tags else []
+        # Pré-filtre streaming : seulement utile si un filtre taxonomique est actif
+        prefiltre_streaming = IJSON_AVAILABLE and bool(
+            sujet or action or categorie or tags_requete
+        )
+
         try:
             # Parcourir tous les fichiers d'historique
             for fichier in dossier_historique.glob("**/*.json"):
                 try:
+                    if prefiltre_streaming:
+                        classification_lue = self._lire_classification_streaming(fichier)
+                        if classification_lue is None or not self._classification_correspond(
+                            classification_lue, sujet, action, categorie, tags_requete
+                        ):
+                            continue
+
                     contenu = json.loads(fichier.read_text(encoding="utf-8"))
 
                     # Vérifier si c'est une interaction avec classification
@@ -1283,27 +1647,10 @@ class AgentRecherche(AgentBase):
                         except:
                             continue
 
-                    # Filtres sémantiques
-                    correspond = True
-
-                    if sujet and classification.get("sujet") != sujet.value:
-                        correspond = False
-
-                    if action and classification.get("action") != action.value:
-                        correspond = False
-
-                    if categorie and classification.get("categorie") != categorie.value:
-                        correspond = False
-
-                    if tags:
-                        tags_interaction = classification.get("tags", [])
-                        if not any(
-                            tag.lower() in [t.lower() for t in tags_interaction]
-                            for tag in tags
-                        ):
-                            correspond = False
-
-                    if correspond:
+                    # Filtres sémantiques (déjà appliqués si le pré-filtre streaming a tourné)
+                    if prefiltre_streaming or self._classification_correspond(
+                        classification, sujet, action, categorie, tags_requete
+                    ):
                         resultats.append(
                             {
                                 "fichier": str(fichier),
@@ -1334,6 +1681,41 @@ class AgentRecherche(AgentBase):
             self.logger.log_error(f"Erreur dans recherche sémantique: {e}")
             return []
 
+    def _lire_classification_streaming(self, fichier: Path) -> Optional[Dict]:
+        """
+        Lit uniquement le bloc 'classification' d'une interaction via ijson.
+        Évite de matérialiser prompt/réponse pour les fichiers qui seront rejetés.
+        """
+        with open(fichier, "rb") as fh:
+            for classification in ijson.items(fh, "classification"):
+                return classification if isinstance(classification, dict) else None
+        return None
+
+    def _classification_correspond(
+        self,
+        classification: Dict,
+        sujet: Optional[Sujet],
+        action: Optional[Action],
+        categorie: Optional[Categorie],
+        tags_requete: List[str],
+    ) -> bool:
+        """Applique les filtres taxonomiques (tags attendus déjà en minuscules)."""
+        if sujet and classification.get("sujet") != sujet.value:
+            return False
+
+        if action and classification.get("action") != action.value:
+            return False
+
+        if categorie and classification.get("categorie") != categorie.value:
+            return False
+
+        if tags_requete:
+            tags_interaction = {t.lower() for t in classification.get("tags", [])}
+            if not any(tag in tags_interaction for tag in tags_requete):
+                return False
+
+        return True
+
     def statistiques_semantiques(self, periode_jours: int = 30) -> Dict[str, Any]:
         """
         Génère des statistiques sur les interactions par classification.
@@ -1410,12 +1792,15 @@ class AgentRecherche(AgentBase):
         )
         return stats
 
-    def exporter_donnees_semantiques(self, format_export: str = "json") -> str:
+    def exporter_donnees_semantiques(
+        self, format_export: str = "json", indenter: bool = False
+    ) -> str:
         """
         Exporte toutes les données de classification pour analyse externe.
 
         Args:
             format_export: "json" ou "csv"
+            indenter: JSON indenté (lisible) au lieu du format compact par défaut
 
         Returns:
             Chemin du fichier exporté
@@ -1441,13 +1826,19 @@ class AgentRecherche(AgentBase):
                     "interactions": toutes_interactions,
                 }
 
-                with open(chemin_export, "w", encoding="utf-8") as f:
+                # Format compact par défaut : indent=2 double la taille et le temps d'écriture
+                options_format = (
+                    {"indent": 2} if indenter else {"separators": (",", ":")}
+                )
+                with open(
+                    chemin_export, "w", encoding="utf-8", buffering=1 << 20
+                ) as f:
                     json.dump(
                         donnees_export,
                         f,
                         ensure_ascii=False,
-                        indent=2,
                         cls=CustomJSONEncoder,
+                        **options_format,
                     )
 
             elif format_export == "csv":
@@ -1459,7 +1850,23 @@ class AgentRecherche(AgentBase):
 
                 chemin_export = Path(chemin_persistante) / nom_fichier
 
-                with open(chemin_export, "w", newline="", encoding="utf-8") as f:
+                lignes = (
+                    (
+                        interaction["timestamp"],
+                        classif.get("sujet", ""),
+                        classif.get("action", ""),
+                        classif.get("categorie", ""),
+                        ";".join(classif.get("tags", [])),
+                        interaction["prompt"][:100],
+                        interaction["reponse"][:100],
+                    )
+                    for interaction in toutes_interactions
+                    for classif in (interaction["classification"],)
+                )
+
+                with open(
+                    chemin_export, "w", newline="", encoding="utf-8", buffering=1 << 20
+                ) as f:
                     writer = csv.writer(f)
                     writer.writerow(
                         [
@@ -1472,20 +1879,7 @@ class AgentRecherche(AgentBase):
                             "reponse_extrait",
                         ]
                     )
-
-                    for interaction in toutes_interactions:
-                        classif = interaction["classification"]
-                        writer.writerow(
-                            [
-                                interaction["timestamp"],
-                                classif.get("sujet", ""),
-                                classif.get("action", ""),
-                                classif.get("categorie", ""),
-                                ";".join(classif.get("tags", [])),
-                                interaction["prompt"][:100],
-                                interaction["reponse"][:100],
-                            ]
-                        )
+                    writer.writerows(lignes)
 
             self.logger.info(f"Export sémantique créé: {chemin_export}")
             return str(chemin_export)
@@ -1503,13 +1897,21 @@ class AgentRecherche(AgentBase):
     # =========================================================================
 
     def localiser_fichiers_physiques(self, pattern: str) -> List[str]:
+        pattern_clean = pattern.replace('"', "").replace("'", "").strip()
+        return self.localiser_fichiers_physiques_batch([pattern_clean])[pattern_clean]
+
+    def localiser_fichiers_physiques_batch(self, patterns: List[str]) -> Dict[str, List[str]]:
+        """
+        Localise plusieurs fichiers en un seul appel Everything (un processus es.exe au lieu de N).
+        Les résultats sont redistribués par motif d'origine après la requête groupée.
+        """
         root_path = self.auditor.recuperer_racine_projet()
         if not root_path:
             raise RuntimeError("❌ AgentRecherche : Racine projet introuvable.")
 
         # Conversion backslash Windows
         root_str = str(root_path).replace("/", "\\")
-        pattern_clean = pattern.replace('"', "").replace("'", "").strip()
+        patterns_clean = [p.replace('"', "").replace("'", "").strip() for p in patterns]
 
         # ✅ CORRECTIF : Pas de guillemets si pas d'espace dans le path
         if " " in root_str:
@@ -1517,53 +1919,176 @@ class AgentRecherche(AgentBase):
         else:
             base_query = f"path:{root_str}"  # ← SANS guillemets
 
-        # CONSTRUCTION DE LA STRING (et non une liste)
-        # On fusionne la base et le pattern avec un espace
-        query = f"{base_query} {pattern_clean}"
-
-        # On envoie une string unique, comme dans les autres méthodes
-        candidats_bruts = self._executer_everything(query, limit=20)
+        # Racine résolue une seule fois ; Everything renvoie déjà des chemins absolus,
+        # une normalisation purement textuelle suffit pour les candidats (pas de syscall)
+        root_resolved = Path(root_path).resolve()
+        # Préfixe normalisé : test d'appartenance par startswith, sans exception ValueError
+        root_prefix = os.path.join(os.path.normcase(str(root_resolved)), "")
+        if self.chemin_executable_everything is None:
+            # Sans Everything : parcours direct du projet (pas de processus externe)
+            candidats_par_motif = self._walk_project(str(root_resolved), patterns_clean, limit=20)
+        else:
+            candidats_par_motif = self._executer_everything_batch(
+                base_query, patterns_clean, limit=20
+            )
 
-        chemins_valides = []
-        exclusions = [".git", "venv", "__pycache__", "node_modules", "site-packages"]
+        resultats: Dict[str, List[str]] = {}
+        for pattern_clean, candidats_bruts in candidats_par_motif.items():
+            chemins_valides = []
 
-        for chemin in candidats_bruts:
-            try:
-                path_obj = Path(chemin).resolve()
+            for chemin in candidats_bruts:
+                chemin_norm = os.path.normpath(chemin)
                 # Vérification de sécurité : doit être dans le projet
-                # (Peut lever ValueError si le chemin est hors du root)
-                try:
-                    path_obj.relative_to(root_path.resolve())
-                except ValueError:
+                if not os.path.normcase(chemin_norm).startswith(root_prefix):
                     continue
 
-                path_str_lower = str(path_obj).lower()
-                if any(ex in path_str_lower for ex in exclusions):
+                if _EXCLUSIONS_PROJET_RE.search(chemin_norm):
                     continue
 
-                chemins_valides.append(str(path_obj))
-            except Exception:
+                chemins_valides.append(chemin_norm)
+
+            if not chemins_valides:
+                self.logger.log_warning(
+                    f"⚠️ Aucun fichier physique trouvé pour : {pattern_clean}"
+                )
+            resultats[pattern_clean] = chemins_valides
+
+        return resultats
+
+    def _executer_everything_batch(
+        self, base_query: str, patterns: List[str], limit: int = 20
+    ) -> Dict[str, List[str]]:
+        """
+        Regroupe plusieurs motifs dans une seule requête Everything : `base <m1|m2|...>`.
+        Chaque chemin retourné est ensuite rattaché au(x) motif(s) qu'il satisfait.
+        Si la requête groupée est saturée, un motif large a pu prendre toutes les places :
+        les motifs restés vides sont alors relancés individuellement.
+        """
+        motifs = list(dict.fromkeys(p for p in patterns if p))
+        if not motifs:
+            return {p: [] for p in patterns}
+
+        if len(motifs) == 1:
+            candidats = self._executer_everything(f"{base_query} {motifs[0]}", limit=limit)
+            return {p: (candidats if p else []) for p in patterns}
+
+        # Un motif avec espace doit rester un seul terme dans l'alternative
+        alternatives = "|".join(f'"{m}"' if " " in m else m for m in motifs)
+        limite_groupee = limit * len(motifs)
+        candidats = self._executer_everything(
+            f"{base_query} <{alternatives}>", limit=limite_groupee
+        )
+
+        repartition: Dict[str, List[str]] = {}
+        for motif in motifs:
+            regex, sur_chemin = self._compiler_motif_everything(motif)
+            repartition[motif] = [
+                c for c in candidats
+                if self._motif_correspond(regex, sur_chemin, c)
+            ][:limit]
+
+        if len(candidats) >= limite_groupee:
+            for motif in motifs:
+                if not repartition[motif]:
+                    repartition[motif] = self._executer_everything(
+                        f"{base_query} {motif}", limit=limit
+                    )
+
+        return {p: repartition.get(p, []) for p in patterns}
+
+    def _walk_project(
+        self, racine: str, patterns: List[str], limit: int = 20
+    ) -> Dict[str, List[str]]:
+        """
+        Équivalent local de _executer_everything_batch via os.scandir (un seul parcours).
+        Les dossiers exclus sont élagués avant d'être visités ; un motif qui a atteint
+        `limit` n'est plus testé, et le parcours s'arrête quand tous sont satisfaits.
+        """
+        motifs = {
+            p: self._compiler_motif_everything(p) for p in dict.fromkeys(patterns) if p
+        }
+        resultats: Dict[str, List[str]] = {p: [] for p in patterns}
+        a_visiter = [racine]
+
+        while a_visiter and motifs:
+            dossier = a_visiter.pop()
+            try:
+                with os.scandir(dossier) as it:
+                    for entree in it:
+                        if entree.is_dir(follow_symlinks=False):
+                            if not _EXCLUSIONS_PROJET_RE.search(entree.name):
+                                a_visiter.append(entree.path)
+                            continue
+                        for motif, (regex, sur_chemin) in list(motifs.items()):
+                            cible = entree.path if sur_chemin else entree.name
+                            if self._motif_correspond(regex, sur_chemin, cible):
+                                resultats[motif].append(entree.path)
+                                if len(resultats[motif]) >= limit:
+                                    del motifs[motif]
+                        if not motifs:
+                            break
+            except OSError:
                 continue
 
-        if not chemins_valides:
-            self.logger.log_warning(
-                f"⚠️ Aucun fichier physique trouvé pour : {pattern_clean}"
-            )
+        return resultats
 
-        return chemins_valides
+    @staticmethod
+    def _compiler_motif_everything(motif: str) -> Tuple["re.Pattern", bool]:
+        """
+        Traduit un motif Everything en regex insensible à la casse, à appliquer en fullmatch.
+        Comme Everything : des jokers (* ?) couvrent tout le nom, sinon le motif est une
+        sous-chaîne ; un séparateur dans le motif fait comparer le chemin complet.
+        Retourne (regex, comparer_sur_chemin), séparateurs normalisés en "/".
+        """
+        motif = motif.replace("\\", "/")
+        sur_chemin = "/" in motif
+        if "*" in motif or "?" in motif:
+            regex = fnmatch.translate(motif)
+        else:
+            regex = f"(?s:.*{re.escape(motif)}.*)"
+        return re.compile(regex, re.IGNORECASE), sur_chemin
+
+    @staticmethod
+    def _motif_correspond(regex: "re.Pattern", sur_chemin: bool, chemin: str) -> bool:
+        """Applique un motif compilé à un chemin Windows ou POSIX (nom seul ou chemin complet)."""
+        chemin = chemin.replace("\\", "/")
+        cible = chemin if sur_chemin else chemin.rsplit("/", 1)[-1]
+        return regex.fullmatch(cible) is not None
+
+    def _signature_index_whoosh(self) -> Optional[float]:
+        """mtime de la TOC la plus récente : change à chaque commit Whoosh."""
+        mtimes = [p.stat().st_mtime for p in self.chemin_index_whoosh.glob("*.toc")]
+        return max(mtimes) if mtimes else None
 
     def get_stats(self) -> Dict:
         """Retourne les statistiques de l'index"""
+        # Watcher actif et aucun événement depuis le dernier calcul : lecture RAM pure
+        if self._observateur_index is not None and not self._stats_dirty and self._stats_cache:
+            return self._formater_stats(self._stats_cache[1])
+
+        # Index absent : réponse directe, sans passer par open_dir ni exception
+        if not self.chemin_index_whoosh.exists():
+            return {"error": f"Index introuvable : {self.chemin_index_whoosh}"}
+
         try:
-            ix = open_dir(str(self.chemin_index_whoosh))
-            with ix.searcher() as searcher:
-                doc_count = searcher.doc_count()
-
-            return {
-                "documents_indexes": doc_count,
-                # Correction ici :
-                "everything_disponible": self.chemin_executable_everything is not None,
-                "chemin_index_whoosh": str(self.chemin_index_whoosh),
-            }
-        except:
-            return {"error": "Impossible de lire l'index"}
+            self._stats_dirty = False
+            signature = self._signature_index_whoosh()
+            if self._stats_cache and self._stats_cache[0] == signature:
+                doc_count = self._stats_cache[1]
+            else:
+                with self._verrou_searcher:
+                    doc_count = self._get_searcher().doc_count()
+                self._stats_cache = (signature, doc_count)
+
+            return self._formater_stats(doc_count)
+        except (OSError, EmptyIndexError) as e:
+            self._stats_dirty = True
+            return {"error": f"Impossible de lire l'index : {e}"}
+
+    def _formater_stats(self, doc_count: int) -> Dict:
+        return {
+            "documents_indexes": doc_count,
+            # Correction ici :
+            "everything_disponible": self.chemin_executable_everything is not None,
+            "chemin_index_whoosh": self._chemin_index_whoosh_str,
+        }
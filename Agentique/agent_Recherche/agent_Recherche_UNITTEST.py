@@ -13,11 +13,16 @@ Notes:
 import json
 import os
 import shlex
+import tempfile
+import threading
 import unittest
+from collections import OrderedDict
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch, mock_open
 
+import numpy as np
+
 # ----------------------------
 # Imports from your project
 # ----------------------------
@@ -70,9 +75,23 @@ class AgentRechercheUnitTestBase(unittest.TestCase):
 
         # Everything executable path
         agent.chemin_executable_everything = "es.exe"
+        agent._cache_everything = OrderedDict()
+        agent._cache_everything_taille_max = 512
+        agent._cache_everything_ttl = 60
+        agent._verrou_everything = threading.Lock()
 
         # Paths for whoosh (only if needed; usually mocked)
         agent.chemin_index_whoosh = Path(os.getcwd()) / "_tmp_whoosh_index"
+        agent._chemin_index_whoosh_str = str(agent.chemin_index_whoosh)
+        agent._stats_cache = None
+        agent._stats_dirty = True
+        agent._searcher = None
+        agent._verrou_searcher = threading.Lock()
+        agent._observateur_index = None
+        agent._cache_semantique = OrderedDict()
+        agent._cache_semantique_taille_max = 256
+        agent._cache_semantique_seuil = 0.97
+        agent._verrou_cache_semantique = threading.Lock()
 
         # Dependencies optionally used
         agent.agent_memoire = None
@@ -80,6 +99,16 @@ class AgentRechercheUnitTestBase(unittest.TestCase):
 
         return agent
 
+    def make_moteur(self, raw, vecteur=None):
+        """Moteur vectoriel minimal : encoder + rechercher_par_vecteur + index.ntotal."""
+        return SimpleNamespace(
+            encoder=MagicMock(
+                return_value=vecteur if vecteur is not None else np.ones(384, dtype=np.float32)
+            ),
+            rechercher_par_vecteur=MagicMock(return_value=raw),
+            index=SimpleNamespace(ntotal=len(raw)),
+        )
+
 
 @unittest.skipIf(_skip_if_missing(), "Project imports not available.")
 class TestExecuterEverything(AgentRechercheUnitTestBase):
@@ -142,6 +171,93 @@ class TestExecuterEverything(AgentRechercheUnitTestBase):
             res = agent._executer_everything("test", limit=5)
         self.assertEqual(res, [])
 
+    def test_executer_everything_identical_query_hits_cache(self):
+        agent = self.make_agent()
+        with patch("subprocess.run") as sp_run:
+            sp_run.return_value = SimpleNamespace(stdout="X\n", stderr="", returncode=0)
+            first = agent._executer_everything("test", limit=5)
+            second = agent._executer_everything("test", limit=5)
+
+        self.assertEqual(first, second)
+        self.assertEqual(sp_run.call_count, 1)
+
+        agent.invalider_cache_everything()
+        with patch("subprocess.run") as sp_run:
+            sp_run.return_value = SimpleNamespace(stdout="X\n", stderr="", returncode=0)
+            agent._executer_everything("test", limit=5)
+        self.assertEqual(sp_run.call_count, 1)
+
+    def test_batch_requeries_patterns_starved_by_saturated_query(self):
+        agent = self.make_agent()
+        large = [f"C:\\proj\\m{i}.py" for i in range(4)]
+        agent._executer_everything = MagicMock(
+            side_effect=[large, ["C:\\proj\\config.yaml"]]
+        )
+
+        res = agent._executer_everything_batch("path:C:\\proj", ["*.py", "config.yaml"], limit=2)
+
+        self.assertEqual(res["*.py"], large[:2])
+        self.assertEqual(res["config.yaml"], ["C:\\proj\\config.yaml"])
+        agent._executer_everything.assert_called_with("path:C:\\proj config.yaml", limit=2)
+
+    def test_walk_project_stops_once_every_pattern_is_full(self):
+        agent = self.make_agent()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                (Path(tmp) / f"m{i}.py").write_text("", encoding="utf-8")
+            (Path(tmp) / "sous").mkdir()
+            (Path(tmp) / "sous" / "m9.py").write_text("", encoding="utf-8")
+
+            with patch("os.scandir", wraps=os.scandir) as scan:
+                res = agent._walk_project(tmp, ["*.py"], limit=2)
+
+        self.assertEqual(len(res["*.py"]), 2)
+        # Motif satisfait dès le premier dossier : le sous-dossier n'est jamais ouvert
+        scan.assert_called_once_with(tmp)
+
+    def test_compiler_motif_everything_is_anchored_and_separator_agnostic(self):
+        agent = self.make_agent()
+
+        regex, sur_chemin = agent._compiler_motif_everything("agent*.py")
+        self.assertFalse(sur_chemin)
+        self.assertTrue(agent._motif_correspond(regex, sur_chemin, "C:\\proj\\Agent_x.py"))
+        self.assertFalse(agent._motif_correspond(regex, sur_chemin, "C:\\proj\\my_agent_x.py"))
+
+        regex, sur_chemin = agent._compiler_motif_everything("*/agentique/*.py")
+        self.assertTrue(sur_chemin)
+        self.assertTrue(
+            agent._motif_correspond(regex, sur_chemin, "C:\\proj\\Agentique\\a.py")
+        )
+
+        regex, sur_chemin = agent._compiler_motif_everything("config")
+        self.assertTrue(agent._motif_correspond(regex, sur_chemin, "/proj/my_config.yaml"))
+
+    def test_missing_everything_falls_back_to_project_walk(self):
+        agent = self.make_agent()
+        agent.configuration = {}
+
+        with patch("subprocess.run", side_effect=FileNotFoundError("es.exe")):
+            agent.chemin_executable_everything = agent._trouver_everything_strict()
+        self.assertIsNone(agent.chemin_executable_everything)
+        self.assertEqual(agent._executer_everything("test"), [])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "cible.py").write_text("", encoding="utf-8")
+            agent.auditor.recuperer_racine_projet.return_value = tmp
+            res = agent.localiser_fichiers_physiques_batch(["cible.py"])
+
+        self.assertEqual([os.path.basename(c) for c in res["cible.py"]], ["cible.py"])
+
+    def test_batch_does_not_requery_when_not_saturated(self):
+        agent = self.make_agent()
+        agent._executer_everything = MagicMock(return_value=["C:\\proj\\a.py"])
+
+        res = agent._executer_everything_batch("path:C:\\proj", ["a.py", "absent.md"], limit=2)
+
+        self.assertEqual(res["absent.md"], [])
+        agent._executer_everything.assert_called_once()
+
 
 @unittest.skipIf(_skip_if_missing(), "Project imports not available.")
 class TestReadmeTokenLogic(AgentRechercheUnitTestBase):
@@ -169,7 +285,7 @@ class TestTenterRecuperationResume(AgentRechercheUnitTestBase):
             "meta": {"message_turn": 12},
             "reponse": "resume ok",
         }
-        with patch.object(Path, "read_text", return_value=json.dumps(payload)):
+        with patch.object(Path, "read_bytes", return_value=json.dumps(payload).encode()):
             res = agent._tenter_recuperation_resume("SID123", 12, "C:\\persist")
         self.assertIsNotNone(res)
 
@@ -181,7 +297,7 @@ class TestTenterRecuperationResume(AgentRechercheUnitTestBase):
         agent = self.make_agent()
         agent._executer_everything = MagicMock(return_value=["C:\\persist\\bad.json"])
 
-        with patch.object(Path, "read_text", return_value="{not json"):
+        with patch.object(Path, "read_bytes", return_value=b"{not json SID123"):
             res = agent._tenter_recuperation_resume("SID123", 1, "C:\\persist")
 
         self.assertIsNone(res)
@@ -223,7 +339,7 @@ class TestRechercheContexteVectorielle(AgentRechercheUnitTestBase):
                 "meta": {"contenu": "C", "fichier": "z.txt", "type": "vectoriel"},
             },
         ]
-        moteur = SimpleNamespace(rechercher=MagicMock(return_value=raw))
+        moteur = self.make_moteur(raw)
         agent.agent_memoire = SimpleNamespace(moteur_vectoriel=moteur)
         agent.auditor.get_path.return_value = "C:\\persist"
 
@@ -262,7 +378,7 @@ class TestRechercheContexteVectorielle(AgentRechercheUnitTestBase):
                 },
             }
         ]
-        moteur = SimpleNamespace(rechercher=MagicMock(return_value=raw))
+        moteur = self.make_moteur(raw)
         agent.agent_memoire = SimpleNamespace(moteur_vectoriel=moteur)
         agent.auditor.get_path.return_value = "C:\\persist"
 
@@ -277,6 +393,28 @@ class TestRechercheContexteVectorielle(AgentRechercheUnitTestBase):
         self.assertEqual(res.souvenirs_bruts[0].contenu, "RESUME")
         self.assertEqual(res.souvenirs_bruts[0].type, "resume_consolide")
 
+    def test_recherche_contexte_vectorielle_semantic_cache_hit(self):
+        agent = self.make_agent()
+        raw = [{"score": 1.0, "meta": {"contenu": "A", "fichier": "x.txt"}}]
+        moteur = self.make_moteur(raw)
+        agent.agent_memoire = SimpleNamespace(moteur_vectoriel=moteur)
+        agent.auditor.get_path.return_value = "C:\\persist"
+
+        first = agent.recherche_contexte_memoire_vectorielle("q", intention=None)
+        second = agent.recherche_contexte_memoire_vectorielle("q bis", intention=None)
+
+        self.assertEqual(first.souvenirs_bruts, second.souvenirs_bruts)
+        self.assertEqual(moteur.rechercher_par_vecteur.call_count, 1)
+        # Chaque hit est une copie : retoucher un score ne corrompt pas le suivant
+        second.souvenirs_bruts[0].score = -1.0
+        third = agent.recherche_contexte_memoire_vectorielle("q", intention=None)
+        self.assertEqual(third.souvenirs_bruts[0].score, first.souvenirs_bruts[0].score)
+
+        # Un ajout dans l'index invalide le cache
+        moteur.index.ntotal += 1
+        agent.recherche_contexte_memoire_vectorielle("q", intention=None)
+        self.assertEqual(moteur.rechercher_par_vecteur.call_count, 2)
+
 
 @unittest.skipIf(_skip_if_missing(), "Project imports not available.")
 class TestRechercheHistorique(AgentRechercheUnitTestBase):
@@ -290,11 +428,12 @@ class TestRechercheHistorique(AgentRechercheUnitTestBase):
             Path("C:\\hist\\interaction_2.json"),
         ]
 
-        # Patch Path.glob + os.path.getmtime
+        # Patch du listing scandir (déjà trié, plus récent en tête)
         with (
             patch.object(Path, "exists", return_value=True),
-            patch.object(Path, "glob", return_value=fake_files),
-            patch("os.path.getmtime", return_value=1.0),
+            patch.object(
+                AgentRecherche, "_lister_interactions_par_mtime", return_value=fake_files
+            ),
         ):
             # Each file read returns JSON with sid/turn
             agent._lire_fichier_safe = MagicMock(
@@ -345,6 +484,33 @@ class TestRechercheVerbatim(AgentRechercheUnitTestBase):
         self.assertEqual(res.souvenirs_bruts[0].type, "verbatim_prouve")
 
 
+@unittest.skipIf(_skip_if_missing(), "Project imports not available.")
+class TestRechercherCitationExacte(AgentRechercheUnitTestBase):
+    def test_only_files_containing_phrase_are_decoded(self):
+        agent = self.make_agent()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            avec = Path(tmp) / "historique_1.json"
+            sans = Path(tmp) / "historique_2.json"
+            vide = Path(tmp) / "historique_3.json"
+            avec.write_text('{"reponse": "Salut, EXACT_PHRASE ici"}', encoding="utf-8")
+            sans.write_text('{"reponse": "rien à voir"}', encoding="utf-8")
+            vide.write_bytes(b"")
+
+            agent.auditor.get_path.return_value = tmp
+            agent._executer_everything = MagicMock(
+                return_value=[str(avec), str(sans), str(vide)]
+            )
+
+            with patch.object(
+                Path, "read_text", autospec=True, side_effect=Path.read_text
+            ) as lecture:
+                res = agent.rechercher_citation_exacte("EXACT_PHRASE")
+
+        self.assertEqual([s.titre for s in res], ["historique_1.json"])
+        lecture.assert_called_once()
+
+
 @unittest.skipIf(_skip_if_missing(), "Project imports not available.")
 class TestRechercheFichierHorsMemoire(AgentRechercheUnitTestBase):
     def test_recherche_fichier_hors_memoire_filters_blacklist_and_whitelist(self):
@@ -18,14 +18,33 @@ Responsabilités :
 """
 
 import re
+import stat
 import time
 import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# --- IMPORT SÉCURISÉ ---
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
 
 from agentique.base.contrats_interface import Souvenir
 from agentique.base.config_paths import ROOT_DIR
 
+# Noms de fichiers cités dans une requête (suite de lettres/chiffres/underscores/tirets
+# se terminant par .py, .md, .yaml, .json, etc.)
+_NOM_FICHIER_RE = re.compile(r"[\w\-\.]+\.(?:py|md|yaml|yml|json|txt)", re.IGNORECASE)
+
+# Parseur JSON natif C si disponible (accepte des bytes), sinon stdlib
+_charger_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
 
 class RechercheMemoireTool:
     """
@@ -42,6 +61,34 @@ class RechercheMemoireTool:
     def __init__(self, agent_recherche):
         self.agent_recherche = agent_recherche
 
+        # Table de dispatch alias -> méthode liée (résolue une fois, lookup O(1) par appel)
+        self._dispatch = {
+            # Recherche de Code / Fichiers Projet (Everything + GitIgnore)
+            "code": agent_recherche.recherche_fichier_hors_memoire,
+            "fichier": agent_recherche.recherche_fichier_hors_memoire,
+            # Recherche de Citation Exacte (Whoosh + Check Disque)
+            "verbatim": agent_recherche.recuperer_resume_par_session,
+            "citation": agent_recherche.recuperer_resume_par_session,
+            # Recherche de Concept / Souvenir flou (requête brute, sans intention)
+            "concept": agent_recherche.recherche_contexte_memoire_vectorielle,
+            "souvenir": agent_recherche.recherche_contexte_memoire_vectorielle,
+        }
+
+        # Contenus lus, indexés par chemin et validés par st_mtime_ns
+        self._cache_contenus: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_contenus_taille_max = 128
+        self._verrou_cache_contenus = threading.Lock()
+        # Lectures disque parallèles pour les lots de fichiers (fichiers actifs de Semi)
+        self._pool_lecture = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="lecture-fichiers"
+        )
+        # Cartographie rendue, réutilisée tant que project_map.json n'est pas réécrit
+        self._cache_carte: Dict[str, Any] = {"mtime": 0, "souvenir": None}
+
+    def invalider_cache_fichiers(self) -> None:
+        """Oublie les contenus mis en cache."""
+        self._cache_contenus.clear()
+
     # =========================================================================
     # 🧠 MÉTHODES DE TRAITEMENT (Appelées par Semi)
     # =========================================================================
@@ -61,29 +108,9 @@ class RechercheMemoireTool:
         Returns:
             Dict[str, Any]: Résultat standardisé contenant succès, contenus et métadonnées.
         """
-        resultat = None
-
         try:
-            # 1. Recherche de Code / Fichiers Projet
-            if type_recherche == "code" or type_recherche == "fichier":
-                # Mappe vers : recherche_fichier_hors_memoire (Everything + GitIgnore)
-                resultat = self.agent_recherche.recherche_fichier_hors_memoire(query)
-
-            # 2. Recherche de Citation Exacte
-            elif type_recherche == "verbatim" or type_recherche == "citation":
-                # Mappe vers : recuperer_resume_par_session (Whoosh + Check Disque)
-                resultat = self.agent_recherche.recuperer_resume_par_session(query)
-
-            # 3. Recherche de Concept / Souvenir flou
-            elif type_recherche == "concept" or type_recherche == "souvenir":
-                # Mappe vers : recherche_contexte_memoire_vectorielle (Sans intention ici, c'est une requête brute)
-                resultat = self.agent_recherche.recherche_contexte_memoire_vectorielle(
-                    query
-                )
-
-            # 4. Recherche Documentation Globale
-            elif type_recherche == "readme" or type_recherche == "doc":
-                # Mappe vers : rechercher_readme
+            # Documentation Globale : sortie spécifique (aperçu des README)
+            if type_recherche == "readme" or type_recherche == "doc":
                 docs = self.agent_recherche.rechercher_readme(query)
                 # On convertit manuellement en ResultatRecherche pour uniformiser la sortie outil
                 return {
@@ -92,8 +119,10 @@ class RechercheMemoireTool:
                     "items": [d.contenu[:500] + "..." for d in docs],  # Preview
                 }
 
-            else:
+            fn = self._dispatch.get(type_recherche)
+            if fn is None:
                 return {"error": f"Type de recherche inconnu : {type_recherche}"}
+            resultat = fn(query)
 
             # Formatage de la réponse pour le LLM
             if resultat:
@@ -131,10 +160,7 @@ class RechercheMemoireTool:
         # 2. Découpage intelligent (Virgules, 'et', 'and') pour obtenir des fichiers atomiques
         final_queries = []
         for q in raw_queries:
-            # Regex : cherche une suite de lettres/chiffres/underscores/tirets
-            # se terminant par .py, .md, .yaml, .json, etc.
-            pattern = r"[\w\-\.]+\.(?:py|md|yaml|yml|json|txt)"
-            fichiers_detectes = re.findall(pattern, q, flags=re.IGNORECASE)
+            fichiers_detectes = _NOM_FICHIER_RE.findall(q)
 
             if fichiers_detectes:
                 final_queries.extend(fichiers_detectes)
@@ -142,15 +168,21 @@ class RechercheMemoireTool:
                 # Fallback si aucun suffixe n'est trouvé (recherche classique)
                 final_queries.append(q.strip())
 
-        # 3. Exécution itérative -> Création d'une liste de Souvenirs
-        payload_souvenirs = []
+        # 3. Localisation groupée (un seul appel Everything pour toutes les cibles)
+        # Nettoyage (au cas où le LLM envoie "fichier.py | intention")
+        noms_fichiers = [target.split("|")[0].strip() for target in final_queries]
+        chemins_par_nom = self.agent_recherche.localiser_fichiers_physiques_batch(
+            noms_fichiers
+        )
 
-        for target in final_queries:
-            # Nettoyage (au cas où le LLM envoie "fichier.py | intention")
-            nom_fichier = target.split("|")[0].strip()
+        # 4. Exécution itérative -> Création d'une liste de Souvenirs
+        payload_souvenirs = []
 
+        for nom_fichier in noms_fichiers:
             # Lecture via la méthode interne
-            contenu_fichier = self.lire_fichier_complet(nom_fichier)
+            contenu_fichier = self.lire_fichier_complet(
+                nom_fichier, chemins=chemins_par_nom.get(nom_fichier)
+            )
 
             # Création de l'objet Souvenir atomique
             payload_souvenirs.append(
@@ -210,31 +242,40 @@ class RechercheMemoireTool:
             }
 
         try:
-            with open(map_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # On transforme le JSON en liste lisible pour le LLM
-            # data est sous la forme { "path/to/file.py": "Description", ... }
-            liste_fichiers = sorted(data.keys())
-            formatted_list = "\n".join([f"- {f}" for f in liste_fichiers])
-
-            contenu_reponse = (
-                f"🗺️ **CARTOGRAPHIE DU PROJET** (Source: AgentAuditor)\n"
-                f"Total fichiers indexés: {len(liste_fichiers)}\n\n"
-                f"{formatted_list}\n\n"
-                f"👉 _Copie ces chemins dans ton plan d'action pour itérer dessus._"
-            )
+            # Carte inchangée depuis le dernier rendu : aucune relecture ni re-tri
+            mtime = map_path.stat().st_mtime_ns
+            if self._cache_carte["souvenir"] is None or self._cache_carte["mtime"] != mtime:
+                liste_fichiers = self._lire_index_trie(map_path, mtime)
+                if liste_fichiers is None:
+                    data = _charger_json(map_path.read_bytes())
+
+                    # On transforme le JSON en liste lisible pour le LLM
+                    # data est sous la forme { "path/to/file.py": "Description", ... }
+                    liste_fichiers = sorted(data)
+                formatted_list = "\n".join(f"- {f}" for f in liste_fichiers)
+
+                contenu_reponse = (
+                    f"🗺️ **CARTOGRAPHIE DU PROJET** (Source: AgentAuditor)\n"
+                    f"Total fichiers indexés: {len(liste_fichiers)}\n\n"
+                    f"{formatted_list}\n\n"
+                    f"👉 _Copie ces chemins dans ton plan d'action pour itérer dessus._"
+                )
 
-            return {
-                "type": "MEMORY_RESULTS",
-                "payload": [
-                    Souvenir(
+                self._cache_carte = {
+                    "mtime": mtime,
+                    "souvenir": Souvenir(
                         titre="project_map.json",
                         contenu=contenu_reponse,
                         type="cartographie_projet",
                         score=1.0,
-                    )
-                ],
+                    ),
+                }
+                # La carte a été réécrite : les chemins résolus peuvent avoir bougé
+                self.invalider_cache_fichiers()
+
+            return {
+                "type": "MEMORY_RESULTS",
+                "payload": [self._cache_carte["souvenir"]],
                 "original_query": "lire_cartographie",
             }
 
@@ -256,7 +297,42 @@ class RechercheMemoireTool:
     # 🔧 MÉTHODES INTERNES (Lecture Physique)
     # =========================================================================
 
-    def lire_fichier_complet(self, nom_fichier: str) -> str:
+    @staticmethod
+    def _lire_index_trie(map_path: Path, mtime_map: int) -> Optional[List[str]]:
+        """
+        Liste pré-triée écrite par l'AgentAuditor à côté de la map (project_map.keys.txt).
+        None si absente, plus ancienne que la map ou illisible : on retombe sur le JSON.
+        """
+        keys_path = map_path.with_name("project_map.keys.txt")
+        try:
+            if keys_path.stat().st_mtime_ns < mtime_map:
+                return None
+            return keys_path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return None
+
+    def lire_fichiers_batch(self, noms_fichiers: List[str]) -> Dict[str, str]:
+        """
+        Lecture groupée (ex: fichiers actifs de Semi) : une seule localisation
+        Everything pour tous les noms, puis lectures disque en parallèle.
+
+        Returns:
+            Dict[str, str]: nom -> contenu formaté (ou message d'erreur), ordre d'entrée conservé.
+        """
+        noms = list(dict.fromkeys(noms_fichiers))
+        if not noms:
+            return {}
+
+        chemins_par_nom = self.agent_recherche.localiser_fichiers_physiques_batch(noms)
+        contenus = self._pool_lecture.map(
+            lambda nom: self.lire_fichier_complet(nom, chemins=chemins_par_nom.get(nom)),
+            noms,
+        )
+        return dict(zip(noms, contenus))
+
+    def lire_fichier_complet(
+        self, nom_fichier: str, chemins: Optional[List[str]] = None
+    ) -> str:
         """
         Lecture physique et formatage contextuel d'un fichier (Ground Truth).
 
@@ -269,12 +345,14 @@ class RechercheMemoireTool:
 
         Args:
             nom_fichier (str): Nom ou chemin partiel du fichier.
+            chemins (List[str], optional): Chemins déjà localisés (lecture groupée).
 
         Returns:
             str: Contenu formaté ou message d'erreur explicite.
         """
-        # 1. Localisation via AgentRecherche (Everything)
-        chemins = self.agent_recherche.localiser_fichiers_physiques(nom_fichier)
+        # 1. Localisation via AgentRecherche (Everything), sauf si déjà fournie
+        if chemins is None:
+            chemins = self.agent_recherche.localiser_fichiers_physiques(nom_fichier)
 
         # CAS A : FICHIER NON TROUVÉ
         if not chemins:
@@ -287,13 +365,27 @@ class RechercheMemoireTool:
         target_path = Path(chemins[0])
 
         try:
-            if not target_path.is_file():
+            st = target_path.stat()
+            if not stat.S_ISREG(st.st_mode):
                 return (
                     f"⚠️ [ERREUR] '{target_path.name}' est un dossier, pas un fichier."
                 )
 
-            # Lecture brute
-            contenu = target_path.read_text(encoding="utf-8", errors="replace")
+            # Lecture brute (sautée si le fichier n'a pas changé depuis la dernière lecture)
+            cle = str(target_path)
+            with self._verrou_cache_contenus:
+                en_cache = self._cache_contenus.get(cle)
+                if en_cache is not None and en_cache[0] == st.st_mtime_ns:
+                    self._cache_contenus.move_to_end(cle)
+            if en_cache is not None and en_cache[0] == st.st_mtime_ns:
+                contenu = en_cache[1]
+            else:
+                contenu = target_path.read_text(encoding="utf-8", errors="replace")
+                with self._verrou_cache_contenus:
+                    self._cache_contenus[cle] = (st.st_mtime_ns, contenu)
+                    self._cache_contenus.move_to_end(cle)
+                    if len(self._cache_contenus) > self._cache_contenus_taille_max:
+                        self._cache_contenus.popitem(last=False)
 
             # Détection extension pour syntax highlighting
             ext = target_path.suffix.lower().replace(".", "")
@@ -7,8 +7,9 @@ Objectif : Valider le routing des recherches, la lecture physique des fichiers e
 """
 
 import unittest
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock, patch
 import json
+import stat
 
 # Import du module à tester
 from agentique.sous_agents_gouvernes.agent_Recherche.recherche_memoire import (
@@ -85,7 +86,10 @@ class TestRechercheMemoireTool(unittest.TestCase):
 
         # 2. Mock du système de fichiers (Path)
         with (
-            patch("pathlib.Path.is_file", return_value=True),
+            patch(
+                "pathlib.Path.stat",
+                return_value=MagicMock(st_mode=stat.S_IFREG, st_mtime_ns=1),
+            ),
             patch("pathlib.Path.read_text", return_value="print('hello world')"),
         ):
             res = self.tool.lire_fichier_complet("test.py")
@@ -109,10 +113,59 @@ class TestRechercheMemoireTool(unittest.TestCase):
             "/fake/dir"
         ]
 
-        with patch("pathlib.Path.is_file", return_value=False):
+        with patch(
+            "pathlib.Path.stat",
+            return_value=MagicMock(st_mode=stat.S_IFDIR, st_mtime_ns=1),
+        ):
             res = self.tool.lire_fichier_complet("dossier")
             self.assertIn("est un dossier", res)
 
+    def test_lire_fichier_complet_cache(self):
+        """Vérifie qu'un fichier inchangé n'est pas relu (la localisation reste à AgentRecherche)."""
+        self.mock_agent_recherche.localiser_fichiers_physiques.return_value = [
+            "/fake/path/test.py"
+        ]
+
+        with (
+            patch(
+                "pathlib.Path.stat",
+                return_value=MagicMock(st_mode=stat.S_IFREG, st_mtime_ns=1),
+            ),
+            patch("pathlib.Path.read_text", return_value="x = 1") as mock_read,
+        ):
+            self.tool.lire_fichier_complet("test.py")
+            res = self.tool.lire_fichier_complet("test.py")
+
+        self.assertIn("x = 1", res)
+        self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(
+            self.mock_agent_recherche.localiser_fichiers_physiques.call_count, 2
+        )
+
+    def test_lire_fichiers_batch(self):
+        """Vérifie la localisation groupée unique et l'ordre des résultats."""
+        self.mock_agent_recherche.localiser_fichiers_physiques_batch.return_value = {
+            "a.py": ["/fake/path/a.py"],
+            "b.py": [],
+        }
+
+        with (
+            patch(
+                "pathlib.Path.stat",
+                return_value=MagicMock(st_mode=stat.S_IFREG, st_mtime_ns=1),
+            ),
+            patch("pathlib.Path.read_text", return_value="a = 1"),
+        ):
+            res = self.tool.lire_fichiers_batch(["a.py", "b.py", "a.py"])
+
+        self.assertEqual(list(res), ["a.py", "b.py"])
+        self.assertIn("a = 1", res["a.py"])
+        self.assertIn("INTROUVABLE", res["b.py"])
+        self.mock_agent_recherche.localiser_fichiers_physiques_batch.assert_called_once_with(
+            ["a.py", "b.py"]
+        )
+        self.mock_agent_recherche.localiser_fichiers_physiques.assert_not_called()
+
     # =========================================================================
     # 3. TEST TRAITEMENT BATCH (traiter_recherche_memoire)
     # =========================================================================
@@ -145,10 +198,11 @@ class TestRechercheMemoireTool(unittest.TestCase):
         """Vérifie la lecture et le formatage du fichier project_map.json."""
         fake_json = json.dumps({"a.py": "desc", "b.py": "desc"})
 
-        # On mock l'existence du fichier et son ouverture
+        # On mock l'existence du fichier et sa lecture
         with (
             patch("pathlib.Path.exists", return_value=True),
-            patch("builtins.open", mock_open(read_data=fake_json)),
+            patch("pathlib.Path.stat", return_value=MagicMock(st_mtime_ns=1)),
+            patch("pathlib.Path.read_bytes", return_value=fake_json.encode("utf-8")),
         ):
             res = self.tool.traiter_lecture_cartographie({})
 
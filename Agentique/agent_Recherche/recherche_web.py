@@ -6,11 +6,22 @@ Implémente une boucle cognitive : Search -> Scrape -> Evaluate -> Repeat.
 Utilise BeautifulSoup pour la lecture profonde et le LLM pour l'évaluation de pertinence.
 """
 
+import os
 import time
+import atexit
+import asyncio
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlparse
 import requests
 import json
 import re
-from typing import List, Dict, Tuple
+import multiprocessing
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Tuple, Optional
 from bs4 import BeautifulSoup
 # --- IMPORT SÉCURISÉ ---
 try:
@@ -20,22 +31,332 @@ except ImportError:
     DDGS = None
     DDGS_AVAILABLE = False
 
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    HTMLParser = None
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import json5
+    JSON5_AVAILABLE = True
+except ImportError:
+    json5 = None
+    JSON5_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# Fichier BPE de cl100k tel que tiktoken le nomme dans son cache local (sha1 de l'URL)
+_URL_BPE_CL100K = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+
+
+def _bpe_cl100k_en_cache() -> bool:
+    """Vrai si tiktoken peut charger cl100k sans réseau (même convention de cache que tiktoken)."""
+    dossier = os.environ.get("TIKTOKEN_CACHE_DIR") or os.environ.get("DATA_GYM_CACHE_DIR")
+    if not dossier:
+        dossier = os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    cle = hashlib.sha1(_URL_BPE_CL100K.encode()).hexdigest()
+    return os.path.exists(os.path.join(dossier, cle))
+
 from agentique.base.META_agent import AgentBase
 
+# En-têtes de scraping (gzip/deflate : décodés nativement par requests et aiohttp)
+_ENTETES_HTTP = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Balises considérées comme du bruit lors du scraping
+_BALISES_BRUIT = ["script", "style", "nav", "footer", "header", "aside"]
+# Espaces parasites : blancs autour des sauts de ligne, ou suites d'espaces/tabulations
+_NETTOYAGE_RE = re.compile(r'[ \t]*\n[ \t\n]*|[ \t]{2,}')
+# Clôtures markdown autour du JSON renvoyé par le LLM
+_BALISE_JSON_RE = re.compile(r'```json\s*|\s*```')
+# Réparations JSON courantes : virgules traînantes, chaînes entre apostrophes
+_VIRGULE_TRAINANTE_RE = re.compile(r',\s*([}\]])')
+_CHAINE_APOSTROPHES_RE = re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'")
+_DEBUT_JSON_RE = re.compile(r'[\[{]')
+
+
+# Charset déclaré : en-tête Content-Type, sinon <meta charset> en début de page
+_CHARSET_ENTETE_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_CHARSET_META_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+
+def _decoder_html(octets: bytes, content_type: str) -> str:
+    """
+    Décode une page téléchargée, identiquement pour requests et aiohttp :
+    charset de l'en-tête, sinon balise <meta> (2 premiers Ko), sinon UTF-8.
+    """
+    m = _CHARSET_ENTETE_RE.search(content_type or "") or _CHARSET_META_RE.search(octets[:2048])
+    charset = m.group(1) if m else "utf-8"
+    if isinstance(charset, bytes):
+        charset = charset.decode("ascii", errors="ignore")
+    try:
+        return octets.decode(charset, errors="replace")
+    except LookupError:  # Charset inconnu de Python
+        return octets.decode("utf-8", errors="replace")
+
+
+def _remplacer_blancs(m: "re.Match") -> str:
+    return '\n' if '\n' in m.group(0) else ' '
+
+
+def _isoler_bloc_json(texte: str) -> Optional[str]:
+    """Premier bloc JSON équilibré ([...] ou {...}) du texte, en ignorant les chaînes."""
+    debut = _DEBUT_JSON_RE.search(texte)
+    if not debut:
+        return None
+    profondeur, dans_chaine, echappe = 0, False, False
+    for i in range(debut.start(), len(texte)):
+        c = texte[i]
+        if dans_chaine:
+            if echappe:
+                echappe = False
+            elif c == '\\':
+                echappe = True
+            elif c == '"':
+                dans_chaine = False
+        elif c == '"':
+            dans_chaine = True
+        elif c in '[{':
+            profondeur += 1
+        elif c in ']}':
+            profondeur -= 1
+            if profondeur == 0:
+                return texte[debut.start():i + 1]
+    # Réponse tronquée : on tente quand même le reste
+    return texte[debut.start():]
+
+
+def _extraire_json_tolerant(texte: str):
+    """
+    Parse la réponse JSON d'un LLM malgré la prose autour, les clôtures markdown,
+    les virgules traînantes ou les apostrophes. Lève ValueError si rien n'est récupérable.
+    """
+    bloc = _isoler_bloc_json(_BALISE_JSON_RE.sub('', texte))
+    if bloc is None:
+        raise ValueError("aucun bloc JSON dans la réponse")
+    try:
+        return orjson.loads(bloc) if ORJSON_AVAILABLE else json.loads(bloc)
+    except ValueError:
+        pass
+    if JSON5_AVAILABLE:
+        try:
+            return json5.loads(bloc)
+        except ValueError:
+            pass
+    repare = _VIRGULE_TRAINANTE_RE.sub(r'\1', bloc)
+    if '"' not in repare:
+        repare = _CHAINE_APOSTROPHES_RE.sub(r'"\1"', repare)
+    return json.loads(repare)
+
+
+# Empreintes SimHash : deux pages à <= 6 bits d'écart sont considérées comme miroirs
+_SIMHASH_DISTANCE_MAX = 6
+
+
+def _simhash_64(texte: str) -> int:
+    """SimHash 64 bits sur des trigrammes de mots (détection de pages quasi identiques)."""
+    mots = texte.lower().split()
+    shingles = {" ".join(mots[i:i + 3]) for i in range(max(len(mots) - 2, 1))}
+    empreintes = b"".join(
+        hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest() for sh in shingles
+    )
+    # Vote bit à bit vectorisé : chaque empreinte devient une ligne de 64 bits
+    bits = np.unpackbits(np.frombuffer(empreintes, dtype=np.uint8)).reshape(-1, 64)
+    majorite = bits.sum(axis=0) * 2 > len(bits)
+    return int.from_bytes(np.packbits(majorite).tobytes(), "big")
+
+
+class _CacheJugeSemantique:
+    """
+    Cache sémantique des verdicts du Juge Interne (`_analyser_batch`), persistant sur disque.
+
+    La recherche se fait sur une matrice float32 en RAM [N, D], préallouée à la capacité
+    (produit matrice-vecteur BLAS, pas de copie par ajout). Sur disque : `judge_cache.npy`
+    (vecteurs en float16) et `judge_cache.jsonl` (verdicts avec l'URL jugée, même ordre),
+    réécrits en entier par lots de `lot_persistance` ajouts et par `persister()` à
+    l'extinction, via fichier temporaire + os.replace : aucun fichier mappé à agrandir.
+    Un verdict n'est servi que pour la même URL : la similarité ne départage que les
+    formulations de l'objectif. Éviction LRU via une horloge d'accès.
+    """
+
+    def __init__(
+        self,
+        dossier: Optional[str] = None,
+        seuil: float = 0.92,
+        taille_max: int = 512,
+        lot_persistance: int = 16,
+    ):
+        self.seuil = seuil
+        self.taille_max = taille_max
+        self.lot_persistance = lot_persistance
+        self._M: Optional[np.ndarray] = None  # float32 [taille_max + 1, D], N lignes utiles
+        self.verdicts: List[Dict] = []
+        self.acces = np.zeros(0, dtype=np.int64)
+        self._horloge = 0
+        self._non_persistes = 0
+        self._verrou = threading.Lock()
+        self.chemin_vecteurs = os.path.join(dossier, "judge_cache.npy") if dossier else None
+        self.chemin_verdicts = os.path.join(dossier, "judge_cache.jsonl") if dossier else None
+
+    def charger(self) -> None:
+        if not self.chemin_verdicts:
+            return
+        if not (os.path.exists(self.chemin_verdicts) and os.path.exists(self.chemin_vecteurs)):
+            return
+        with open(self.chemin_verdicts, "r", encoding="utf-8") as f:
+            verdicts = [json.loads(l) for l in f if l.strip()]
+        vecteurs = np.load(self.chemin_vecteurs)
+        if vecteurs.ndim != 2:
+            return
+        # Écriture interrompue : on garde le préfixe cohérent plutôt que de tout jeter
+        n = min(len(verdicts), len(vecteurs), self.taille_max)
+        if not n:
+            return
+        self._allouer(vecteurs.shape[1])
+        self._M[:n] = vecteurs[:n]
+        self.verdicts = verdicts[:n]
+        # Ordre d'insertion = ordre d'ancienneté au démarrage
+        self.acces = np.arange(1, n + 1, dtype=np.int64)
+        self._horloge = n
+
+    def _allouer(self, dim: int) -> None:
+        self._M = np.empty((self.taille_max + 1, dim), dtype=np.float32)
+
+    def chercher(self, emb: np.ndarray, url: str) -> Optional[Dict]:
+        with self._verrou:
+            if self._M is None or not self.verdicts:
+                return None
+            # Deux pages d'un même site partagent souvent 2 Ko de navigation : URL exacte exigée
+            candidats = [i for i, v in enumerate(self.verdicts) if v.get("url") == url]
+            if not candidats:
+                return None
+            scores = self._M[candidats] @ np.asarray(emb, dtype=np.float32)
+            j = int(np.argmax(scores))
+            if float(scores[j]) < self.seuil:
+                return None
+            i = candidats[j]
+            self._horloge += 1
+            self.acces[i] = self._horloge
+            return {k: v for k, v in self.verdicts[i].items() if k != "url"}
+
+    def ajouter(self, emb: np.ndarray, verdict: Dict, url: str) -> None:
+        ligne = np.asarray(emb, dtype=np.float32).reshape(-1)
+        with self._verrou:
+            if self._M is None:
+                self._allouer(ligne.shape[0])
+            self._M[len(self.verdicts)] = ligne
+            self._horloge += 1
+            self.acces = np.append(self.acces, self._horloge)
+            self.verdicts.append(dict(verdict, url=url))
+
+            if len(self.verdicts) > self.taille_max:
+                self._compacter()
+            self._non_persistes += 1
+            if self._non_persistes >= self.lot_persistance:
+                self._ecrire()
+
+    def persister(self) -> None:
+        """Écrit les ajouts encore en RAM (à appeler à l'extinction)."""
+        with self._verrou:
+            if self._non_persistes:
+                self._ecrire()
+
+    def _compacter(self) -> None:
+        """Ne garde que les rangées les plus récemment utilisées (3/4 de la capacité)."""
+        garder = np.sort(np.argsort(self.acces)[-(self.taille_max * 3 // 4):])
+        n = len(garder)
+        self._M[:n] = self._M[garder]
+        self.verdicts = [self.verdicts[i] for i in garder]
+        self.acces = self.acces[garder]
+
+    def _ecrire(self) -> None:
+        """Réécrit les deux fichiers (temporaire + os.replace) ; appelé sous verrou."""
+        self._non_persistes = 0
+        if self.chemin_vecteurs is None or self._M is None:
+            return
+        os.makedirs(os.path.dirname(self.chemin_vecteurs), exist_ok=True)
+        tmp_vecteurs = self.chemin_vecteurs + ".tmp"
+        tmp_verdicts = self.chemin_verdicts + ".tmp"
+        with open(tmp_vecteurs, "wb") as f:
+            np.save(f, self._M[:len(self.verdicts)].astype(np.float16))
+        with open(tmp_verdicts, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(v, ensure_ascii=False) + "\n" for v in self.verdicts)
+        os.replace(tmp_vecteurs, self.chemin_vecteurs)
+        os.replace(tmp_verdicts, self.chemin_verdicts)
+
+
 class RechercheWeb(AgentBase):
-    def __init__(self, moteur_llm):
+    def __init__(self, moteur_llm, moteur_vectoriel=None):
         super().__init__(nom_agent="RechercheWeb")
         
         if not moteur_llm:
             raise RuntimeError("RechercheWeb nécessite un MoteurLLM pour évaluer le contenu.")
         
         self.moteur_llm = moteur_llm
+        # Encodeur du système (MoteurVectoriel) pour le cache de jugements ; None = pas de cache
+        self.moteur_vectoriel = moteur_vectoriel
         
         # Configuration Haute Capacité (RTX 3090 / Qwen 128k)
         self.MAX_CONTENT_LEN = 100000  # ~25k tokens, très large pour ne pas limiter
         self.MAX_TOURS = 4             # Nombre max d'itérations de recherche
         self.SEUIL_SUFFISANCE = 8      # Sur 10, pour arrêter la recherche
         self.TIMEOUT_REQUEST = 10      # Secondes pour le scraping
+        self.MAX_SCRAPERS = 8          # Téléchargements simultanés par requête
+        self.MAX_TOKENS_ANALYSE = 4000 # Budget de tokens par page soumise au Juge
+        self.DELAI_HOTE = 0.5          # Secondes minimum entre deux requêtes vers un même hôte
+        self.NB_PARSEURS = min(4, os.cpu_count() or 1)  # Processus de parsing HTML
+
+        # Pool de processus pour le parsing (CPU pur, hors GIL), créé au premier lot puis
+        # réutilisé : en "spawn", chaque worker ré-importe le module d'entrée une seule fois.
+        # Repli sur des threads si les processus sont indisponibles ou tombent.
+        self._pool_parsing: Optional[Executor] = None
+        self._verrou_pool_parsing = threading.Lock()
+        atexit.register(self._fermer_pool_parsing)
+
+        # Politesse par hôte : prochain créneau réservé par netloc (partagé entre threads)
+        self._hotes_dernier: Dict[str, float] = {}
+        self._verrou_hotes = threading.Lock()
+
+        # Empreintes SimHash des pages vues pendant la recherche en cours
+        self._empreintes_vues: List[int] = []
+
+        # Tokeniseur chargé au premier usage (voir _tokeniseur) ; None = approximation chars/4
+        self._tok = None
+        self._tok_charge = False
+
+        # Cache sémantique des jugements LLM (persisté entre les sessions, par lots)
+        dossier_persistant = self.auditor.get_path("persistante", "memoire")
+        self.cache_juge = _CacheJugeSemantique(dossier_persistant, seuil=0.92, taille_max=512)
+        try:
+            self.cache_juge.charger()
+        except Exception as e:
+            self.logger.log_warning(f"Cache juge illisible, cache en mémoire seulement : {e}")
+            self.cache_juge = _CacheJugeSemantique(None, seuil=0.92, taille_max=512)
+        # Dernier lot (< lot_persistance ajouts) écrit à l'arrêt du processus
+        atexit.register(self.cache_juge.persister)
 
     # =========================================================================
     # 1. PLANIFICATION (Query Expansion)
@@ -58,11 +379,8 @@ TES REQUÊTES (JSON) :"""
             # On utilise generer (non-stream) car on veut un JSON court
             reponse = self.moteur_llm.generer(prompt)
             texte = reponse.get("response", "").strip()
-            
-            # Nettoyage Markdown éventuel
-            texte = texte.replace("```json", "").replace("```", "").strip()
-            
-            requetes = json.loads(texte)
+
+            requetes = _extraire_json_tolerant(texte)
             if isinstance(requetes, list):
                 return requetes[:3] # On garde le top 3
             return [objectif]
@@ -92,76 +410,332 @@ TES REQUÊTES (JSON) :"""
 
     def _scraper_url(self, url: str) -> str:
         """Télécharge et nettoie le contenu d'une page Web."""
+        html = self._telecharger(url)
+        return self._html_vers_texte(html) if html else ""
+
+    def _telecharger(self, url: str) -> str:
+        """Téléchargement bloquant (plafonné, filtré par Content-Type) ; renvoie le HTML brut."""
+        response = None
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(url, headers=headers, timeout=self.TIMEOUT_REQUEST)
+            time.sleep(self._reserver_creneau_hote(url))
+            response = requests.get(url, headers=_ENTETES_HTTP, timeout=self.TIMEOUT_REQUEST, stream=True)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Suppression du bruit (scripts, styles, pubs)
-            for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                script.extract()
-            
-            # Extraction texte
-            text = soup.get_text(separator='\n')
-            
-            # Nettoyage des lignes vides multiples
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            # Troncature Haute Limite
-            if len(text) > self.MAX_CONTENT_LEN:
-                self.logger.info(f"✂️ Contenu tronqué à {self.MAX_CONTENT_LEN} chars (Original: {len(text)})")
-                return text[:self.MAX_CONTENT_LEN]
-            
-            return text
-            
+
+            # PDF, images, binaires : inutile de télécharger
+            if not self._type_contenu_lisible(response.headers.get('Content-Type', ''), url):
+                return ""
+
+            # Lecture en flux, arrêtée dès qu'on a assez d'octets (x3 : perte HTML -> texte)
+            plafond = self.MAX_CONTENT_LEN * 3
+            buf, recu = [], 0
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=False):
+                buf.append(chunk)
+                recu += len(chunk)
+                if recu >= plafond:
+                    break
+            return _decoder_html(b''.join(buf), response.headers.get('Content-Type', ''))
+
         except Exception as e:
             self.logger.log_warning(f"Échec scraping {url}: {e}")
             return ""
+        finally:
+            if response is not None:
+                response.close()
+
+    async def _telecharger_async(self, session, url: str) -> str:
+        """Variante asynchrone du téléchargement (même plafond, mêmes filtres) ; renvoie le HTML brut."""
+        try:
+            await asyncio.sleep(self._reserver_creneau_hote(url))
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.TIMEOUT_REQUEST)) as response:
+                response.raise_for_status()
+                if not self._type_contenu_lisible(response.headers.get('Content-Type', ''), url):
+                    return ""
+                plafond = self.MAX_CONTENT_LEN * 3
+                buf, recu = [], 0
+                async for chunk in response.content.iter_chunked(16384):
+                    buf.append(chunk)
+                    recu += len(chunk)
+                    if recu >= plafond:
+                        break
+                return _decoder_html(b''.join(buf), response.headers.get('Content-Type', ''))
+        except Exception as e:
+            self.logger.log_warning(f"Échec scraping {url}: {e}")
+            return ""
+
+    async def _telecharger_lot_async(self, urls: List[str]) -> List[str]:
+        connecteur = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(headers=_ENTETES_HTTP, connector=connecteur) as session:
+            return await asyncio.gather(*(self._telecharger_async(session, u) for u in urls))
+
+    def _scraper_lot(self, urls: List[str]) -> List[Tuple[str, Optional[int]]]:
+        """
+        Scrape un lot d'URLs en parallèle ; renvoie (texte, empreinte SimHash) dans l'ordre des URLs.
+        Téléchargement : aiohttp (une boucle d'événements, sans thread par connexion) si
+        disponible, sinon pool de threads. Parsing + nettoyage + empreinte : pool de processus
+        partagé (`_pool_parsing`), threads en repli.
+        """
+        boucle_active = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            boucle_active = False
+
+        if AIOHTTP_AVAILABLE and not boucle_active:
+            htmls = asyncio.run(self._telecharger_lot_async(urls))
+        else:
+            with ThreadPoolExecutor(max_workers=self.MAX_SCRAPERS) as ex:
+                htmls = list(ex.map(self._telecharger, urls))
+
+        a_parser = [i for i, h in enumerate(htmls) if h]
+        sorties: List[Tuple[str, Optional[int]]] = [("", None)] * len(htmls)
+        if not a_parser:
+            return sorties
+
+        pages = [htmls[i] for i in a_parser]
+        limites = [self.MAX_CONTENT_LEN] * len(a_parser)
+        try:
+            resultats = list(self._obtenir_pool_parsing().map(_parser_et_nettoyer, pages, limites))
+        except BrokenProcessPool as e:
+            self.logger.log_warning(f"Pool de parsing (processus) tombé, repli sur threads : {e}")
+            resultats = list(
+                self._obtenir_pool_parsing(processus=False).map(_parser_et_nettoyer, pages, limites)
+            )
+
+        for i, (texte, longueur, empreinte) in zip(a_parser, resultats):
+            if longueur > self.MAX_CONTENT_LEN:
+                self.logger.info(f"✂️ Contenu tronqué à {self.MAX_CONTENT_LEN} chars (Original: {longueur})")
+            sorties[i] = (texte, empreinte)
+        return sorties
+
+    def _obtenir_pool_parsing(self, processus: bool = True) -> Executor:
+        """
+        Pool de parsing partagé, créé au premier usage. `processus=False` (ou échec de
+        création des processus) le remplace définitivement par un pool de threads.
+        """
+        with self._verrou_pool_parsing:
+            if not processus and isinstance(self._pool_parsing, ProcessPoolExecutor):
+                self._pool_parsing.shutdown(wait=False, cancel_futures=True)
+                self._pool_parsing = None
+            if self._pool_parsing is None and processus:
+                try:
+                    self._pool_parsing = ProcessPoolExecutor(
+                        max_workers=self.NB_PARSEURS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, NotImplementedError, ValueError) as e:
+                    self.logger.log_warning(f"Processus de parsing indisponibles, threads : {e}")
+            if self._pool_parsing is None:
+                self._pool_parsing = ThreadPoolExecutor(
+                    max_workers=self.NB_PARSEURS, thread_name_prefix="web-parse"
+                )
+            return self._pool_parsing
+
+    def _fermer_pool_parsing(self) -> None:
+        """Arrête les workers de parsing (enregistré via atexit)."""
+        with self._verrou_pool_parsing:
+            if self._pool_parsing is not None:
+                self._pool_parsing.shutdown(wait=False, cancel_futures=True)
+                self._pool_parsing = None
+
+    def _reserver_creneau_hote(self, url: str) -> float:
+        """Réserve le prochain créneau libre pour l'hôte de l'URL ; renvoie l'attente (s)."""
+        hote = urlparse(url).netloc
+        with self._verrou_hotes:
+            maintenant = time.monotonic()
+            creneau = max(maintenant, self._hotes_dernier.get(hote, 0.0) + self.DELAI_HOTE)
+            self._hotes_dernier[hote] = creneau
+        return creneau - maintenant
+
+    def _type_contenu_lisible(self, content_type: str, url: str) -> bool:
+        content_type = content_type.lower()
+        if content_type and 'html' not in content_type and 'text' not in content_type:
+            self.logger.info(f"⏭️ Ignoré (type {content_type}) : {url}")
+            return False
+        return True
+
+    def _html_vers_texte(self, html: str) -> str:
+        text = self._extraire_texte_html(html)
+
+        # Troncature Haute Limite
+        if len(text) > self.MAX_CONTENT_LEN:
+            self.logger.info(f"✂️ Contenu tronqué à {self.MAX_CONTENT_LEN} chars (Original: {len(text)})")
+            return text[:self.MAX_CONTENT_LEN]
+
+        return text
+
+    @staticmethod
+    def _extraire_texte_html(html: str) -> str:
+        """Texte visible d'une page : parseur C (selectolax) si dispo, sinon BeautifulSoup."""
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+            for tag in tree.css(",".join(_BALISES_BRUIT)):
+                tag.decompose()
+            text = tree.body.text(separator='\n') if tree.body else ''
+        else:
+            soup = BeautifulSoup(html, 'html.parser')
+            # Suppression du bruit (scripts, styles, pubs)
+            for script in soup(_BALISES_BRUIT):
+                script.extract()
+            text = soup.get_text(separator='\n')
+
+        # Nettoyage des lignes vides multiples et des espaces répétés, en une seule passe
+        return _NETTOYAGE_RE.sub(_remplacer_blancs, text).strip()
 
     # =========================================================================
     # 3. ÉVALUATION (Le Juge Interne)
     # =========================================================================
 
-    def _analyser_contenu(self, contenu: str, url: str, objectif: str) -> Dict:
+    def _tokeniseur(self):
         """
-        Demande au LLM d'évaluer la pertinence et d'extraire les infos.
-        Retourne un dict {score, extraction, suffisance}.
+        cl100k chargé une seule fois, et seulement si son fichier BPE est déjà en cache :
+        jamais de téléchargement pendant une recherche. Ce n'est qu'une approximation du
+        tokeniseur du LLM local, suffisante pour borner le budget d'une page.
         """
+        if not self._tok_charge:
+            self._tok_charge = True
+            if TIKTOKEN_AVAILABLE and _bpe_cl100k_en_cache():
+                try:
+                    self._tok = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    self.logger.log_warning(f"Tokeniseur cl100k indisponible, approximation chars/4 : {e}")
+        return self._tok
+
+    def _tronquer_tokens(self, texte: str) -> str:
+        """Coupe le texte à MAX_TOKENS_ANALYSE tokens (≈4 caractères/token sans tokeniseur)."""
+        tok = self._tokeniseur()
+        if tok is None:
+            return texte[:self.MAX_TOKENS_ANALYSE * 4]
+        ids = tok.encode(texte)
+        if len(ids) <= self.MAX_TOKENS_ANALYSE:
+            return texte
+        return tok.decode(ids[:self.MAX_TOKENS_ANALYSE])
+
+    def _encoder_pour_juge(self, texte: str) -> Optional[np.ndarray]:
+        """Vectorise via le MoteurVectoriel injecté (float32, norme L2 = 1) ; None sans moteur."""
+        if self.moteur_vectoriel is None:
+            return None
+        try:
+            v = np.asarray(self.moteur_vectoriel.encoder(texte), dtype=np.float32)
+        except Exception as e:
+            self.logger.log_warning(f"Encodage pour le cache juge impossible : {e}")
+            return None
+        norme = float(np.linalg.norm(v))
+        return v / norme if norme else v
+
+    def _analyser_batch(self, pages: List[Tuple[str, str]], objectif: str) -> List[Dict]:
+        """
+        Demande au LLM d'évaluer plusieurs pages (url, contenu), en deux étapes groupées :
+        notes seules pour toutes les pages, puis extraction pour les seules pages retenues
+        (pertinence >= 6) — la synthèse, longue à générer, n'est jamais produite pour rien.
+        Retourne, dans l'ordre des pages, des dicts {pertinence, suffisance, extraction}.
+        Les verdicts déjà rendus pour la même URL et un objectif quasi identique
+        sont servis depuis le cache sémantique ; seules les autres pages partent au LLM.
+        """
+        verdicts: List[Optional[Dict]] = [None] * len(pages)
+        embs: List[Optional[np.ndarray]] = [None] * len(pages)
+        a_juger: List[int] = []
+
+        for i, (url, contenu) in enumerate(pages):
+            embs[i] = self._encoder_pour_juge(objectif + "\n" + contenu[:2048])
+            if embs[i] is not None:
+                verdicts[i] = self.cache_juge.chercher(embs[i], url)
+                if verdicts[i] is not None:
+                    self.logger.info(f"♻️ Verdict en cache pour {url}")
+                    continue
+            a_juger.append(i)
+
+        if a_juger:
+            # Étape 1 : notes seules (sortie de quelques tokens)
+            notes = self._interroger_juge(
+                """1. Évalue la Pertinence (/10) : Est-ce utile pour l'objectif ?
+2. Évalue la Suffisance (/10) : À quel point cela répond-il à TOUT l'objectif ?""",
+                '{"idx": int, "pertinence": int, "suffisance": int}',
+                [pages[i] for i in a_juger],
+                objectif,
+            )
+            retenues = []
+            for n, i in enumerate(a_juger, start=1):
+                if n not in notes:
+                    continue
+                verdicts[i] = {
+                    "pertinence": notes[n].get("pertinence", 0),
+                    "suffisance": notes[n].get("suffisance", 0),
+                    "extraction": "",
+                }
+                if verdicts[i]["pertinence"] >= 6:
+                    retenues.append(i)
+
+            # Étape 2 : synthèse uniquement pour les pages retenues
+            if retenues:
+                extractions = self._interroger_juge(
+                    "Extrait les informations clés (Synthèse) utiles à l'objectif.",
+                    '{"idx": int, "extraction": "Résumé détaillé des points clés trouvés..."}',
+                    [pages[i] for i in retenues],
+                    objectif,
+                )
+                for n, i in enumerate(retenues, start=1):
+                    verdicts[i]["extraction"] = extractions.get(n, {}).get("extraction", "")
+
+            for i in a_juger:
+                if verdicts[i] is None or embs[i] is None:
+                    continue
+                # Page retenue sans synthèse (étape 2 en échec) : ne pas figer ce verdict
+                if i in retenues and not verdicts[i]["extraction"]:
+                    continue
+                self.cache_juge.ajouter(embs[i], verdicts[i], pages[i][0])
+
+        return [v if v is not None else {"pertinence": 0, "suffisance": 0, "extraction": ""} for v in verdicts]
+
+    def _interroger_juge(
+        self, mission: str, format_objet: str, pages: List[Tuple[str, str]], objectif: str
+    ) -> Dict[int, Dict]:
+        """Un appel LLM sur des pages numérotées ; renvoie {numéro de page: objet JSON}."""
+        # Instructions statiques en tête : préfixe réutilisable par le KV-cache du serveur
+        sections = "\n\n".join(
+            f"<<PAGE {n} url={url}>>\n{self._tronquer_tokens(contenu)} ... (tronqué pour analyse)"
+            for n, (url, contenu) in enumerate(pages, start=1)
+        )
         prompt = f"""[ANALYSEUR DE RECHERCHE]
+TA MISSION, pour CHAQUE page numérotée ci-dessous :
+{mission}
+
+Réponds STRICTEMENT par une liste JSON, un objet par page :
+[
+    {format_objet}
+]
+
 Objectif utilisateur : "{objectif}"
 
-Voici le contenu extrait de {url} :
----DÉBUT---
-{contenu[:15000]} ... (tronqué pour analyse)
----FIN---
-
-TA MISSION :
-1. Évalue la Pertinence (/10) : Est-ce utile pour l'objectif ?
-2. Évalue la Suffisance (/10) : À quel point cela répond-il à TOUT l'objectif ?
-3. Extrait les informations clés (Synthèse).
-
-Réponds STRICTEMENT au format JSON :
-{{
-    "pertinence": int,
-    "suffisance": int,
-    "extraction": "Résumé détaillé des points clés trouvés..."
-}}
+{sections}
 """
+        resultats: Dict[int, Dict] = {}
         try:
             res = self.moteur_llm.generer(prompt)
             texte_json = res.get("response", "").strip()
-            # Nettoyage markdown
-            texte_json = re.sub(r'```json\s*|\s*```', '', texte_json)
-            
-            data = json.loads(texte_json)
-            return data
+            try:
+                data = _extraire_json_tolerant(texte_json)
+            except ValueError:
+                self.logger.log_warning(f"Réponse du Juge non parsable : {texte_json[:500]}")
+                raise
+            if isinstance(data, dict):
+                data = [data]
+            for n, item in enumerate(data, start=1):
+                if not isinstance(item, dict):
+                    continue
+                position = item.pop("idx", n)
+                if isinstance(position, int) and 1 <= position <= len(pages):
+                    resultats[position] = item
         except Exception as e:
             self.logger.log_error(f"Erreur analyse LLM: {e}")
-            return {"pertinence": 0, "suffisance": 0, "extraction": ""}
+        return resultats
+
+    def _est_doublon(self, contenu: str, empreinte: Optional[int] = None) -> bool:
+        """Compare l'empreinte SimHash aux pages déjà retenues (scan linéaire, N < 100)."""
+        h = empreinte if empreinte is not None else _simhash_64(contenu)
+        if any(bin(h ^ vu).count("1") <= _SIMHASH_DISTANCE_MAX for vu in self._empreintes_vues):
+            return True
+        self._empreintes_vues.append(h)
+        return False
 
     # =========================================================================
     # 4. BOUCLE PRINCIPALE (Orchestration)
@@ -174,6 +748,7 @@ Réponds STRICTEMENT au format JSON :
         """
         connaissances_accumulees = ""
         urls_visitees = set()
+        self._empreintes_vues = []
         score_suffisance_global = 0
         tour = 0
         
@@ -189,43 +764,55 @@ Réponds STRICTEMENT au format JSON :
             for query in requetes:
                 # B. Recherche
                 resultats = self._rechercher_urls(query)
-                
-                for res in resultats:
-                    url = res['href']
-                    if url in urls_visitees: continue
-                    urls_visitees.add(url)
-                    
-                    # C. Lecture (Scraping)
+                # Filtre en une passe, avant tout scraping : écarte aussi les doublons
+                # internes au lot (DDGS renvoie parfois deux fois la même URL)
+                a_lire = []
+                for r in resultats:
+                    if r['href'] not in urls_visitees:
+                        urls_visitees.add(r['href'])
+                        a_lire.append(r)
+                if not a_lire:
+                    continue
+
+                # C. Lecture (Scraping) en parallèle : les I/O réseau se chevauchent
+                pages = []
+                textes = self._scraper_lot([r['href'] for r in a_lire])
+                for res, (contenu_brut, empreinte) in zip(a_lire, textes):
                     self.logger.info(f"📖 Lecture : {res['title']}")
-                    contenu_brut = self._scraper_url(url)
-                    
                     if len(contenu_brut) < 500: # Trop court, on passe
                         continue
-                        
-                    # D. Évaluation
-                    analyse = self._analyser_contenu(contenu_brut, url, objectif)
-                    
+                    # Miroirs / agrégateurs : contenu quasi identique à une page déjà jugée
+                    if self._est_doublon(contenu_brut, empreinte):
+                        self.logger.info(f"👯 Doublon ignoré : {res['href']}")
+                        continue
+                    pages.append((res, contenu_brut))
+
+                if not pages:
+                    continue
+
+                # D. Évaluation groupée : un seul appel LLM pour les pages de la requête
+                analyses = self._analyser_batch(
+                    [(res['href'], contenu) for res, contenu in pages], objectif
+                )
+
+                for (res, _), analyse in zip(pages, analyses):
+                    url = res['href']
                     pertinence = analyse.get('pertinence', 0)
                     suffisance_page = analyse.get('suffisance', 0)
-                    
+
                     if pertinence >= 6: # Seuil de qualité
                         connaissances_accumulees += f"\n\nSOURCE: {res['title']} ({url})\n"
                         connaissances_accumulees += f"INFO: {analyse.get('extraction')}\n"
-                        
+
                         # Mise à jour du score global (On prend le max de ce qu'on a trouvé)
                         score_suffisance_global = max(score_suffisance_global, suffisance_page)
                         self.logger.info(f"✅ Info pertinente trouvée (Score: {pertinence}, Suffisance: {suffisance_page})")
                     else:
                         self.logger.info(f"🗑️ Rejeté (Pertinence faible: {pertinence})")
-                        
-                    if score_suffisance_global >= self.SEUIL_SUFFISANCE:
-                        self.logger.info("🎯 Suffisance atteinte ! Arrêt prématuré.")
-                        break
-                
-                if score_suffisance_global >= self.SEUIL_SUFFISANCE: break
-            
-            # Petite pause pour être poli avec les serveurs
-            time.sleep(1)
+
+                if score_suffisance_global >= self.SEUIL_SUFFISANCE:
+                    self.logger.info("🎯 Suffisance atteinte ! Arrêt prématuré.")
+                    break
 
         # Synthèse Finale
         rapport_final = (
@@ -237,4 +824,21 @@ Réponds STRICTEMENT au format JSON :
             f"{connaissances_accumulees}"
         )
         
-        return rapport_final
\ No newline at end of file
+        return rapport_final
+
+
+def _parser_et_nettoyer(html: str, max_len: int) -> Tuple[str, int, Optional[int]]:
+    """
+    Travail CPU d'une page, exécuté dans un worker de `_pool_parsing` (fonction de module :
+    picklable, arguments et résultat simples).
+    Renvoie (texte tronqué, longueur avant troncature, empreinte SimHash ou None si page trop courte).
+    """
+    try:
+        texte = RechercheWeb._extraire_texte_html(html)
+    except Exception:
+        # Une page illisible ne doit pas faire échouer tout le lot
+        return "", 0, None
+    longueur = len(texte)
+    texte = texte[:max_len]
+    empreinte = _simhash_64(texte) if len(texte) >= 500 else None
+    return texte, longueur, empreinte
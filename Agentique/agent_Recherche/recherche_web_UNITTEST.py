@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Unitaire: Recherche Web (Deep Research)
+Cible : agentique/sous_agents_gouvernes/agent_Recherche/recherche_web.py
+Objectif : Valider le parsing JSON tolérant, les empreintes SimHash, le cache de jugements,
+le jugement en deux étapes et la politesse par hôte.
+"""
+
+import json
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Import du module à tester
+from agentique.sous_agents_gouvernes.agent_Recherche.recherche_web import (
+    RechercheWeb,
+    _CacheJugeSemantique,
+    _decoder_html,
+    _extraire_json_tolerant,
+    _parser_et_nettoyer,
+    _simhash_64,
+)
+
+
+def _vecteur(graine: int, dim: int = 16) -> np.ndarray:
+    v = np.random.default_rng(graine).normal(size=dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class TestFonctionsUtilitaires(unittest.TestCase):
+    # =========================================================================
+    # 1. PARSING JSON TOLÉRANT
+    # =========================================================================
+
+    def test_extraire_json_prose_et_cloture(self):
+        texte = 'Voici :\n```json\n[{"idx": 1, "pertinence": 7}]\n```\nBonne journée.'
+        self.assertEqual(_extraire_json_tolerant(texte), [{"idx": 1, "pertinence": 7}])
+
+    def test_extraire_json_virgule_trainante_et_apostrophes(self):
+        self.assertEqual(_extraire_json_tolerant('{"a": [1, 2,],}'), {"a": [1, 2]})
+        self.assertEqual(_extraire_json_tolerant("['un', 'deux']"), ["un", "deux"])
+
+    def test_extraire_json_absent(self):
+        with self.assertRaises(ValueError):
+            _extraire_json_tolerant("aucun json ici")
+
+    # =========================================================================
+    # 2. EMPREINTES SIMHASH
+    # =========================================================================
+
+    def test_simhash_pages_quasi_identiques(self):
+        base = " ".join(f"mot{i}" for i in range(300))
+        variante = base + " pied de page"
+        autre = " ".join(f"terme{i}" for i in range(300))
+
+        self.assertEqual(_simhash_64(base), _simhash_64(base))
+        self.assertLessEqual(bin(_simhash_64(base) ^ _simhash_64(variante)).count("1"), 6)
+        self.assertGreater(bin(_simhash_64(base) ^ _simhash_64(autre)).count("1"), 6)
+
+    # =========================================================================
+    # 3. DÉCODAGE DES PAGES
+    # =========================================================================
+
+    def test_decoder_html_entete_meta_defaut(self):
+        self.assertEqual(_decoder_html("é".encode("latin-1"), "text/html; charset=ISO-8859-1"), "é")
+        self.assertEqual(_decoder_html("é".encode("utf-8"), "text/html"), "é")
+        page = b'<meta charset="windows-1252">\xe9'
+        self.assertTrue(_decoder_html(page, "text/html").endswith("é"))
+
+
+class TestCacheJugeSemantique(unittest.TestCase):
+    def test_hit_limite_a_la_meme_url(self):
+        cache = _CacheJugeSemantique(None, seuil=0.9)
+        cache.ajouter(_vecteur(1), {"pertinence": 8}, "https://site/a")
+
+        self.assertEqual(cache.chercher(_vecteur(1), "https://site/a"), {"pertinence": 8})
+        # Même contenu, autre page du même site : pas de verdict servi
+        self.assertIsNone(cache.chercher(_vecteur(1), "https://site/b"))
+        # Même page, objectif sans rapport : sous le seuil
+        self.assertIsNone(cache.chercher(_vecteur(2), "https://site/a"))
+
+    def test_persistance_par_lots_et_rechargement(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            cache = _CacheJugeSemantique(dossier, lot_persistance=2)
+            cache.ajouter(_vecteur(1), {"pertinence": 1}, "u1")
+            self.assertFalse(os.path.exists(os.path.join(dossier, "judge_cache.jsonl")))
+
+            cache.ajouter(_vecteur(2), {"pertinence": 2}, "u2")
+            cache.ajouter(_vecteur(3), {"pertinence": 3}, "u3")
+            cache.persister()
+
+            recharge = _CacheJugeSemantique(dossier)
+            recharge.charger()
+            self.assertEqual(len(recharge.verdicts), 3)
+            self.assertEqual(recharge.chercher(_vecteur(3), "u3"), {"pertinence": 3})
+
+    def test_rechargement_fichiers_desynchronises(self):
+        """Un verdict sans vecteur (écriture interrompue) est ignoré, pas tout le cache."""
+        with tempfile.TemporaryDirectory() as dossier:
+            cache = _CacheJugeSemantique(dossier, lot_persistance=1)
+            cache.ajouter(_vecteur(1), {"pertinence": 1}, "u1")
+            with open(os.path.join(dossier, "judge_cache.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"pertinence": 9, "url": "u9"}) + "\n")
+
+            recharge = _CacheJugeSemantique(dossier)
+            recharge.charger()
+            self.assertEqual(len(recharge.verdicts), 1)
+
+    def test_eviction_lru(self):
+        cache = _CacheJugeSemantique(None, taille_max=4)
+        for i in range(4):
+            cache.ajouter(_vecteur(i), {"pertinence": i}, f"u{i}")
+        cache.chercher(_vecteur(0), "u0")  # u0 redevient récent
+        cache.ajouter(_vecteur(4), {"pertinence": 4}, "u4")
+
+        self.assertEqual(len(cache.verdicts), 3)
+        self.assertIsNotNone(cache.chercher(_vecteur(0), "u0"))
+        self.assertIsNone(cache.chercher(_vecteur(1), "u1"))
+
+
+class TestRechercheWeb(unittest.TestCase):
+    def setUp(self):
+        """Instanciation 'Light' (sans __init__ : pas de réseau ni de disque)."""
+        self.web = RechercheWeb.__new__(RechercheWeb)
+        self.web.logger = MagicMock()
+        self.web.moteur_llm = MagicMock()
+        self.web.moteur_vectoriel = None
+        self.web._tok = None
+        self.web._tok_charge = True
+        self.web.MAX_TOKENS_ANALYSE = 4000
+        self.web.DELAI_HOTE = 0.5
+        self.web._hotes_dernier = {}
+        self.web._verrou_hotes = threading.Lock()
+        self.web._empreintes_vues = []
+        self.web.cache_juge = _CacheJugeSemantique(None)
+        self.web.NB_PARSEURS = 2
+        self.web.MAX_SCRAPERS = 2
+        self.web.MAX_CONTENT_LEN = 100000
+        self.web._pool_parsing = None
+        self.web._verrou_pool_parsing = threading.Lock()
+        self.addCleanup(self.web._fermer_pool_parsing)
+
+    # =========================================================================
+    # 4. JUGEMENT EN DEUX ÉTAPES
+    # =========================================================================
+
+    def test_analyser_batch_extraction_seulement_pour_pages_retenues(self):
+        self.web.moteur_llm.generer.side_effect = [
+            {"response": '[{"idx": 1, "pertinence": 8, "suffisance": 5},'
+                         ' {"idx": 2, "pertinence": 2, "suffisance": 1}]'},
+            {"response": '[{"idx": 1, "extraction": "points clés"}]'},
+        ]
+        pages = [("https://a", "contenu A"), ("https://b", "contenu B")]
+
+        res = self.web._analyser_batch(pages, "objectif")
+
+        self.assertEqual(res[0], {"pertinence": 8, "suffisance": 5, "extraction": "points clés"})
+        self.assertEqual(res[1]["extraction"], "")
+        prompt_extraction = self.web.moteur_llm.generer.call_args_list[1][0][0]
+        self.assertIn("https://a", prompt_extraction)
+        self.assertNotIn("https://b", prompt_extraction)
+
+    def test_analyser_batch_sert_le_cache(self):
+        self.web.moteur_vectoriel = MagicMock()
+        self.web.moteur_vectoriel.encoder.return_value = _vecteur(1)
+        self.web.cache_juge.ajouter(
+            _vecteur(1), {"pertinence": 9, "suffisance": 9, "extraction": "x"}, "https://a"
+        )
+
+        res = self.web._analyser_batch([("https://a", "contenu A")], "objectif")
+
+        self.assertEqual(res[0]["extraction"], "x")
+        self.web.moteur_llm.generer.assert_not_called()
+
+    # =========================================================================
+    # 5. POLITESSE PAR HÔTE & DOUBLONS
+    # =========================================================================
+
+    def test_reserver_creneau_hote(self):
+        self.assertEqual(self.web._reserver_creneau_hote("https://site/a"), 0)
+        attente = self.web._reserver_creneau_hote("https://site/b")
+        self.assertAlmostEqual(attente, 0.5, delta=0.05)
+        self.assertEqual(self.web._reserver_creneau_hote("https://autre/a"), 0)
+
+    def test_est_doublon(self):
+        texte = " ".join(f"mot{i}" for i in range(300))
+        self.assertFalse(self.web._est_doublon(texte))
+        self.assertTrue(self.web._est_doublon(texte + " fin"))
+
+    # =========================================================================
+    # 6. PARSING PAR PROCESSUS
+    # =========================================================================
+
+    def test_parser_et_nettoyer_picklable(self):
+        """La tâche du pool de processus doit traverser pickle (fonction de module)."""
+        self.assertIs(pickle.loads(pickle.dumps(_parser_et_nettoyer)), _parser_et_nettoyer)
+        texte, longueur, empreinte = _parser_et_nettoyer("<html><body><p>Bonjour</p></body></html>", 4)
+        self.assertEqual((texte, longueur, empreinte), ("Bonj", 7, None))
+
+    def test_scraper_lot_repli_threads_si_pool_processus_tombe(self):
+        pool_casse = MagicMock(spec=ProcessPoolExecutor)
+        pool_casse.map.side_effect = BrokenProcessPool("worker mort")
+        self.web._pool_parsing = pool_casse
+        self.web._telecharger = MagicMock(side_effect=["<p>Un</p>", "", "<p>Deux</p>"])
+
+        with patch(f"{RechercheWeb.__module__}.AIOHTTP_AVAILABLE", False):
+            sorties = self.web._scraper_lot(["u1", "u2", "u3"])
+
+        self.assertEqual([t for t, _ in sorties], ["Un", "", "Deux"])
+        pool_casse.shutdown.assert_called_once()
+        self.assertIsInstance(self.web._pool_parsing, ThreadPoolExecutor)
+
+    # =========================================================================
+    # 7. TOKENISEUR PARESSEUX
+    # =========================================================================
+
+    def test_tokeniseur_hors_ligne_sans_telechargement(self):
+        """Sans fichier BPE en cache, aucun get_encoding (réseau) : approximation chars/4."""
+        self.web._tok_charge = False
+        faux_tiktoken = MagicMock()
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(
+            os.environ, {"TIKTOKEN_CACHE_DIR": tmp}
+        ), patch(f"{RechercheWeb.__module__}.tiktoken", faux_tiktoken), patch(
+            f"{RechercheWeb.__module__}.TIKTOKEN_AVAILABLE", True
+        ):
+            res = self.web._tronquer_tokens("a" * 20000)
+
+        faux_tiktoken.get_encoding.assert_not_called()
+        self.assertEqual(len(res), 16000)
+
+
+if __name__ == "__main__":
+    unittest.main()
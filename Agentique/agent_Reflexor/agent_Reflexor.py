@@ -19,11 +19,40 @@ Architectures impliquées :
     - Persistance dynamique (Création de règles JSON + Vectorisation immédiate).
 """
 
+import os
+import re
+import copy
+import atexit
 import json
+import time
 import yaml
+import functools
+import itertools
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, TYPE_CHECKING
 from pathlib import Path
+from types import MappingProxyType
+
+# --- IMPORT SÉCURISÉ ---
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
 
 from agentique.base.META_agent import AgentBase
 from agentique.base.config_paths import ROOT_DIR
@@ -39,6 +68,136 @@ if TYPE_CHECKING:
         MoteurVectoriel,
     )
 
+# Bloc JSON entouré de balises markdown (```json ... ``` ou ``` ... ```)
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+
+# Diagnostic de repli quand la réponse d'analyse est inexploitable (copié à chaque échec)
+_FALLBACK_ANALYSE = MappingProxyType(
+    {
+        "erreur_commise": "Erreur d'analyse réflexive",
+        "type_ecart": "Technique",
+        "regle_enfreinte": "Non identifiée",
+        "hypothese_causale": "Échec du parsing JSON du LLM",
+        "correction_immediate": "Audit des logs Reflexor requis.",
+    }
+)
+
+# Caractères interdits dans un tag utilisé comme fragment de nom de fichier (/, \, .., etc.)
+_TAG_FICHIER_RE = re.compile(r"[^\w\-]+")
+
+# Parseur JSON natif C si disponible (accepte des bytes), sinon stdlib
+_charger_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Valeur texte -> TypeEcart (lookup O(1), sans exception sur valeur inconnue)
+_TYPE_ECART_MAP: Dict[str, TypeEcart] = {e.value: e for e in TypeEcart}
+
+
+def _argmax_dot_py(M: np.ndarray, q: np.ndarray):
+    """(indice, score) de la ligne de M la plus proche de q (vecteurs déjà normalisés)."""
+    scores = M @ q
+    i = int(np.argmax(scores))
+    return i, float(scores[i])
+
+
+if NUMBA_AVAILABLE:
+
+    @numba.njit(cache=True, fastmath=True)
+    def _argmax_dot(M, q):
+        # Boucle simple : LLVM la vectorise (SIMD), sans dispatch NumPy par appel
+        meilleur_i, meilleur = 0, -np.inf
+        for i in range(M.shape[0]):
+            s = np.float32(0.0)
+            for j in range(M.shape[1]):
+                s += M[i, j] * q[j]
+            if s > meilleur:
+                meilleur_i, meilleur = i, s
+        return meilleur_i, meilleur
+
+else:
+    _argmax_dot = _argmax_dot_py
+
+# Chargeur YAML : backend C (libyaml) si disponible
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Exports JSON des configs : cache utilisateur, jamais dans l'arborescence source
+_DOSSIER_CACHE_CONFIG = (
+    Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".cache") / "SecondMind" / "config"
+)
+
+
+# Gabarits de prompts (parties invariantes construites une seule fois)
+_PROMPT_ANALYSE = """[ANALYSE RÉFLEXIVE SYSTÈME]
+Tu es le module d'introspection de l'IA. Une erreur a été signalée par l'utilisateur (signal '!!!').
+Ton but est de remplir une fiche d'incident précise au format JSON.
+
+CONTEXTE :
+---
+{historique_str}
+{contexte_memoire}
+---
+SIGNALEMENT UTILISATEUR : "{prompt_erreur}"
+---
+
+INSTRUCTIONS :
+Analyse l'erreur et retourne un JSON strict avec ces clés :
+1. "erreur_commise": Description factuelle courte de l'erreur (le fait brut).
+2. "type_ecart": Choisir PARMI : "Hallucination", "Gouvernance", "Logique", "Biais", "Visuel", "Technique".
+3. "regle_enfreinte": Quelle règle explicite ou implicite a été violée ? (Cite un fichier si possible).
+4. "hypothese_causale": Pourquoi l'IA s'est trompée ? (Analyse métacognitive : pattern hérité, contexte ignoré, etc.).
+5. "correction_immediate": Quelle action corrective ou règle immédiate faut-il appliquer ?
+
+IMPORTANT :
+- Sois clinique et précis.
+- "hypothese_causale" doit expliquer le processus cognitif fautif.
+- "correction_immediate" doit être une action concrète (ex: "Verrouillage règle X").
+
+Réponds UNIQUEMENT avec le bloc JSON.
+"""
+
+_PROMPT_REGLE = (
+    "Vous êtes le moteur d'introspection. "
+    "Analysez l'erreur ci-dessous et générez UNIQUEMENT une liste d'actions correctives concrètes (Markdown).\n"
+    "Erreur : {erreur_commise}\n"
+    "Correction :"
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _charger_yaml_cache(chemin: str, mtime_ns: int) -> Dict:
+    """
+    Parse un YAML une seule fois par version du fichier (mtime_ns fait partie de la clé).
+
+    Un export JSON dans _DOSSIER_CACHE_CONFIG sert de cache disque entre processus : il
+    n'est lu que s'il a été produit depuis ce mtime_ns. Il n'est écrit que si le
+    aller-retour JSON rend exactement le YAML (clés non textuelles, dates, tuples...
+    restent sur le chemin YAML).
+    """
+    nom = os.path.splitext(os.path.basename(chemin))[0]
+    empreinte = hashlib.blake2b(chemin.encode("utf-8"), digest_size=8).hexdigest()
+    chemin_json = _DOSSIER_CACHE_CONFIG / f"{nom}-{empreinte}.json"
+    try:
+        with open(chemin_json, "rb") as f:
+            export = _charger_json(f.read())
+        if export.get("mtime_ns") == mtime_ns and isinstance(export.get("data"), dict):
+            return export["data"]
+    except (OSError, ValueError, AttributeError):
+        pass  # Export absent, périmé ou illisible : on repasse par le YAML
+
+    with open(chemin, "rb") as f:
+        data = yaml.load(f.read(), Loader=_YAML_LOADER)
+
+    # Export écrit puis renommé (atomique) ; best effort, et seulement s'il est fidèle
+    try:
+        texte = json.dumps({"mtime_ns": mtime_ns, "data": data}, ensure_ascii=False)
+        if json.loads(texte)["data"] == data:
+            chemin_json.parent.mkdir(parents=True, exist_ok=True)
+            tmp = chemin_json.with_suffix(".json.tmp")
+            tmp.write_text(texte, encoding="utf-8")
+            os.replace(tmp, chemin_json)
+    except (OSError, TypeError, ValueError):
+        pass
+    return data
+
 
 class AgentReflexor(AgentBase):
     def __init__(
@@ -72,6 +231,43 @@ class AgentReflexor(AgentBase):
         self.moteur_llm = moteur_llm
         self.moteur_vectoriel = moteur_vectoriel
 
+        # 3. Cache des réponses LLM (même profil, même prompt, température 0 => même réponse)
+        #    RAM et SQLite partagés avec les workers semi-bg : accès sous verrou
+        conf_cache = self.conf_reflexor.get("cache_llm", {})
+        self._cache_llm_ram: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_llm_taille_max = conf_cache.get("taille_ram", 512)
+        self._cache_llm_taille_db = conf_cache.get("taille_sqlite", 5000)
+        self._cache_llm_ttl = conf_cache.get("ttl_secondes", 30 * 86400)
+        self._verrou_cache_llm = threading.Lock()
+        self._cache_llm_db = self._ouvrir_cache_llm(conf_cache.get("fichier", "llm_cache.sqlite"))
+
+        # 4. Cache sémantique des cas similaires : anneau pré-alloué de vecteurs
+        #    normalisés [taille_max, d] + résultats associés (FIFO)
+        self._cache_cas_vecteurs: Optional[np.ndarray] = None
+        self._cache_cas_resultats: List[tuple] = []
+        self._cache_cas_n = 0
+        if NUMBA_AVAILABLE:
+            # Compilation JIT au démarrage (ou chargement depuis le cache disque numba)
+            _argmax_dot(np.zeros((1, 2), dtype=np.float32), np.zeros(2, dtype=np.float32))
+
+        # 5. Persistance hors chemin critique (sauvegarde JSON, vectorisation, Whoosh)
+        self._io_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reflexor-io")
+        self._pending_io: List[Future] = []
+        # Futurs en attente et tampon de feedbacks : alimentés par plusieurs threads
+        self._verrou_io = threading.Lock()
+        self._verrou_index = threading.Lock()  # Un seul writer Whoosh à la fois
+        self._whoosh_lot: List[Dict] = []  # Règles en attente d'indexation Whoosh groupée
+
+        # 6. Empreintes SHA-256 des règles récemment persistées (LRU)
+        self._regles_recentes: "OrderedDict[bytes, None]" = OrderedDict()
+        self._regles_recentes_max = self.conf_analyse.get("rule_dedup_size", 256)
+
+        # 7. Feedbacks ordinaires : lignes JSONL en tampon, écrites par lots
+        self._feedback_buffer: List[bytes] = []
+        self._feedback_buffer_limit = self.conf_feedback.get("batch_flush", 32)
+        # Le tampon et le lot Whoosh ne doivent pas être perdus à l'arrêt
+        atexit.register(self.flush)
+
         self.logger.info("✅ AgentReflexor initialisé (Config YAML chargée).")
 
     def _charger_config_yaml(self) -> Dict:
@@ -89,8 +285,115 @@ class AgentReflexor(AgentBase):
         if not path_conf.exists():
             raise RuntimeError("❌ Fichier 'config_reflexor.yaml' introuvable.")
 
-        with open(path_conf, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        # Copie : chaque instance peut modifier sa config sans toucher au cache partagé
+        mtime_ns = os.stat(path_conf).st_mtime_ns
+        return copy.deepcopy(_charger_yaml_cache(str(path_conf), mtime_ns))
+
+    # -------------------------------
+    # CACHE DES RÉPONSES LLM
+    # -------------------------------
+
+    def _ouvrir_cache_llm(self, nom_fichier: str) -> Optional[sqlite3.Connection]:
+        """Ouvre (ou crée) la base SQLite du cache LLM dans le dossier de l'agent."""
+        try:
+            dossier = self.auditor.get_path("agent_dir", "reflexor")
+            chemin = Path(dossier) / nom_fichier if dossier else Path(__file__).parent / nom_fichier
+            conn = sqlite3.connect(str(chemin), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache(k TEXT PRIMARY KEY, v BLOB, ts REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_ts ON llm_cache(ts)")
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            self.logger.log_warning(f"Cache LLM persistant indisponible : {e}")
+            return None
+
+    def _cle_cache_llm(self, prompt_text: str, options: Dict) -> str:
+        """
+        SHA-256 du profil actif et de sa configuration de génération, des options
+        (json_mode, temperature) et du prompt : changer de modèle invalide le cache.
+        """
+        profil = json.dumps(
+            [
+                getattr(self.moteur_llm, "active_profile", None),
+                getattr(self.moteur_llm, "model_config", None),
+                sorted(options.items()),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(f"{profil}\x00{prompt_text}".encode("utf-8")).hexdigest()
+
+    def _generer_cached(self, prompt_text: str, **options) -> Dict:
+        """
+        `moteur_llm.generer` adressé par contenu : SHA-256 (profil + options + prompt) -> réponse.
+        RAM (LRU) d'abord, puis SQLite, puis LLM. Seules les générations déterministes
+        (temperature=0) sont mémorisées, jamais les réponses en erreur ; les entrées
+        expirent après `ttl_secondes`.
+        """
+        if options.get("temperature") != 0.0:
+            return self.moteur_llm.generer(prompt_text=prompt_text, **options)
+
+        cle = self._cle_cache_llm(prompt_text, options)
+        limite = time.time() - self._cache_llm_ttl
+
+        with self._verrou_cache_llm:
+            entree = self._cache_llm_ram.get(cle)
+            if entree is not None and entree[1] >= limite:
+                self._cache_llm_ram.move_to_end(cle)
+                return dict(entree[0])
+
+            if self._cache_llm_db is not None:
+                ligne = self._cache_llm_db.execute(
+                    "SELECT v, ts FROM llm_cache WHERE k=? AND ts>=?", (cle, limite)
+                ).fetchone()
+                if ligne:
+                    response_dict = json.loads(ligne[0])
+                    self._memoriser_ram_llm(cle, response_dict, ligne[1])
+                    return dict(response_dict)
+
+        # Génération hors verrou : les autres appels au cache ne l'attendent pas
+        response_dict = self.moteur_llm.generer(prompt_text=prompt_text, **options)
+        if isinstance(response_dict, dict) and "error" not in response_dict and response_dict.get("response"):
+            maintenant = time.time()
+            with self._verrou_cache_llm:
+                self._memoriser_ram_llm(cle, response_dict, maintenant)
+                if self._cache_llm_db is not None:
+                    self._cache_llm_db.execute(
+                        "INSERT OR REPLACE INTO llm_cache(k, v, ts) VALUES (?, ?, ?)",
+                        (cle, json.dumps(response_dict, ensure_ascii=False), maintenant),
+                    )
+                    self._elaguer_cache_llm_db(maintenant)
+                    self._cache_llm_db.commit()
+        return response_dict
+
+    def _elaguer_cache_llm_db(self, maintenant: float) -> None:
+        """Supprime les entrées expirées puis les plus anciennes au-delà de `taille_sqlite` (sous verrou)."""
+        self._cache_llm_db.execute(
+            "DELETE FROM llm_cache WHERE ts<?", (maintenant - self._cache_llm_ttl,)
+        )
+        self._cache_llm_db.execute(
+            "DELETE FROM llm_cache WHERE k NOT IN "
+            "(SELECT k FROM llm_cache ORDER BY ts DESC LIMIT ?)",
+            (self._cache_llm_taille_db,),
+        )
+
+    def _oublier_cache_llm(self, prompt_text: str, **options) -> None:
+        """Retire une réponse jugée inexploitable (ex: JSON invalide) pour qu'elle soit regénérée."""
+        cle = self._cle_cache_llm(prompt_text, options)
+        with self._verrou_cache_llm:
+            self._cache_llm_ram.pop(cle, None)
+            if self._cache_llm_db is not None:
+                self._cache_llm_db.execute("DELETE FROM llm_cache WHERE k=?", (cle,))
+                self._cache_llm_db.commit()
+
+    def _memoriser_ram_llm(self, cle: str, response_dict: Dict, ts: float) -> None:
+        """LRU RAM bornée (appelant sous `_verrou_cache_llm`)."""
+        self._cache_llm_ram[cle] = (response_dict, ts)
+        self._cache_llm_ram.move_to_end(cle)
+        if len(self._cache_llm_ram) > self._cache_llm_taille_max:
+            self._cache_llm_ram.popitem(last=False)
 
     def rechercher_cas_similaires(self, texte: str, top_k: int = None) -> List[Dict]:
         """
@@ -108,12 +411,53 @@ class AgentReflexor(AgentBase):
         """
         if top_k is None:
             top_k = self.conf_analyse.get("top_k_similaires_default", 5)
-
-        if self.moteur_vectoriel:
-            resultats = self.moteur_vectoriel.rechercher(texte, top_k)
-            self.logger.log_thought(f"🧩 {len(resultats)} cas similaires trouvés")
-            return resultats
-        return []
+        top_k = min(top_k, self.conf_analyse.get("top_k_max", 32))
+
+        # Requête dégénérée : ni embedding ni ANN
+        if not self.moteur_vectoriel or top_k <= 0 or not texte or not texte.strip():
+            return []
+
+        # Requête quasi identique déjà servie : on réutilise son top-k (ni ANN ni re-encodage)
+        q = np.asarray(self.moteur_vectoriel.encoder(texte), dtype=np.float32)
+        norme = float(np.linalg.norm(q))
+        if norme:
+            q = q / norme
+        resultats = self._consulter_cache_cas(q, top_k)
+        if resultats is None:
+            resultats = self.moteur_vectoriel.rechercher_par_vecteur(q * norme, top_k=top_k)
+            self._memoriser_cache_cas(q, top_k, resultats)
+        self.logger.log_thought(f"🧩 {len(resultats)} cas similaires trouvés")
+        return resultats
+
+    def _consulter_cache_cas(self, q: np.ndarray, top_k: int) -> Optional[List[Dict]]:
+        # Références locales : une invalidation concurrente (thread reflexor-io) reste sans effet ici
+        vecteurs, entrees = self._cache_cas_vecteurs, self._cache_cas_resultats
+        n = min(self._cache_cas_n, len(entrees))
+        if vecteurs is None or n == 0:
+            return None
+        seuil = self.conf_analyse.get("semantic_cache_threshold", 0.95)
+        i, score = _argmax_dot(vecteurs[:n], q)
+        k_cache, resultats = entrees[i]
+        if score < seuil or k_cache < top_k:
+            return None
+        return resultats[:top_k]
+
+    def _memoriser_cache_cas(self, q: np.ndarray, top_k: int, resultats: List[Dict]) -> None:
+        if self._cache_cas_vecteurs is None:
+            taille_max = self.conf_analyse.get("semantic_cache_size", 64)
+            self._cache_cas_vecteurs = np.empty((taille_max, q.shape[0]), dtype=np.float32)
+            self._cache_cas_resultats = [None] * taille_max
+            self._cache_cas_n = 0
+        pos = self._cache_cas_n % len(self._cache_cas_resultats)
+        self._cache_cas_vecteurs[pos] = q
+        self._cache_cas_resultats[pos] = (top_k, resultats)
+        self._cache_cas_n += 1
+
+    def _invalider_cache_cas(self) -> None:
+        """La mémoire vectorielle a changé (nouvelle règle) : les top-k en cache sont périmés."""
+        self._cache_cas_vecteurs = None
+        self._cache_cas_resultats = []
+        self._cache_cas_n = 0
 
     def _analyser_incident_complet(
         self, prompt_erreur: str, historique: List[str], cas_similaires: List[Dict]
@@ -138,69 +482,62 @@ class AgentReflexor(AgentBase):
 
         # Utilisation de la config pour la fenêtre d'historique
         taille_window = self.conf_analyse.get("taille_historique_contexte", 6)
-        historique_str = "\n".join(historique[-taille_window:])
+        # Chaque tour est plafonné : un long message ne doit pas gonfler le prompt
+        cap = self.conf_analyse.get("max_chars_per_turn", 500)
+        historique_str = "\n".join(
+            t if len(t) <= cap else t[:cap] + "…" for t in historique[-taille_window:]
+        )
 
         # Contexte mémoire pour aider le jugement
         contexte_memoire = ""
         if cas_similaires:
-            contexte_memoire = "\n--- PRÉCÉDENTS SIMILAIRES ---\n"
-            for i, cas in enumerate(cas_similaires[:2], 1):
-                meta = cas.get("meta", {})
-                contenu = meta.get("contenu", "N/A")
-                contexte_memoire += f"Cas {i}:\n{contenu[:200]}...\n"
-
-        prompt_analyse = f"""[ANALYSE RÉFLEXIVE SYSTÈME]
-Tu es le module d'introspection de l'IA. Une erreur a été signalée par l'utilisateur (signal '!!!').
-Ton but est de remplir une fiche d'incident précise au format JSON.
-
-CONTEXTE :
----
-{historique_str}
-{contexte_memoire}
----
-SIGNALEMENT UTILISATEUR : "{prompt_erreur}"
----
-
-INSTRUCTIONS :
-Analyse l'erreur et retourne un JSON strict avec ces clés :
-1. "erreur_commise": Description factuelle courte de l'erreur (le fait brut).
-2. "type_ecart": Choisir PARMI : "Hallucination", "Gouvernance", "Logique", "Biais", "Visuel", "Technique".
-3. "regle_enfreinte": Quelle règle explicite ou implicite a été violée ? (Cite un fichier si possible).
-4. "hypothese_causale": Pourquoi l'IA s'est trompée ? (Analyse métacognitive : pattern hérité, contexte ignoré, etc.).
-5. "correction_immediate": Quelle action corrective ou règle immédiate faut-il appliquer ?
-
-IMPORTANT :
-- Sois clinique et précis.
-- "hypothese_causale" doit expliquer le processus cognitif fautif.
-- "correction_immediate" doit être une action concrète (ex: "Verrouillage règle X").
+            contexte_memoire = "\n--- PRÉCÉDENTS SIMILAIRES ---\n" + "".join(
+                f"Cas {i}:\n{cas.get('meta', {}).get('contenu', 'N/A')[:200]}...\n"
+                for i, cas in enumerate(
+                    itertools.islice(
+                        cas_similaires, self.conf_analyse.get("max_cas_in_prompt", 2)
+                    ),
+                    1,
+                )
+            )
 
-Réponds UNIQUEMENT avec le bloc JSON.
-"""
+        prompt_analyse = _PROMPT_ANALYSE.format_map(
+            {
+                "historique_str": historique_str,
+                "contexte_memoire": contexte_memoire,
+                "prompt_erreur": prompt_erreur,
+            }
+        )
 
         try:
-            response_dict = self.moteur_llm.generer(prompt_text=prompt_analyse)
+            # Sortie contrainte en objet JSON, déterministe (température 0) => cacheable
+            response_dict = self._generer_cached(
+                prompt_analyse, json_mode=True, temperature=0.0
+            )
 
             # Extraction et parsing du JSON
-            raw_text = response_dict.get("response", "").strip()
-            # Nettoyage basique des balises markdown si présentes
-            if "```json" in raw_text:
-                raw_text = raw_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_text:
-                raw_text = raw_text.split("```")[1].split("```")[0].strip()
-
-            data = json.loads(raw_text)
+            raw_text = response_dict.get("response", "").lstrip()
+            if raw_text.startswith("{"):
+                # Cas nominal : JSON brut, aucune recherche de balises
+                payload = raw_text
+            else:
+                # Repli (serveur sans json_schema) : balises markdown, une seule passe regex
+                m = _FENCE_RE.search(raw_text)
+                payload = m.group(1) if m else raw_text
+
+            data = _charger_json(payload.encode("utf-8"))
+            if not isinstance(data, dict):
+                raise TypeError(f"objet JSON attendu, reçu {type(data).__name__}")
             return data
 
-        except Exception as e:
+        # orjson.JSONDecodeError hérite de json.JSONDecodeError
+        except (json.JSONDecodeError, TypeError, KeyError, AttributeError, sqlite3.Error) as e:
             self.logger.log_error(f"Échec analyse JSON: {e}")
+            self._oublier_cache_llm(prompt_analyse, json_mode=True, temperature=0.0)
             # Fallback en cas d'échec du parsing
-            return {
-                "erreur_commise": "Erreur d'analyse réflexive",
-                "type_ecart": "Technique",
-                "regle_enfreinte": "Non identifiée",
-                "hypothese_causale": f"Échec du parsing JSON du LLM : {e}",
-                "correction_immediate": "Audit des logs Reflexor requis.",
-            }
+            fallback = dict(_FALLBACK_ANALYSE)
+            fallback["hypothese_causale"] = f"Échec du parsing JSON du LLM : {e}"
+            return fallback
 
     def lancer_analyse_gouvernance(self, prompt_erreur: str, historique: List[str]):
         """
@@ -221,7 +558,11 @@ Réponds UNIQUEMENT avec le bloc JSON.
         self.logger.info("🚨 Boucle Réflexive (!!!) démarrée.")
 
         # 1. Recherche de contexte (Paramètre Config)
-        k_gouv = self.conf_analyse.get("top_k_gouvernance", 3)
+        # Jamais plus de voisins que le prompt d'analyse n'en consomme
+        k_gouv = min(
+            self.conf_analyse.get("top_k_gouvernance", 3),
+            self.conf_analyse.get("max_cas_in_prompt", 2),
+        )
         cas_similaires = self.rechercher_cas_similaires(prompt_erreur, top_k=k_gouv)
 
         # 2. Analyse structurelle par le LLM
@@ -231,9 +572,11 @@ Réponds UNIQUEMENT avec le bloc JSON.
 
         # 3. Mapping vers l'Enum TypeEcart
         type_str = analyse_data.get("type_ecart", "Technique")
-        try:
-            type_ecart_enum = TypeEcart(type_str)
-        except ValueError:
+        # Le LLM peut renvoyer autre chose qu'une chaîne (liste...) : non hashable
+        type_ecart_enum = (
+            _TYPE_ECART_MAP.get(type_str) if isinstance(type_str, str) else None
+        )
+        if type_ecart_enum is None:
             self.logger.log_warning(
                 f"Type d'écart inconnu '{type_str}', fallback sur TECHNIQUE"
             )
@@ -252,15 +595,8 @@ Réponds UNIQUEMENT avec le bloc JSON.
         # 🛡️👁️‍🗨️🛡️# VALIDATION FORMAT SORTIE
         self.auditor.valider_format_sortie(entree_reflexive)
 
-        # 5. Génération Markdown
-        trace_markdown = entree_reflexive.to_markdown()
-
-        # 6. Journalisation via AgentMemoire (Trace MD)
-        self.agent_memoire.journaliser_trace_reflexive(
-            trace_markdown=trace_markdown,
-            type_erreur=type_ecart_enum.value,
-            classification="Gouvernance",
-        )
+        # 5-6. Rendu Markdown + journalisation via AgentMemoire (Trace MD), en arrière-plan
+        self._soumettre_io(self._journaliser_trace, entree_reflexive)
 
         # =================================================================
         # 7. (AJOUT CRITIQUE) CRÉATION & SAUVEGARDE DE LA RÈGLE
@@ -268,9 +604,13 @@ Réponds UNIQUEMENT avec le bloc JSON.
         # A. On génère le texte de la règle via le LLM
         texte_regle = self.creer_regle_auto_correction(analyse_data)
 
-        if texte_regle and "Erreur" not in texte_regle:
+        if texte_regle and "Erreur" not in texte_regle and self._regle_deja_vue(texte_regle):
+            # Règle identique à une règle récente : déjà sauvegardée, vectorisée et indexée
+            self.logger.info("♻️ Règle dupliquée, persistance ignorée.")
+        elif texte_regle and "Erreur" not in texte_regle:
             # B. On prépare le nom du fichier
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            maintenant = datetime.now()  # Un seul horodatage : nom de fichier et meta concordent
+            ts = maintenant.strftime("%Y%m%d_%H%M%S")
             nom_fichier_regle = f"R_CORRECTION_{ts}.json"
 
             # C. Payload JSON
@@ -280,40 +620,215 @@ Réponds UNIQUEMENT avec le bloc JSON.
                     "source": "Reflexor_Auto",
                     "trigger": "Protocole_ALERTE",
                     "incident_lie": analyse_data.get("erreur_commise"),
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": maintenant.isoformat(),
                 },
             }
 
-            # D. Sauvegarde physique via AgentMemoire
+            # D. Embedding + sauvegarde + indexation en arrière-plan : l'embedding
+            # démarre tout de suite, en parallèle de l'écriture disque
+            moteur_regles = getattr(self.agent_memoire, "moteur_regles", None)
+            futur_vecteur = (
+                self._io_executor.submit(moteur_regles.encoder, texte_regle)
+                if moteur_regles
+                else None
+            )
+            self._soumettre_io(
+                self._persister_regle,
+                payload_regle,
+                nom_fichier_regle,
+                texte_regle,
+                futur_vecteur,
+            )
+        # =================================================================
+
+        self.logger.signal_gouvernance("✅ Entrée réflexive standardisée générée.")
+        self.stats_manager.incrementer_stat_specifique("problemes_detectes")
+
+    # -------------------------------
+    # PERSISTANCE EN ARRIÈRE-PLAN
+    # -------------------------------
+
+    @functools.cached_property
+    def _path_regles(self) -> Path:
+        """Dossier des règles, résolu une seule fois auprès de l'Auditor."""
+        return Path(self.auditor.get_path("regles"))
+
+    @functools.cached_property
+    def _path_feedback(self) -> Path:
+        """Dossier des feedbacks réflexifs, résolu une seule fois auprès de l'Auditor."""
+        return Path(self.auditor.get_path("reflexive")) / "feedback"
+
+    def _soumettre_io(self, fn, *args) -> Future:
+        """Planifie une tâche d'I/O sur le pool dédié et garde son futur pour `flush()`."""
+        futur = self._io_executor.submit(fn, *args)
+        with self._verrou_io:
+            self._pending_io = [f for f in self._pending_io if not f.done()]
+            self._pending_io.append(futur)
+        return futur
+
+    def flush(self) -> bool:
+        """
+        Attend la fin des persistances en cours, puis écrit le tampon de feedbacks
+        et le lot Whoosh dans le thread appelant (utilisable à l'arrêt, quand le pool
+        d'I/O n'accepte plus de tâches). True si toutes ont réussi.
+        """
+        with self._verrou_io:
+            en_cours, self._pending_io = self._pending_io, []
+        succes = all([f.result() for f in en_cours])
+        with self._verrou_io:
+            lot, self._feedback_buffer = self._feedback_buffer, []
+        if lot:
+            succes = self._ecrire_lot_feedback(b"".join(lot)) and succes
+        self._vider_lot_whoosh()
+        return succes
+
+    def _vider_tampon_feedback(self) -> None:
+        """Confie les feedbacks en tampon au thread d'I/O (une seule écriture pour le lot)."""
+        with self._verrou_io:
+            lot, self._feedback_buffer = self._feedback_buffer, []
+        if lot:
+            self._soumettre_io(self._ecrire_lot_feedback, b"".join(lot))
+
+    def _ecrire_lot_feedback(self, donnees: bytes) -> bool:
+        """Ajoute un lot de lignes JSONL à feedback/feedback.jsonl en un seul write (O_APPEND)."""
+        try:
+            self._path_feedback.mkdir(parents=True, exist_ok=True)
+            fd = os.open(
+                self._path_feedback / "feedback.jsonl",
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o644,
+            )
+            try:
+                os.write(fd, donnees)
+            finally:
+                os.close(fd)
+            return True
+        except OSError as e:
+            self.logger.log_error(f"Erreur écriture lot feedback : {e}")
+            return False
+
+    def _vider_lot_whoosh(self) -> None:
+        """Indexe les règles en attente dans Whoosh : un writer, un commit pour tout le lot."""
+        with self._verrou_index:
+            lot, self._whoosh_lot = self._whoosh_lot, []
+            if lot and self.agent_memoire.agent_recherche:
+                self.agent_memoire.agent_recherche.update_index_lot(lot)
+
+    def _regle_deja_vue(self, texte_regle: str) -> bool:
+        """True si ce texte de règle a déjà été persisté récemment ; sinon l'enregistre."""
+        h = hashlib.sha256(texte_regle.encode("utf-8")).digest()
+        if h in self._regles_recentes:
+            self._regles_recentes.move_to_end(h)
+            return True
+        self._regles_recentes[h] = None
+        if len(self._regles_recentes) > self._regles_recentes_max:
+            self._regles_recentes.popitem(last=False)
+        return False
+
+    def _journaliser_trace(self, entree_reflexive: "EntreeJournalReflexif") -> bool:
+        """Rend l'entrée en Markdown et l'ajoute au journal réflexif (thread reflexor-io)."""
+        try:
+            self.agent_memoire.journaliser_trace_reflexive(
+                trace_markdown=entree_reflexive.to_markdown(),
+                type_erreur=entree_reflexive.type_ecart.value,
+                classification="Gouvernance",
+            )
+            return True
+        except Exception as e:
+            self.logger.log_error(f"Erreur journalisation trace réflexive : {e}")
+            return False
+
+    def _persister_regle(
+        self,
+        payload_regle: Dict,
+        nom_fichier_regle: str,
+        texte_regle: str,
+        futur_vecteur: Optional[Future],
+    ) -> bool:
+        """Sauvegarde la règle, la vectorise puis l'indexe dans Whoosh (thread reflexor-io)."""
+        try:
+            # Sérialisation native (orjson) si disponible, sinon dict -> json côté Mémoire
+            contenu = (
+                orjson.dumps(payload_regle, option=orjson.OPT_INDENT_2)
+                if ORJSON_AVAILABLE
+                else payload_regle
+            )
             succes_save = self.agent_memoire.sauvegarder_memoire(
-                contenu=payload_regle,
+                contenu=contenu,
                 type_memoire="regles",
                 nom_fichier=nom_fichier_regle,
             )
-
-            if succes_save:
-                self.logger.info(
-                    f"✅ Règle de correction active créée et sauvegardée : {nom_fichier_regle}"
+            if not succes_save:
+                # Non persistée : la même règle doit pouvoir être retentée
+                self._regles_recentes.pop(
+                    hashlib.sha256(texte_regle.encode("utf-8")).digest(), None
                 )
+                return False
 
-                # ✅ AJOUT CRITIQUE V3 : Vectorisation immédiate dans le moteur DÉDIÉ
-                self.agent_memoire.vectoriser_regle(
-                    contenu_regle=texte_regle, metadata=payload_regle["meta"]
-                )
+            self.logger.info(
+                f"✅ Règle de correction active créée et sauvegardée : {nom_fichier_regle}"
+            )
 
-                # E. Mise à jour Whoosh (Mots-clés) - On garde aussi pour la redondance
-                if self.agent_memoire.agent_recherche:
-                    self.agent_memoire.agent_recherche.update_index(
-                        nouveau_fichier=str(
-                            Path(self.auditor.get_path("regles")) / nom_fichier_regle
-                        ),
-                        type_memoire="regles",
-                        categorie="correction_comportementale",
+            try:
+                vecteur_regle = futur_vecteur.result() if futur_vecteur else None
+            except Exception as e:
+                self.logger.log_warning(f"Embedding anticipé de la règle échoué : {e}")
+                vecteur_regle = None
+
+            # ✅ AJOUT CRITIQUE V3 : Vectorisation dans le moteur DÉDIÉ
+            self.agent_memoire.vectoriser_regle(
+                contenu_regle=texte_regle,
+                metadata=payload_regle["meta"],
+                vecteur=vecteur_regle,
+            )
+            self._invalider_cache_cas()
+
+            # E. Indexation Whoosh (mots-clés), redondante avec le moteur vectoriel :
+            # désactivée par défaut, sinon groupée par lots (un commit pour N règles)
+            if self.conf_feedback.get("whoosh_redundant_index", False):
+                with self._verrou_index:
+                    self._whoosh_lot.append(
+                        {
+                            "nouveau_fichier": str(self._path_regles / nom_fichier_regle),
+                            "type_memoire": "regles",
+                            "categorie": "correction_comportementale",
+                        }
                     )
-        # =================================================================
+                    lot_plein = len(self._whoosh_lot) >= self.conf_feedback.get(
+                        "whoosh_flush_interval", 5
+                    )
+                if lot_plein:
+                    self._vider_lot_whoosh()
+            return True
+        except Exception as e:
+            self.logger.log_error(f"Erreur persistance règle {nom_fichier_regle} : {e}")
+            return False
 
-        self.logger.signal_gouvernance("✅ Entrée réflexive standardisée générée.")
-        self.stats_manager.incrementer_stat_specifique("problemes_detectes")
+    def _persister_feedback(self, feedback: Dict, nom_fichier: str) -> bool:
+        """Sauvegarde un feedback '+1 mémoire' dans son fichier et le réindexe dans Whoosh (thread reflexor-io)."""
+        try:
+            succes = self.agent_memoire.sauvegarder_memoire(
+                contenu=feedback,
+                type_memoire="reflexive",
+                nom_fichier=f"feedback/{nom_fichier}",
+            )
+
+            # Action Spéciale : Réindexation de la mémoire positive
+            if succes and self.agent_memoire.agent_recherche:
+                path_complet = self._path_feedback / nom_fichier
+                with self._verrou_index:
+                    self.agent_memoire.agent_recherche.update_index(
+                        nouveau_fichier=str(path_complet),
+                        type_memoire="reflexive",
+                        sujet="Feedback",
+                        action="Correction",
+                        categorie="Mémoire",
+                    )
+                self.logger.info("💾 Index Whoosh mis à jour (+1 mémoire).")
+            return bool(succes)
+        except Exception as e:
+            self.logger.log_error(f"Erreur enregistrement feedback : {e}")
+            return False
 
     def creer_regle_auto_correction(self, cas_analyse: Dict) -> str:
         """Génère le contenu textuel d'une nouvelle règle de gouvernance basée sur le diagnostic.
@@ -328,16 +843,12 @@ Réponds UNIQUEMENT avec le bloc JSON.
             str: Le corps de la règle au format Markdown/Texte.
         """
 
-        contexte_erreur = f"Erreur : {cas_analyse.get('erreur_commise')}"
-
-        prompt_systeme = (
-            "Vous êtes le moteur d'introspection. "
-            "Analysez l'erreur ci-dessous et générez UNIQUEMENT une liste d'actions correctives concrètes (Markdown).\n"
-            f"{contexte_erreur}\n"
-            "Correction :"
+        prompt_systeme = _PROMPT_REGLE.format_map(
+            {"erreur_commise": cas_analyse.get("erreur_commise")}
         )
 
         try:
+            # Génération à température par défaut (non déterministe) : pas de cache
             response_dict = self.moteur_llm.generer(prompt_text=prompt_systeme)
 
             if "error" in response_dict:
@@ -346,7 +857,7 @@ Réponds UNIQUEMENT avec le bloc JSON.
             correction = response_dict.get("response", "").strip()
             return correction if correction else "* [Erreur] Correction vide."
 
-        except Exception as e:
+        except (RuntimeError, AttributeError) as e:
             self.logger.log_error(f"Échec génération règle: {e}")
             return "* [Erreur Système] Impossible de générer la règle."
 
@@ -371,7 +882,9 @@ Réponds UNIQUEMENT avec le bloc JSON.
             mot_cle (str): Tag contextuel (ex: "mémoire", "code", "style").
 
         Returns:
-            bool: True si l'enregistrement et l'indexation ont réussi.
+            bool: True dès que l'enregistrement est planifié, False seulement si sa
+            préparation échoue. L'écriture disque se fait sur le pool d'I/O : ses échecs
+            y sont journalisés et `flush()` renvoie le résultat disque agrégé.
         """
         try:
             # Récupération Seuils Config
@@ -379,45 +892,42 @@ Réponds UNIQUEMENT avec le bloc JSON.
             trigger_word = self.conf_feedback.get("mot_cle_declencheur", "mémoire")
 
             # 1. Données
+            maintenant = datetime.now()
             feedback = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": maintenant.isoformat(),
                 "prompt": prompt,
                 "reponse": reponse,
                 "score": score,
                 "tag": mot_cle,
             }
 
-            # 2. Sauvegarde
-            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # 2. Nom du fichier
+            timestamp_str = maintenant.strftime("%Y%m%d_%H%M%S")
             is_positive = score > seuil_positif
             prefixe = "+1" if is_positive else "-1"
 
-            nom_fichier = f"feedback_{prefixe}_{mot_cle}_{timestamp_str}.json"
-
-            succes = self.agent_memoire.sauvegarder_memoire(
-                contenu=feedback,
-                type_memoire="reflexive",
-                nom_fichier=f"feedback/{nom_fichier}",
-            )
-
-            # 3. Action Spéciale : Réindexation si mémoire positive
-            if succes and mot_cle == trigger_word and is_positive:
-                path_complet = (
-                    Path(self.auditor.get_path("reflexive")) / "feedback" / nom_fichier
+            # Tag assaini une fois : il finit dans un chemin écrit par le thread d'I/O
+            tag_fichier = _TAG_FICHIER_RE.sub("_", mot_cle)
+            nom_fichier = f"feedback_{prefixe}_{tag_fichier}_{timestamp_str}.json"
+
+            # 3. Mémoire positive : fichier dédié + réindexation Whoosh, en arrière-plan.
+            #    Sinon : une ligne JSONL en tampon, écrite par lots.
+            if mot_cle == trigger_word and is_positive:
+                self._soumettre_io(self._persister_feedback, feedback, nom_fichier)
+            else:
+                ligne = (
+                    orjson.dumps(feedback)
+                    if ORJSON_AVAILABLE
+                    else json.dumps(feedback, ensure_ascii=False).encode("utf-8")
                 )
-
-                if self.agent_memoire.agent_recherche:
-                    self.agent_memoire.agent_recherche.update_index(
-                        nouveau_fichier=str(path_complet),
-                        type_memoire="reflexive",
-                        sujet="Feedback",
-                        action="Correction",
-                        categorie="Mémoire",
-                    )
-                    self.logger.info("💾 Index Whoosh mis à jour (+1 mémoire).")
+                with self._verrou_io:
+                    self._feedback_buffer.append(ligne + b"\n")
+                    plein = len(self._feedback_buffer) >= self._feedback_buffer_limit
+                if plein:
+                    self._vider_tampon_feedback()
 
             self.stats_manager.incrementer_stat_specifique("analyses_effectuees")
-            return succes
+            return True
 
         except Exception as e:
             self.logger.log_error(f"Erreur enregistrement feedback : {e}")
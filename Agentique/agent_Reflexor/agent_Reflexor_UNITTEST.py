@@ -13,7 +13,13 @@ Ref: agent_Reflexor.py :contentReference[oaicite:0]{index=0}
 """
 
 import json
+import sqlite3
+import tempfile
+import threading
 import unittest
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch, mock_open
@@ -21,9 +27,10 @@ from unittest.mock import MagicMock, patch, mock_open
 # ---- Project imports (adjust if needed) ----
 try:
     # If tests are in same folder as agent_Reflexor.py:
-    from agent_Reflexor import AgentReflexor
+    from agent_Reflexor import AgentReflexor, _charger_yaml_cache
 except Exception:
     AgentReflexor = None
+    _charger_yaml_cache = None
 
 try:
     from agentique.base.contrats_interface import EntreeJournalReflexif, TypeEcart
@@ -68,6 +75,31 @@ class AgentReflexorUnitTestBase(unittest.TestCase):
             "mot_cle_declencheur": "mémoire",
         }
 
+        # LLM cache (RAM only in tests)
+        agent._cache_llm_ram = OrderedDict()
+        agent._cache_llm_taille_max = 512
+        agent._cache_llm_taille_db = 5000
+        agent._cache_llm_ttl = 3600
+        agent._verrou_cache_llm = threading.Lock()
+        agent._cache_llm_db = None
+
+        # Semantic cache for similar cases
+        agent._cache_cas_vecteurs = None
+        agent._cache_cas_resultats = []
+        agent._cache_cas_n = 0
+
+        # Background persistence (real pool, tests call agent.flush())
+        agent._io_executor = ThreadPoolExecutor(max_workers=2)
+        agent._pending_io = []
+        agent._verrou_io = threading.Lock()
+        agent._verrou_index = threading.Lock()
+        agent._whoosh_lot = []
+        agent._feedback_buffer = []
+        agent._regles_recentes = OrderedDict()
+        agent._regles_recentes_max = 256
+        agent._feedback_buffer_limit = 32
+        self.addCleanup(agent._io_executor.shutdown)
+
         return agent
 
 
@@ -77,13 +109,41 @@ class TestRechercherCasSimilaires(AgentReflexorUnitTestBase):
         agent = self.make_agent()
         agent.conf_analyse["top_k_similaires_default"] = 9
 
-        agent.moteur_vectoriel.rechercher.return_value = [{"meta": {"contenu": "x"}}]
+        agent.moteur_vectoriel.encoder.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        agent.moteur_vectoriel.rechercher_par_vecteur.return_value = [{"meta": {"contenu": "x"}}]
 
         res = agent.rechercher_cas_similaires("hello", top_k=None)
 
-        agent.moteur_vectoriel.rechercher.assert_called_once_with("hello", 9)
+        self.assertEqual(
+            agent.moteur_vectoriel.rechercher_par_vecteur.call_args.kwargs["top_k"], 9
+        )
         self.assertEqual(res, [{"meta": {"contenu": "x"}}])
 
+    def test_near_duplicate_query_hits_semantic_cache(self):
+        agent = self.make_agent()
+
+        agent.moteur_vectoriel.encoder.side_effect = [
+            np.array([1.0, 0.0], dtype=np.float32),
+            np.array([0.999, 0.01], dtype=np.float32),
+        ]
+        agent.moteur_vectoriel.rechercher_par_vecteur.return_value = [
+            {"meta": {"contenu": "a"}},
+            {"meta": {"contenu": "b"}},
+        ]
+
+        agent.rechercher_cas_similaires("tu as oublié X", top_k=2)
+        res = agent.rechercher_cas_similaires("tu as oublié X !", top_k=1)
+
+        agent.moteur_vectoriel.rechercher_par_vecteur.assert_called_once()
+        self.assertEqual(res, [{"meta": {"contenu": "a"}}])
+
+    def test_degenerate_query_skips_vector_engine(self):
+        agent = self.make_agent()
+
+        self.assertEqual(agent.rechercher_cas_similaires("   ", top_k=3), [])
+        self.assertEqual(agent.rechercher_cas_similaires("hello", top_k=0), [])
+        agent.moteur_vectoriel.encoder.assert_not_called()
+
     def test_no_vector_engine_returns_empty(self):
         agent = self.make_agent()
         agent.moteur_vectoriel = None
@@ -116,6 +176,10 @@ class TestAnalyserIncidentComplet(AgentReflexorUnitTestBase):
 
         self.assertEqual(res["type_ecart"], "Logique")
         self.assertEqual(res["regle_enfreinte"], "R_001")
+        # JSON mode + deterministic sampling requested from the engine
+        kwargs = agent.moteur_llm.generer.call_args.kwargs
+        self.assertTrue(kwargs["json_mode"])
+        self.assertEqual(kwargs["temperature"], 0.0)
 
     def test_parses_json_in_markdown_fence(self):
         agent = self.make_agent()
@@ -136,6 +200,83 @@ class TestAnalyserIncidentComplet(AgentReflexorUnitTestBase):
         self.assertEqual(res["type_ecart"], "Technique")
         self.assertIn("Échec du parsing JSON", res["hypothese_causale"])
 
+    def test_long_history_turns_are_capped(self):
+        agent = self.make_agent()
+        agent.conf_analyse["max_chars_per_turn"] = 10
+        agent.moteur_llm.generer.return_value = {"response": "{}"}
+
+        agent._analyser_incident_complet("!!!", ["court", "x" * 50], [])
+
+        prompt = agent.moteur_llm.generer.call_args.kwargs["prompt_text"]
+        self.assertIn("court\n" + "x" * 10 + "…", prompt)
+        self.assertNotIn("x" * 11, prompt)
+
+
+@unittest.skipIf(_skip_if_missing(), "Project imports not available.")
+class TestGenererCached(AgentReflexorUnitTestBase):
+    def test_identical_prompt_hits_cache(self):
+        agent = self.make_agent()
+        agent.moteur_llm.generer.return_value = {"response": '{"type_ecart": "Biais"}'}
+
+        first = agent._analyser_incident_complet("!!!", ["x"], [])
+        second = agent._analyser_incident_complet("!!!", ["x"], [])
+
+        self.assertEqual(first, second)
+        agent.moteur_llm.generer.assert_called_once()
+
+    def test_non_deterministic_generation_is_not_cached(self):
+        agent = self.make_agent()
+        agent.moteur_llm.generer.return_value = {"response": "- Action 1"}
+
+        agent.creer_regle_auto_correction({"erreur_commise": "oops"})
+        agent.creer_regle_auto_correction({"erreur_commise": "oops"})
+
+        self.assertEqual(agent.moteur_llm.generer.call_count, 2)
+        self.assertFalse(agent._cache_llm_ram)
+
+    def test_profile_change_misses_cache(self):
+        agent = self.make_agent()
+        agent.moteur_llm.active_profile = "qwen"
+        agent.moteur_llm.model_config = {"n_ctx": 4096}
+        agent.moteur_llm.generer.return_value = {"response": "ok"}
+
+        agent._generer_cached("p", temperature=0.0)
+        agent.moteur_llm.active_profile = "qwen_lora"
+        agent._generer_cached("p", temperature=0.0)
+
+        self.assertEqual(agent.moteur_llm.generer.call_count, 2)
+
+    def test_sqlite_cache_expires_and_is_bounded(self):
+        agent = self.make_agent()
+        agent._cache_llm_db = sqlite3.connect(":memory:")
+        agent._cache_llm_db.execute(
+            "CREATE TABLE llm_cache(k TEXT PRIMARY KEY, v BLOB, ts REAL)"
+        )
+        self.addCleanup(agent._cache_llm_db.close)
+        agent._cache_llm_taille_db = 2
+        agent.moteur_llm.generer.return_value = {"response": "ok"}
+
+        with patch("agent_Reflexor.time.time", return_value=1000.0):
+            agent._generer_cached("ancien", temperature=0.0)
+        agent._cache_llm_ram.clear()
+        with patch("agent_Reflexor.time.time", return_value=1000.0 + 3601):
+            agent._generer_cached("ancien", temperature=0.0)  # expiré : regénéré
+            for p in ("a", "b", "c"):
+                agent._generer_cached(p, temperature=0.0)
+
+        self.assertEqual(agent.moteur_llm.generer.call_count, 5)
+        (n,) = agent._cache_llm_db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        self.assertEqual(n, 2)
+
+    def test_invalid_json_is_not_kept(self):
+        agent = self.make_agent()
+        agent.moteur_llm.generer.return_value = {"response": "not-json"}
+
+        agent._analyser_incident_complet("!!!", ["x"], [])
+        agent._analyser_incident_complet("!!!", ["x"], [])
+
+        self.assertEqual(agent.moteur_llm.generer.call_count, 2)
+
 
 @unittest.skipIf(_skip_if_missing(), "Project imports not available.")
 class TestCreerRegleAutoCorrection(AgentReflexorUnitTestBase):
@@ -202,24 +343,52 @@ class TestLancerAnalyseGouvernance(AgentReflexorUnitTestBase):
         agent.agent_memoire.sauvegarder_memoire.return_value = True
         agent.auditor.get_path.return_value = "C:\\regles"
 
-        # 5) agent_recherche exists for update_index
+        # 5) agent_recherche exists, redundant Whoosh indexing enabled
         agent.agent_memoire.agent_recherche = MagicMock()
+        agent.conf_feedback["whoosh_redundant_index"] = True
 
         # Act
         agent.lancer_analyse_gouvernance("!!! tu as hardcodé", ["u1", "a1", "u2", "a2"])
+        self.assertTrue(agent.flush())
+
+        # Assert: only as many cases retrieved as the prompt consumes (default 2)
+        self.assertEqual(agent.rechercher_cas_similaires.call_args.kwargs["top_k"], 2)
 
         # Assert: journalisation trace
         agent.agent_memoire.journaliser_trace_reflexive.assert_called_once()
         # Assert: sauvegarde règle + vectorisation
         agent.agent_memoire.sauvegarder_memoire.assert_called()
         agent.agent_memoire.vectoriser_regle.assert_called_once()
-        # Assert: update_index called (redundant indexing)
-        agent.agent_memoire.agent_recherche.update_index.assert_called_once()
+        # Assert: l'embedding calculé pendant la sauvegarde est réutilisé
+        self.assertIs(
+            agent.agent_memoire.vectoriser_regle.call_args.kwargs["vecteur"],
+            agent.agent_memoire.moteur_regles.encoder.return_value,
+        )
+        # Assert: redundant indexing batched and committed on flush
+        agent.agent_memoire.agent_recherche.update_index_lot.assert_called_once()
+        agent.agent_memoire.agent_recherche.update_index.assert_not_called()
         # Assert: stats increment
         agent.stats_manager.incrementer_stat_specifique.assert_called_with(
             "problemes_detectes"
         )
 
+    def test_identical_rule_is_persisted_once(self):
+        agent = self.make_agent()
+
+        agent.rechercher_cas_similaires = MagicMock(return_value=[])
+        agent._analyser_incident_complet = MagicMock(
+            return_value={"erreur_commise": "X", "type_ecart": "Logique"}
+        )
+        agent.creer_regle_auto_correction = MagicMock(return_value="- Même règle")
+        agent.agent_memoire.sauvegarder_memoire.return_value = True
+
+        agent.lancer_analyse_gouvernance("!!! a", ["u"])
+        agent.lancer_analyse_gouvernance("!!! b", ["u"])
+        self.assertTrue(agent.flush())
+
+        agent.agent_memoire.sauvegarder_memoire.assert_called_once()
+        agent.agent_memoire.vectoriser_regle.assert_called_once()
+
     def test_unknown_type_ecart_fallback_to_technique(self):
         agent = self.make_agent()
 
@@ -238,6 +407,7 @@ class TestLancerAnalyseGouvernance(AgentReflexorUnitTestBase):
         agent.creer_regle_auto_correction = MagicMock(return_value="* [Erreur] ...")
 
         agent.lancer_analyse_gouvernance("!!!", ["a", "b"])
+        self.assertTrue(agent.flush())
         # Should have logged warning about unknown type
         agent.logger.log_warning.assert_called()
         agent.agent_memoire.journaliser_trace_reflexive.assert_called_once()
@@ -264,6 +434,7 @@ class TestEnregistrerFeedbackEtendu(AgentReflexorUnitTestBase):
         )
 
         self.assertTrue(ok)
+        self.assertTrue(agent.flush())
         agent.agent_memoire.sauvegarder_memoire.assert_called_once()
         agent.agent_memoire.agent_recherche.update_index.assert_called_once()
         agent.stats_manager.incrementer_stat_specifique.assert_called_with(
@@ -280,25 +451,103 @@ class TestEnregistrerFeedbackEtendu(AgentReflexorUnitTestBase):
         )
 
         agent.agent_memoire.sauvegarder_memoire.return_value = True
-        agent.auditor.get_path.return_value = "C:\\memoire\\reflexive"
         agent.agent_memoire.agent_recherche = MagicMock()
 
-        ok = agent.enregistrer_feedback_etendu(
-            prompt="p",
-            reponse="r",
-            score=1.0,
-            mot_cle="style",  # not trigger
-        )
+        with tempfile.TemporaryDirectory() as tmp:
+            agent.auditor.get_path.return_value = tmp
 
-        self.assertTrue(ok)
+            ok = agent.enregistrer_feedback_etendu(
+                prompt="p",
+                reponse="r",
+                score=1.0,
+                mot_cle="style",  # not trigger
+            )
+
+            self.assertTrue(ok)
+            self.assertTrue(agent.flush())
         agent.agent_memoire.agent_recherche.update_index.assert_not_called()
 
-    def test_returns_false_on_exception(self):
+    def test_mot_cle_is_sanitized_in_filename(self):
+        agent = self.make_agent()
+        agent.agent_memoire.sauvegarder_memoire.return_value = True
+        agent.conf_feedback["mot_cle_declencheur"] = "../../etc"
+
+        agent.enregistrer_feedback_etendu("p", "r", 1.0, "../../etc")
+        agent.flush()
+
+        nom = agent.agent_memoire.sauvegarder_memoire.call_args.kwargs["nom_fichier"]
+        self.assertTrue(nom.startswith("feedback/feedback_+1_"))
+        self.assertNotIn("..", nom)
+        self.assertEqual(nom.count("/"), 1)
+
+    def test_ordinary_feedback_is_batched_into_jsonl(self):
+        agent = self.make_agent()
+        agent._feedback_buffer_limit = 2
+
+        with tempfile.TemporaryDirectory() as tmp:
+            agent.auditor.get_path.return_value = tmp
+
+            agent.enregistrer_feedback_etendu("p1", "r1", 0.0, "style")
+            agent.enregistrer_feedback_etendu("p2", "r2", 1.0, "code")
+            self.assertTrue(agent.flush())
+
+            lignes = (Path(tmp) / "feedback" / "feedback.jsonl").read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual([json.loads(l)["prompt"] for l in lignes], ["p1", "p2"])
+        agent.agent_memoire.sauvegarder_memoire.assert_not_called()
+
+    def test_concurrent_feedback_keeps_every_line(self):
+        """Des feedbacks ordinaires émis par plusieurs threads ne perdent aucune ligne."""
+        agent = self.make_agent()
+        agent._feedback_buffer_limit = 3
+
+        with tempfile.TemporaryDirectory() as tmp:
+            agent.auditor.get_path.return_value = tmp
+            threads = [
+                threading.Thread(
+                    target=lambda n=n: [
+                        agent.enregistrer_feedback_etendu(f"p{n}-{i}", "r", 0.0, "style")
+                        for i in range(25)
+                    ]
+                )
+                for n in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertTrue(agent.flush())
+
+            lignes = (Path(tmp) / "feedback" / "feedback.jsonl").read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(len(lignes), 100)
+
+    def test_flush_writes_partial_batch_after_pool_shutdown(self):
+        """A l'arrêt (pool d'I/O fermé), flush() écrit encore le tampon et le lot Whoosh."""
+        agent = self.make_agent()
+        agent.agent_memoire.agent_recherche = MagicMock()
+        agent._whoosh_lot = [{"nouveau_fichier": "r.json"}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            agent.auditor.get_path.return_value = tmp
+            agent.enregistrer_feedback_etendu("p1", "r1", 0.0, "style")
+            agent._io_executor.shutdown()
+
+            self.assertTrue(agent.flush())
+            lignes = (Path(tmp) / "feedback" / "feedback.jsonl").read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual([json.loads(l)["prompt"] for l in lignes], ["p1"])
+        agent.agent_memoire.agent_recherche.update_index_lot.assert_called_once_with(
+            [{"nouveau_fichier": "r.json"}]
+        )
+
+    def test_flush_reports_background_save_failure(self):
         agent = self.make_agent()
         agent.agent_memoire.sauvegarder_memoire.side_effect = RuntimeError("disk error")
 
         ok = agent.enregistrer_feedback_etendu("p", "r", 1.0, "mémoire")
-        self.assertFalse(ok)
+        self.assertTrue(ok)  # planifié, l'échec disque remonte au flush
+        self.assertFalse(agent.flush())
         agent.logger.log_error.assert_called()
 
 
@@ -306,6 +555,7 @@ class TestEnregistrerFeedbackEtendu(AgentReflexorUnitTestBase):
 class TestChargerConfigYaml(unittest.TestCase):
     def test_charger_config_yaml_reads_local_file_first(self):
         agent = AgentReflexor.__new__(AgentReflexor)
+        _charger_yaml_cache.cache_clear()
 
         fake_yaml = "configuration:\n  analyse:\n    top_k_similaires_default: 7\n"
 
@@ -318,6 +568,45 @@ class TestChargerConfigYaml(unittest.TestCase):
         self.assertIn("configuration", out)
         self.assertEqual(out["configuration"]["analyse"]["top_k_similaires_default"], 7)
 
+    def test_charger_config_yaml_parses_once_per_mtime(self):
+        agent = AgentReflexor.__new__(AgentReflexor)
+        _charger_yaml_cache.cache_clear()
+
+        first = AgentReflexor._charger_config_yaml(agent)
+        with patch("builtins.open", side_effect=AssertionError("re-read")):
+            second = AgentReflexor._charger_config_yaml(agent)
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_export_json_hors_source_et_fidele(self):
+        """L'export JSON va dans le dossier de cache et n'est écrit que si l'aller-retour est exact."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "src"
+            cache = Path(tmp) / "cache"
+            source.mkdir()
+            fidele = source / "fidele.yaml"
+            fidele.write_text("a:\n  b: 1\n", encoding="utf-8")
+            infidele = source / "infidele.yaml"
+            infidele.write_text("a:\n  1: x\n", encoding="utf-8")
+
+            with patch(f"{AgentReflexor.__module__}._DOSSIER_CACHE_CONFIG", cache):
+                for chemin in (fidele, infidele):
+                    _charger_yaml_cache.cache_clear()
+                    data = _charger_yaml_cache(str(chemin), chemin.stat().st_mtime_ns)
+                self.assertEqual(data, {"a": {1: "x"}})
+
+                # Deuxième processus : l'export est relu, sans repasser par le YAML
+                _charger_yaml_cache.cache_clear()
+                with patch("yaml.load", side_effect=AssertionError("re-parse")):
+                    relu = _charger_yaml_cache(str(fidele), fidele.stat().st_mtime_ns)
+
+            self.assertEqual(relu, {"a": {"b": 1}})
+            self.assertEqual(sorted(p.name for p in source.iterdir()), ["fidele.yaml", "infidele.yaml"])
+            exports = [p.name for p in cache.iterdir()]
+            self.assertEqual(len(exports), 1)
+            self.assertTrue(exports[0].startswith("fidele-"))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
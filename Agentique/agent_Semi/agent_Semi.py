@@ -18,21 +18,46 @@ Responsabilités Techniques :
     4. **Background Tasks** : Délégation des I/O lourds (sauvegarde, indexation code) à des threads démons.
 """
 
+import io
+import os
 import json
+import queue
 import re
 import time
-import requests
-from scipy import stats
 import yaml
 import uuid
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
 from dataclasses import asdict, is_dataclass
 import threading
-from typing import List, Dict, Optional, Any, Callable, TYPE_CHECKING
+from typing import (
+    List,
+    Dict,
+    Optional,
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    Tuple,
+    TYPE_CHECKING,
+)
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# --- IMPORT SÉCURISÉ ---
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
 
 if TYPE_CHECKING:
     from flask_socketio import SocketIO  # Pour que VS Code comprenne le type
+
+# Les sous-agents et moteurs (torch, faiss, transformers...) sont importés dans les
+# méthodes _initialiser_* : importer ce module (tests, outils CLI) reste léger.
 from agentique.base.META_agent import AgentBase
 from agentique.base.contrats_interface import (
     Action,
@@ -64,27 +89,190 @@ from agentique.base.contrats_interface import (
     MemorySearchFirstPrompt,
 )
 
-from agentique.sous_agents_gouvernes.agent_Memoire.agent_Memoire import AgentMemoire
-from agentique.sous_agents_gouvernes.agent_Parole.agent_Parole import AgentParole
-from agentique.sous_agents_gouvernes.agent_Parole.moteurs.moteur_llm import MoteurLLM
-from agentique.sous_agents_gouvernes.agent_Parole.moteurs.moteur_mini_llm import (
-    MoteurMiniLLM,
-)
-from agentique.sous_agents_gouvernes.agent_Juge.agent_Juge import AgentJuge
-from agentique.sous_agents_gouvernes.agent_Reflexor.agent_Reflexor import AgentReflexor
-from agentique.sous_agents_gouvernes.agent_Recherche.agent_Recherche import (
-    AgentRecherche,
+# orjson accepte str ou bytes et lève une sous-classe de json.JSONDecodeError
+_charger_json = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Seules ces clés intéressent la trace : on les lit sans parser tout l'arbre JSON
+_RAISONNEMENT_RE = re.compile(
+    r'"(analyse|thought|reasoning)"\s*:\s*"((?:[^"\\]|\\.){1,1000})"'
 )
-from agentique.sous_agents_gouvernes.agent_Contexte.agent_Contexte import AgentContexte
-from agentique.sous_agents_gouvernes.agent_Code.agent_Code import AgentCode
-from agentique.sous_agents_gouvernes.agent_Code.code_extractor_manager import (
-    CodeExtractorManager,
+
+# Déclencheur du RAG Code : nom de fichier technique OU mot-clé (un seul balayage)
+_RE_CODE_TRIGGER = re.compile(
+    r"[a-zA-Z0-9_]+\.(?:py|md|yaml|json)|(?i:code|fonction|classe|script|bug|erreur)"
 )
-from agentique.Semi.classes_cognitives import IntentionDetector
-from agentique.sous_agents_gouvernes.agent_Memoire.traitement_brute_persistante import (
-    ProcesseurBrutePersistante,
+
+# Clôtures Markdown autour des réponses JSON du LLM (nettoyage avant parsing)
+_RE_JSON_FENCE = re.compile(r"```json\s*")
+_RE_TRAIL_FENCE = re.compile(r"```$")
+# Blocs de code retirés de l'historique persisté
+_RE_CODE_BLOCK = re.compile(r"```[\s\S]*?```")
+# Antislash non échappé (chemins Windows) dans un JSON d'appel d'outil
+_RE_ANTISLASH_NU = re.compile(r'(?<!\\)\\(?![/u"\\bfnrt])')
+
+# Extracteurs (contenu, nom, type) des artefacts d'AgentCode, résolus une fois par classe
+# (Souvenir expose 'titre', ContexteCode 'name' / 'code_summary'...)
+_EXTRACTEURS_CODE: Dict[type, Callable[[Any], tuple]] = {}
+
+
+def _extracteur_code(item: Any) -> Callable[[Any], tuple]:
+    """Retourne (et met en cache) l'extracteur adapté à la classe de `item`."""
+    extracteur = _EXTRACTEURS_CODE.get(type(item))
+    if extracteur is None:
+        attr_contenu = next(
+            (a for a in ("contenu", "code_summary") if hasattr(item, a)), None
+        )
+        attr_nom = next((a for a in ("titre", "name", "chemin") if hasattr(item, a)), None)
+        attr_type = "type" if hasattr(item, "type") else None
+
+        def extracteur(obj, _c=attr_contenu, _n=attr_nom, _t=attr_type):
+            return (
+                getattr(obj, _c) if _c else "",
+                getattr(obj, _n) if _n else "Inconnu",
+                getattr(obj, _t) if _t else "snippet",
+            )
+
+        _EXTRACTEURS_CODE[type(item)] = extracteur
+    return extracteur
+
+# Clés d'instructions (config AgentParole) mises en cache à l'ouverture de session
+_CLES_INSTRUCTIONS = (
+    "instructions_systeme",
+    "instructions_contexte_manuel",
+    "instructions_cartographie",
+    "instructions_inspection",
+    "instructions_review",
+    "instructions_code_prompt",
+    "instructions_memory_search_prompt",
+    "instructions_memory_search_first_prompt",
 )
-from agentique.sous_agents_gouvernes.agent_Memoire.moteur_vecteur import MoteurVectoriel
+
+
+def _nouvel_id() -> str:
+    """Identifiant opaque de 128 bits (hex, sans tirets) pour les ids par requête."""
+    return os.urandom(16).hex()
+
+
+def _dumps_trace(donnees: Any) -> bytes:
+    """Sérialise en JSON compact (orjson gère dataclasses et Enums nativement)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(donnees, option=orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(donnees, ensure_ascii=False, cls=CustomJSONEncoder).encode("utf-8")
+
+
+def _tronquer_utf8(octets: bytes, limite: int) -> bytes:
+    """Coupe à `limite` octets sans casser un caractère multi-octets."""
+    if len(octets) <= limite:
+        return octets
+    while limite > 0 and (octets[limite] & 0xC0) == 0x80:
+        limite -= 1
+    return octets[:limite]
+
+
+def _ecrire_borne(buf: io.BytesIO, texte: Any, limite: int) -> None:
+    """Écrit au plus `limite` octets de `texte` dans `buf`, sans copie intermédiaire."""
+    octets = str(texte).encode("utf-8")
+    if len(octets) <= limite:
+        buf.write(octets)
+    else:
+        buf.write(_tronquer_utf8(memoryview(octets), limite))
+
+
+def _json_trace(donnees: Any, budget: int = 2000) -> bytes:
+    """
+    JSON borné pour la trace : pour un dict, les clés de premier niveau sont
+    sérialisées une à une jusqu'à épuisement du budget (on ne sérialise plus
+    des Mo de Souvenirs pour n'en garder que 2 Ko).
+    """
+    if not isinstance(donnees, dict):
+        return _tronquer_utf8(_dumps_trace(donnees), budget)
+
+    morceaux = []
+    taille = 1
+    for cle, valeur in donnees.items():
+        morceau = b"\n  " + _dumps_trace(str(cle)) + b": " + _dumps_trace(valeur)
+        morceaux.append(morceau)
+        taille += len(morceau)
+        if taille >= budget:
+            break
+    return _tronquer_utf8(b"{" + b",".join(morceaux) + b"\n}", budget)
+
+
+def _regrouper_flux(
+    flux: Iterable[str], taille_min: int = 32, delai_max_ms: float = 20.0
+) -> Generator[str, None, None]:
+    """
+    Regroupe les tokens d'un flux LLM en morceaux d'au moins `taille_min` caractères
+    (ou plus anciens que `delai_max_ms`) : un yield par morceau au lieu d'un par token.
+
+    Le premier token part seul (TTFT inchangé). Le délai n'est vérifié qu'à l'arrivée
+    d'un token : le générateur est synchrone, il n'y a pas de minuterie.
+    """
+    delai = delai_max_ms / 1000.0
+    morceaux: List[str] = []
+    taille = 0
+    debut = 0.0
+    premier = True
+    for token in flux:
+        if not token:
+            continue
+        if premier:
+            premier = False
+            yield token
+            continue
+        if not morceaux:
+            debut = time.monotonic()
+        morceaux.append(token)
+        taille += len(token)
+        if taille >= taille_min or time.monotonic() - debut >= delai:
+            yield "".join(morceaux)
+            morceaux.clear()
+            taille = 0
+    if morceaux:
+        yield "".join(morceaux)
+
+
+class _DetecteurJsonFlux:
+    """
+    Décide au plus tôt si une réponse streamée est un appel d'outil JSON caché.
+
+    Le tampon ne retient que le début de la réponse : dès que le premier caractère
+    non blanc n'est plus '{' ni un préfixe possible de '```json', il est rendu et
+    les tokens suivants passent directement (pas d'attente de 50 caractères).
+    """
+
+    SENTINELLE = "```json"
+    __slots__ = ("tampon", "json_cache")
+
+    def __init__(self):
+        self.tampon = ""
+        self.json_cache: Optional[bool] = None  # None = pas encore décidé
+
+    def alimenter(self, token: str) -> str:
+        """Ajoute un token et retourne le texte affichable maintenant ('' sinon)."""
+        if self.json_cache is not None:
+            return "" if self.json_cache else token
+
+        self.tampon += token
+        debut = self.tampon.lstrip()
+        if not debut or self.SENTINELLE.startswith(debut[: len(self.SENTINELLE)]):
+            if debut.startswith(self.SENTINELLE):
+                self.json_cache = True
+            return ""  # Blancs seuls ou préfixe de ```json : on attend
+        if debut[0] == "{":
+            self.json_cache = True
+            return ""
+
+        self.json_cache = False
+        texte, self.tampon = self.tampon, ""
+        return texte
+
+    def vider(self) -> str:
+        """Fin du flux : rend le tampon encore indécis."""
+        if self.json_cache is None:
+            texte, self.tampon = self.tampon, ""
+            return texte
+        return ""
 
 
 class AgentSemi(AgentBase):
@@ -101,7 +289,8 @@ class AgentSemi(AgentBase):
         Attributes:
             current_session_id (str): UUID de la session active (pour le suivi conversationnel).
             active_plan (PlanExecution): État courant du plan d'action (passé de prompt en prompt).
-            fichiers_actifs (Set[str]): Liste des fichiers "épinglés" dans le contexte courant (Working Set).
+            fichiers_actifs (Dict[str, None]): Fichiers "épinglés" dans le contexte courant (Working Set),
+                ensemble ordonné par ordre d'épinglage.
         """
         # ------------------------------------------------------
         # Dépendances (Cache / Monitoring)
@@ -110,6 +299,14 @@ class AgentSemi(AgentBase):
         self.get_cache = get_cache
         self.get_lock = get_lock
 
+        # Pool des canaux de contexte indépendants (RAG Code, fichiers actifs)
+        self._pool_contexte = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="semi-ctx"
+        )
+        # Pool partagé des tâches "fire-and-forget" (post-traitement, feedback,
+        # analyse réflexive, résumé système) : pas de création de thread par tâche
+        self._bg_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="semi-bg")
+
         # 2. Initialisation des composants (Méthodes extraites)
         self._initialiser_moteurs()
         self._initialiser_sous_agents()
@@ -119,13 +316,30 @@ class AgentSemi(AgentBase):
         # 3. Configuration Callback & État
         self._setup_callbacks_viewer()
         self._initialiser_etat_session()
+        self._initialiser_traceur()
 
         # 4. Démarrage des processus de fond
         self._lancer_processus_demarrage()
 
         self.logger.info("✅ AgentSemi initialisé (Refactorisé).")
 
+    def fermer(self):
+        """
+        Arrêt propre : termine les tâches de fond (post-traitement, feedbacks),
+        puis vide les écritures différées du Reflexor (tampon JSONL, lot Whoosh).
+        """
+        self._bg_pool.shutdown(wait=True)
+        self._pool_contexte.shutdown(wait=True)
+        try:
+            self.agent_reflexor.flush()
+        except Exception as e:
+            self.logger.log_error(f"Erreur flush Reflexor à l'arrêt : {e}")
+
     def _initialiser_outils_systeme(self):
+        from agentique.sous_agents_gouvernes.agent_Code.code_extractor_manager import (
+            CodeExtractorManager,
+        )
+
         # On instancie le nouveau Manager (Outil stateless)
         self.code_extractor = CodeExtractorManager()
 
@@ -134,6 +348,19 @@ class AgentSemi(AgentBase):
         # ------------------------------------------------------
 
     def _initialiser_moteurs(self):
+        from agentique.sous_agents_gouvernes.agent_Parole.moteurs.moteur_llm import (
+            MoteurLLM,
+        )
+        from agentique.sous_agents_gouvernes.agent_Parole.moteurs.moteur_mini_llm import (
+            MoteurMiniLLM,
+        )
+        from agentique.sous_agents_gouvernes.agent_Memoire.moteur_vecteur import (
+            MoteurVectoriel,
+        )
+        from agentique.sous_agents_gouvernes.agent_Memoire.traitement_brute_persistante import (
+            ProcesseurBrutePersistante,
+        )
+
         self.moteur_llm = MoteurLLM()
         self.moteur_mini_llm = MoteurMiniLLM()
         self.moteur_vectoriel = MoteurVectoriel()
@@ -155,10 +382,28 @@ class AgentSemi(AgentBase):
 
         Modifie l'état interne de l'instance (self.agent_*).
         """
+        from agentique.sous_agents_gouvernes.agent_Recherche.agent_Recherche import (
+            AgentRecherche,
+        )
+        from agentique.sous_agents_gouvernes.agent_Memoire.agent_Memoire import (
+            AgentMemoire,
+        )
+        from agentique.sous_agents_gouvernes.agent_Reflexor.agent_Reflexor import (
+            AgentReflexor,
+        )
+        from agentique.sous_agents_gouvernes.agent_Juge.agent_Juge import AgentJuge
+        from agentique.sous_agents_gouvernes.agent_Contexte.agent_Contexte import (
+            AgentContexte,
+        )
+        from agentique.sous_agents_gouvernes.agent_Parole.agent_Parole import (
+            AgentParole,
+        )
+        from agentique.Semi.classes_cognitives import IntentionDetector
+
         self.agent_recherche = AgentRecherche()
         self.agent_recherche.moteur_vectoriel = self.moteur_vectoriel  # Injection
 
-        self.agent_memoire: AgentMemoire = AgentMemoire(
+        self.agent_memoire: "AgentMemoire" = AgentMemoire(
             agent_recherche=self.agent_recherche, moteur_vectoriel=self.moteur_vectoriel
         )
         self.agent_recherche.agent_memoire = self.agent_memoire
@@ -175,7 +420,7 @@ class AgentSemi(AgentBase):
         self.agent_contexte = AgentContexte(
             agent_recherche=self.agent_recherche, agent_juge=self.agent_juge
         )
-        self.agent_parole: AgentParole = AgentParole(
+        self.agent_parole: "AgentParole" = AgentParole(
             agent_contexte=self.agent_contexte,
             agent_semi=self,
             get_cache=self.get_cache,
@@ -191,12 +436,16 @@ class AgentSemi(AgentBase):
             RechercheWeb,
         )
 
-        self.agent_recherche.outil_web = RechercheWeb(self.moteur_llm)
+        self.agent_recherche.outil_web = RechercheWeb(
+            self.moteur_llm, moteur_vectoriel=self.moteur_vectoriel
+        )
         self.logger.info("✅ Outil RechercheWeb injecté.")
 
     def _initialiser_agent_code(self):
         """Initialise le cerveau du code."""
         try:
+            from agentique.sous_agents_gouvernes.agent_Code.agent_Code import AgentCode
+
             self.agent_code = AgentCode()  # ✅ Nouvelle classe
             self.logger.info("✅ AgentCode connecté.")
         except Exception as e:
@@ -208,7 +457,10 @@ class AgentSemi(AgentBase):
         # =================================================================
 
     def _setup_callbacks_viewer(self):
-        """Configure le callback pour le Prompt Viewer (SocketIO)."""
+        """Configure le callback pour le Prompt Viewer (SSE + SocketIO)."""
+        # Une file par client SSE (/events/prompt_viewer), alimentée par le callback
+        self._abonnes_viewer: List["queue.Queue[str]"] = []
+        self._verrou_abonnes_viewer = threading.Lock()
 
         def update_viewer_callback(prompt_str):
             full_raw_prompt = (
@@ -217,22 +469,50 @@ class AgentSemi(AgentBase):
 
             cache = self.get_cache()
             lock = self.get_lock()
+            horodatage = datetime.now().isoformat()
 
+            with self._verrou_abonnes_viewer:
+                abonnes = list(self._abonnes_viewer)
+
+            # Copie sous le verrou partagé, sérialisation hors verrou (et seulement
+            # si un client SSE écoute)
             with lock:
                 cache["raw_prompt"] = full_raw_prompt
-                cache["timestamp"] = datetime.now().isoformat()
+                cache["timestamp"] = horodatage
+                instantane = dict(cache) if abonnes else None
+
+            if abonnes:
+                evenement = f"data: {json.dumps(instantane, ensure_ascii=False)}\n\n"
+            for file_client in abonnes:
+                try:
+                    file_client.put_nowait(evenement)
+                except queue.Full:
+                    pass  # Client trop lent : il recevra le prompt suivant
 
             if self.socketio:
                 try:
                     self.socketio.emit(
                         "refresh_prompt_viewer",
-                        {"timestamp": datetime.now().isoformat(), "status": "updated"},
+                        {"timestamp": horodatage, "status": "updated"},
                     )
                 except Exception as e:
                     print(f"⚠️ Erreur émission SocketIO: {e}")
 
         self.agent_parole._prompt_callback = update_viewer_callback
 
+    def abonner_prompt_viewer(self) -> "queue.Queue[str]":
+        """Ouvre une file d'événements SSE ('data: {...}\\n\\n') pour un client du Prompt Viewer."""
+        file_client: "queue.Queue[str]" = queue.Queue(maxsize=16)
+        with self._verrou_abonnes_viewer:
+            self._abonnes_viewer.append(file_client)
+        return file_client
+
+    def desabonner_prompt_viewer(self, file_client: "queue.Queue[str]") -> None:
+        """Retire la file d'un client SSE déconnecté."""
+        with self._verrou_abonnes_viewer:
+            if file_client in self._abonnes_viewer:
+                self._abonnes_viewer.remove(file_client)
+
     def _initialiser_etat_session(self):
         """Initialise les variables d'état de session."""
         self.current_session_id = str(uuid.uuid4())
@@ -240,12 +520,39 @@ class AgentSemi(AgentBase):
         self.derniere_classification: Optional[ResultatIntention] = None
         self.derniere_interaction = None
         self.dernier_code_hash = None
-        self.system_instructions = self.agent_parole.recuperer_instruction(
-            "instructions_systeme"
+        # Protocole injecté en tête des règles quand une alerte est active
+        self.active_protocol_override: Optional[str] = None
+        # Instructions des modes de prompt : la config d'AgentParole est figée après
+        # son chargement, on les lit une fois par session plutôt qu'à chaque tour
+        self._instr_cache: Dict[str, str] = self.agent_parole.recuperer_instructions(
+            _CLES_INSTRUCTIONS
         )
+        self.system_instructions = self._instr_cache["instructions_systeme"]
         self.active_plan = PlanExecution(objectif_global="")  # Utilise la dataclass
-        # NOUVEAU : La liste des fichiers "ouverts" dans l'IDE mental de Semi
-        self.fichiers_actifs = set()
+        # NOUVEAU : La liste des fichiers "ouverts" dans l'IDE mental de Semi.
+        # dict utilisé comme ensemble ordonné : même ordre d'un tour à l'autre,
+        # donc même contexte assemblé (et mêmes clés de cache en aval).
+        self.fichiers_actifs: Dict[str, None] = {}
+
+        self.conf_semi = self._charger_config_semi()
+        self.conf_cache_reponses = self.conf_semi.get("cache_reponses", {})
+        self.conf_boucle_outils = self.conf_semi.get("boucle_outils", {})
+        self.conf_streaming = self.conf_semi.get("streaming", {})
+        # Cache de « Réessayer » : (prompt, historique avant l'échange) -> (réponse, intention, horodatage)
+        self._cache_exact: "OrderedDict[str, tuple]" = OrderedDict()
+        self._verrou_cache_reponses = threading.Lock()
+
+    def _charger_config_semi(self) -> dict:
+        """Charge la section 'configuration' de config_semi.yaml (vide si absente)."""
+        path_config = self.auditor.get_path("config") or (
+            Path(__file__).parent / "config_semi.yaml"
+        )
+        try:
+            with open(path_config, "r", encoding="utf-8") as f:
+                return (yaml.safe_load(f) or {}).get("configuration", {}) or {}
+        except (OSError, yaml.YAMLError) as e:
+            self.logger.log_warning(f"Config Semi illisible ({e}), valeurs par défaut.")
+            return {}
 
     def _lancer_processus_demarrage(self):
         """
@@ -279,17 +586,117 @@ class AgentSemi(AgentBase):
                 self.logger.info(
                     "🌱 Premier lancement : Génération de l'identité système..."
                 )
-                threading.Thread(
-                    target=self.actualiser_resume_systeme, daemon=True
-                ).start()
+                self._bg_pool.submit(self.actualiser_resume_systeme)
         except Exception as e:
             self.logger.log_warning(
                 f"Impossible de vérifier le résumé système au démarrage : {e}"
             )
 
+    # =========================================================================
+    # 🧠 CACHE DES RÉPONSES (Court-circuit du pipeline)
+    # =========================================================================
+    def _cache_reponses_eligible(
+        self, prompt: str, search_mode: str, archive_history: Optional[List[dict]]
+    ) -> bool:
+        """
+        Uniquement en mode auto, hors alerte / protocole actif et sans fichiers
+        épinglés ni historique archivé : sinon la réponse dépend d'un contexte
+        que la clé ne capture pas.
+        """
+        return (
+            search_mode == "auto"
+            and not self.fichiers_actifs
+            and not archive_history
+            and not self.active_protocol_override
+            and "!!!" not in prompt
+        )
+
+    def _empreinte_historique(self, historique: List[str]) -> str:
+        """Empreinte BLAKE2b de la session et d'un état de l'historique de chat."""
+        h = hashlib.blake2b(self.current_session_id.encode("utf-8"), digest_size=16)
+        for message in historique:
+            h.update(b"\x00")
+            h.update(str(message).encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def _cle_cache_exact(prompt: str, portee: str) -> str:
+        """
+        Empreinte BLAKE2b (128 bits) du prompt dans sa portée (session + historique
+        au moment où il a été posé) : un « oui » ou « continue » répété plus loin
+        dans la conversation a une autre portée et ne rejoue rien.
+        """
+        return hashlib.blake2b(
+            f"{portee}\x00{prompt}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _chercher_reponse_exacte(
+        self, cle: str
+    ) -> Optional[Tuple[str, ResultatIntention]]:
+        """Réponse déjà générée pour cette clé, si encore valide."""
+        ttl = self.conf_cache_reponses.get("ttl_secondes", 3600)
+        with self._verrou_cache_reponses:
+            entree = self._cache_exact.get(cle)
+            if entree is None:
+                return None
+            if time.time() - entree[2] > ttl:
+                del self._cache_exact[cle]
+                return None
+            self._cache_exact.move_to_end(cle)
+            return entree[0], entree[1]
+
+    def _memoriser_reponse_exacte(
+        self, cle: str, reponse: str, intention: ResultatIntention
+    ):
+        """Ajoute une réponse au cache exact (LRU borné)."""
+        taille_max = self.conf_cache_reponses.get("taille_exacte", 1024)
+        with self._verrou_cache_reponses:
+            self._cache_exact[cle] = (reponse, intention, time.time())
+            self._cache_exact.move_to_end(cle)
+            while len(self._cache_exact) > taille_max:
+                self._cache_exact.popitem(last=False)
+
     # =========================================================================
     # 🕵️‍♂️ TRACEUR D'INVESTIGATION (NOUVEAU)
     # =========================================================================
+    def _initialiser_traceur(self):
+        """Démarre l'écrivain de fond : les traces ne touchent plus le disque dans penser()."""
+        self._trace_queue: "queue.Queue[tuple]" = queue.Queue()
+        # Tampon de construction réutilisé (un par thread appelant)
+        self._trace_buf = threading.local()
+        threading.Thread(
+            target=self._boucle_ecriture_traces, name="semi-trace", daemon=True
+        ).start()
+
+    def _boucle_ecriture_traces(self):
+        """
+        Consommateur de `_trace_queue` : attend une trace, récupère toutes celles
+        déjà en file, puis fait une seule écriture par fichier de log.
+        """
+        while True:
+            lot = [self._trace_queue.get()]
+            while True:
+                try:
+                    lot.append(self._trace_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            par_fichier: Dict[Path, List[bytes]] = {}
+            for chemin_log, bloc_log in lot:
+                par_fichier.setdefault(chemin_log, []).append(bloc_log)
+
+            for chemin_log, blocs in par_fichier.items():
+                try:
+                    with open(chemin_log, "ab") as f:
+                        f.write(b"".join(blocs))
+                except OSError as e:
+                    self.logger.log_warning(
+                        f"⚠️ Impossible de tracer l'investigation : {e}"
+                    )
+
+            for _ in lot:
+                self._trace_queue.task_done()
+
     def _tracer_etape_investigation(
         self, etape: str, prompt_interne: str, reponse_llm: str, outil_resultat: dict
     ):
@@ -297,8 +704,9 @@ class AgentSemi(AgentBase):
         Enregistre les étapes intermédiaires de la boucle de recherche.
         Ne pollue pas la mémoire, c'est du log pur pour le débogage humain.
         """
-        # On crée un fichier de log dédié par jour
-        date_str = datetime.now().strftime("%Y-%m-%d")
+        # On crée un fichier de log dédié par jour (une seule lecture de l'horloge)
+        maintenant = datetime.now()
+        date_str = maintenant.strftime("%Y-%m-%d")
         nom_log = f"trace_investigation_{date_str}.md"
 
         # On récupère le chemin des logs via l'auditor
@@ -307,45 +715,218 @@ class AgentSemi(AgentBase):
             return  # Si pas de logs configurés, on sort
 
         chemin_log = Path(dossier_logs) / nom_log
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = maintenant.strftime("%H:%M:%S")
 
         # Extraction du raisonnement (souvent dans le JSON de réponse LLM)
         raisonnement = reponse_llm
-        try:
-            # Tentative d'extraction propre si c'est du JSON
-            if "{" in reponse_llm:
-                # On cherche le bloc JSON
-                json_part = reponse_llm[
-                    reponse_llm.find("{") : reponse_llm.rfind("}") + 1
-                ]
-                data = json.loads(json_part)
-                # On cherche les clés standards de raisonnement
+        if "{" in reponse_llm:
+            # Cas courant : la clé est une chaîne simple, la regex suffit
+            cles = dict(_RAISONNEMENT_RE.findall(reponse_llm))
+            if cles:
                 raisonnement = (
-                    data.get("analyse")
-                    or data.get("thought")
-                    or data.get("reasoning")
-                    or reponse_llm
+                    cles.get("analyse") or cles.get("thought") or cles.get("reasoning")
                 )
-        except:
-            pass  # Si ça fail, on garde le texte brut
-
-        bloc_log = (
-            f"\n## 🕵️‍♂️ Étape : {etape} ({timestamp})\n"
-            f"**🧠 Raisonnement :**\n> {str(raisonnement)[:1000]}\n\n"
-            f"**📤 Prompt Interne (Envoyé au LLM) :**\n```text\n{prompt_interne[:2000]} ... [Tronqué]\n```\n\n"
-            f"**📥 Résultat Outil (Reçu) :**\n```json\n{json.dumps(outil_resultat, ensure_ascii=False, indent=2)[:2000]} ... [Tronqué]\n```\n"
-            f"---\n"
+            else:
+                try:
+                    json_part = reponse_llm[
+                        reponse_llm.find("{") : reponse_llm.rfind("}") + 1
+                    ]
+                    data = _charger_json(json_part)
+                    raisonnement = (
+                        data.get("analyse")
+                        or data.get("thought")
+                        or data.get("reasoning")
+                        or reponse_llm
+                    )
+                except (ValueError, AttributeError):
+                    pass  # Si ça fail, on garde le texte brut
+
+        # Assemblé en bytes dans un tampon réutilisé, chaque section bornée
+        # (fichier ouvert en "ab" par l'écrivain de fond)
+        bloc_log = self._construire_trace(
+            etape, timestamp, raisonnement, prompt_interne, outil_resultat
         )
 
-        try:
-            with open(chemin_log, "a", encoding="utf-8") as f:
-                f.write(bloc_log)
-        except Exception as e:
-            self.logger.log_warning(f"⚠️ Impossible de tracer l'investigation : {e}")
+        # L'écriture disque est faite par le thread 'semi-trace'
+        self._trace_queue.put((chemin_log, bloc_log))
 
-        # ------------------------------------------------------
-        # Méthode Principale de Pensée
-        # ------------------------------------------------------
+    def _construire_trace(
+        self,
+        etape: str,
+        timestamp: str,
+        raisonnement: Any,
+        prompt_interne: str,
+        outil_resultat: dict,
+    ) -> bytes:
+        """Bloc markdown d'une étape : raisonnement <= 1 Ko, prompt <= 2 Ko, résultat <= 2 Ko."""
+        buf = getattr(self._trace_buf, "buf", None)
+        if buf is None:
+            buf = self._trace_buf.buf = io.BytesIO()
+        buf.seek(0)
+        buf.truncate()
+
+        buf.write(f"\n## 🕵️‍♂️ Étape : {etape} ({timestamp})\n".encode("utf-8"))
+        buf.write("**🧠 Raisonnement :**\n> ".encode("utf-8"))
+        _ecrire_borne(buf, raisonnement, 1000)
+        buf.write("\n\n**📤 Prompt Interne (Envoyé au LLM) :**\n```text\n".encode("utf-8"))
+        _ecrire_borne(buf, prompt_interne, 2000)
+        buf.write(" ... [Tronqué]\n```\n\n**📥 Résultat Outil (Reçu) :**\n```json\n".encode("utf-8"))
+        buf.write(_json_trace(outil_resultat))
+        buf.write(" ... [Tronqué]\n```\n---\n".encode("utf-8"))
+        return buf.getvalue()
+
+    # ------------------------------------------------------
+    # 🧩 CONSTRUCTION DU PROMPT (DISPATCH PAR MODE)
+    # ------------------------------------------------------
+
+    @staticmethod
+    def _classer_mode_prompt(
+        prompt: str,
+        intention: ResultatIntention,
+        souvenirs_par_type: Dict[str, List[Souvenir]],
+        modificateurs: ModificateursCognitifs,
+        code_chunks: List[CodeChunk],
+    ) -> str:
+        """Choisit le mode de prompt (ordre de priorité : manuel > ... > standard)."""
+        if modificateurs.search_mode == SearchMode.CONTEXTE_MANUEL:
+            return "manuel"
+        if "cartographie_projet" in souvenirs_par_type:
+            return "cartographie"
+        if (
+            "fichier_technique" in souvenirs_par_type
+            or "fichier_brut" in souvenirs_par_type
+        ) and intention.categorie in (
+            Categorie.ANALYSER,
+            Categorie.AGENT,
+            Categorie.SYSTEME,
+            Categorie.BACKEND,
+        ):
+            return "inspection"
+        if intention.categorie == Categorie.PLANIFIER and "staging" in prompt.lower():
+            return "review"
+        if code_chunks:
+            return "code"
+        return "standard"
+
+    # --- A. MODE MANUEL (Priorité Absolue) ---
+    def _prompt_mode_manuel(
+        self, prompt, intention, contexte, modificateurs, historique_brut, **_
+    ):
+        self.logger.info("🚨 MODE INJECTION CODE MANUEL ACTIVÉ.")
+        slots_list = (
+            historique_brut
+            if isinstance(historique_brut, list)
+            else [str(historique_brut)]
+        )
+        code_joint = (
+            "\n\n".join(slots_list).strip() if slots_list else "# Aucun code fourni"
+        )
+
+        return ManualContextCodePrompt(
+            prompt_original=prompt,
+            instructions_contexte_manuel=self._instr_cache[
+                "instructions_contexte_manuel"
+            ],
+            contexte_manuel=code_joint,
+            intention=intention,
+            historique=contexte.historique,
+            regles=contexte.regles_actives,
+            fichiers_readme=contexte.fichiers_readme,
+            modificateurs=modificateurs,
+        )
+
+    # --- B. MODE CARTOGRAPHIE ---
+    def _prompt_mode_cartographie(self, prompt, intention, souvenirs_par_type, **_):
+        self.logger.info("🗺️ MODE DÉTECTÉ : CARTOGRAPHIE")
+        souvenir_map = souvenirs_par_type["cartographie_projet"][0]
+        resume = self.agent_parole._recuperer_resume_systeme()
+
+        return CartographyPrompt(
+            prompt_original=prompt,
+            instructions_cartographie=self._instr_cache["instructions_cartographie"],
+            cartographie_projet=souvenir_map.contenu,
+            plan_de_bataille=[resume],
+            intention=intention,
+        )
+
+    # --- C. MODE INSPECTION FICHIER ---
+    # Si on a un fichier technique chargé ET qu'on veut analyser/coder
+    def _prompt_mode_inspection(
+        self, prompt, intention, contexte, souvenirs_par_type, **_
+    ):
+        # Premier fichier dans l'ordre du contexte, quel que soit son type
+        souvenir_fichier = min(
+            souvenirs_par_type.get("fichier_technique", [])[:1]
+            + souvenirs_par_type.get("fichier_brut", [])[:1],
+            key=contexte.contexte_memoire.index,
+        )
+        self.logger.info(f"🔧 MODE DÉTECTÉ : INSPECTION ({souvenir_fichier.titre})")
+        resume = self.agent_parole._recuperer_resume_systeme()
+
+        return FileInspectionPrompt(
+            prompt_original=prompt,
+            instructions_inspection=self._instr_cache["instructions_inspection"],
+            fichier_en_cours=souvenir_fichier,
+            notes_precedentes=resume,
+            intention=intention,
+        )
+
+    # --- D. MODE REVIEW ---
+    def _prompt_mode_review(self, prompt, intention, **_):
+        self.logger.info("✅ MODE DÉTECTÉ : STAGING REVIEW")
+        resume = self.agent_parole._recuperer_resume_systeme()
+        return StagingReviewPrompt(
+            prompt_original=prompt,
+            instructions_review=self._instr_cache["instructions_review"],
+            etat_staging_actuel=resume,
+            derniere_action="Vérification demandée",
+            intention=intention,
+        )
+
+    # --- E. MODE CODE STANDARD ---
+    def _prompt_mode_code(
+        self, prompt, intention, contexte, modificateurs, code_chunks, **_
+    ):
+        self.logger.info(
+            f"💻 MODE CODE ACTIVÉ : {len(code_chunks)} chunks (RAG + Actifs)."
+        )
+        return StandardPromptCode(
+            prompt_original=prompt,
+            instructions_code_prompt=self._instr_cache["instructions_code_prompt"]
+            or "Tu es un expert Python.",
+            modificateurs=modificateurs,
+            intention=intention,
+            historique=contexte.historique,
+            regles=contexte.regles_actives,
+            fichiers_readme=contexte.fichiers_readme,
+            code_chunks=code_chunks,
+        )
+
+    # --- F. MODE STANDARD (Défaut) ---
+    def _prompt_mode_standard(self, prompt, intention, contexte, modificateurs, **_):
+        return StandardPrompt(
+            prompt_original=prompt,
+            instructions_systeme=self._instr_cache["instructions_systeme"],
+            modificateurs=modificateurs,
+            intention=intention,
+            historique=contexte.historique,
+            contexte_memoire=contexte.contexte_memoire,
+            regles=contexte.regles_actives,
+            fichiers_readme=contexte.fichiers_readme,
+        )
+
+    _CONSTRUCTEURS_PROMPT = {
+        "manuel": _prompt_mode_manuel,
+        "cartographie": _prompt_mode_cartographie,
+        "inspection": _prompt_mode_inspection,
+        "review": _prompt_mode_review,
+        "code": _prompt_mode_code,
+        "standard": _prompt_mode_standard,
+    }
+
+    # ------------------------------------------------------
+    # Méthode Principale de Pensée
+    # ------------------------------------------------------
 
     def penser(
         self,
@@ -390,7 +971,7 @@ class AgentSemi(AgentBase):
 
         # --- GESTION DES ID & CONTINUITÉ ---
         if interaction_id is None:
-            interaction_id = str(uuid.uuid4())
+            interaction_id = _nouvel_id()
 
         # ✅ CORRECTION : Si pas d'ID reçu de l'interface, on utilise la session interne de Semi.
         # C'est ce qui assure la continuité de la mémoire vive.
@@ -416,7 +997,7 @@ class AgentSemi(AgentBase):
         self.logger.info(f"Nouvelle requête [{correlation_id}] : {prompt[:50]}...")
 
         # Métriques Log (Volatiles)
-        meta_pipeline = MetadataPipeline(interaction_id=str(uuid.uuid4()))
+        meta_pipeline = MetadataPipeline(interaction_id=_nouvel_id())
 
         print("DEBUG: 1. Penser démarré")
         # ==========================================================
@@ -431,12 +1012,14 @@ class AgentSemi(AgentBase):
         if resultat_commande == "NOUVEAU_CHAT":
             prompt_texte = self.agent_parole.prompt_premier_chat(prompt)
 
-            # Génération directe
-            response = ""
-            for part in self.moteur_llm.generer_stream(prompt_texte):
-                response += part
+            # Génération directe (morceaux accumulés en liste, un seul join à la fin)
+            morceaux = []
+            flux_chat = self._flux_llm(self.moteur_llm.generer_stream(prompt_texte))
+            for part in flux_chat:
+                morceaux.append(part)
                 if stream:
                     yield part
+            response = "".join(morceaux)
 
             self.agent_contexte.mettre_a_jour_historique(prompt, response)
             if not stream:
@@ -464,6 +1047,63 @@ class AgentSemi(AgentBase):
             # On arrête le processus ici car c'est une demande spécifique
             return
         print("DEBUG: 3.0 Handled Forced Search Passé")
+        # ------------------------------------------------------
+        # 2-BIS. « Réessayer » : même prompt que le dernier échange
+        # ------------------------------------------------------
+        cache_eligible = self._cache_reponses_eligible(
+            prompt, search_mode, archive_history
+        )
+        cle_exacte = None
+        if cache_eligible:
+            historique = list(self.agent_contexte.get_historique_chat())
+            # Clé de mémorisation : l'historique avant cet échange
+            cle_exacte = self._cle_cache_exact(
+                prompt, self._empreinte_historique(historique)
+            )
+            # Relance du dernier prompt : la réponse a été mémorisée avec
+            # l'historique d'avant le dernier échange [prompt, réponse]
+            entree_cache = None
+            if len(historique) >= 2 and historique[-2] == prompt:
+                entree_cache = self._chercher_reponse_exacte(
+                    self._cle_cache_exact(
+                        prompt, self._empreinte_historique(historique[:-2])
+                    )
+                )
+
+            if entree_cache is not None:
+                reponse_cache, intention_cache = entree_cache
+                self.logger.info("♻️ Réponse servie depuis le cache de réponses.")
+                self.agent_contexte.mettre_a_jour_historique(prompt, reponse_cache)
+                self._sauvegarder_interaction_brute(
+                    prompt, reponse_cache, intention_cache, interaction_id, session_id
+                )
+                self.current_message_turn += 1
+                self.derniere_interaction = (prompt, reponse_cache, datetime.now())
+                if stream:
+                    pas = self.conf_cache_reponses.get("taille_chunk_replay", 32)
+                    for i in range(0, len(reponse_cache), pas):
+                        yield reponse_cache[i : i + pas]
+                else:
+                    yield reponse_cache
+                return
+        # ------------------------------------------------------
+        # 2-TER. Canaux indépendants lancés en parallèle
+        # ------------------------------------------------------
+        # RAG Code et fichiers actifs ne dépendent que du prompt : ils tournent
+        # pendant l'intention + la recherche vectorielle (latence = max, pas somme).
+        futur_code = (
+            self._pool_contexte.submit(self._collecter_code_chunks, prompt)
+            if self.agent_code and _RE_CODE_TRIGGER.search(prompt)
+            else None
+        )
+        futur_actifs = (
+            self._pool_contexte.submit(
+                self._charger_fichiers_actifs, list(self.fichiers_actifs)
+            )
+            if self.fichiers_actifs
+            else None
+        )
+
         # ==========================================================
         # 3. DÉTECTION D'INTENTION (Le Router)
         # ==========================================================
@@ -505,8 +1145,13 @@ class AgentSemi(AgentBase):
         )
         tick("Après Tri Contexte")
 
+        # Index par type (une passe) : les modes de prompt ci-dessous y lisent en O(1)
+        souvenirs_par_type: Dict[str, List[Souvenir]] = {}
+        for s in resultat_contexte.contexte_memoire:
+            souvenirs_par_type.setdefault(s.type, []).append(s)
+
         # 🔴 Injection du PROTOCOLE ALERTE si actif
-        if getattr(self, "active_protocol_override", None):
+        if self.active_protocol_override:
             protocole_souv = Souvenir(
                 contenu=self.active_protocol_override,
                 titre="PROTOCOLE_ALERTE",
@@ -517,244 +1162,30 @@ class AgentSemi(AgentBase):
 
         print("DEBUG: 5. Recherche finie")
         # ------------------------------------------------------
-        # 6. RAG CODE (Canal Dédié)
-        # ------------------------------------------------------
-        liste_code_chunks: List[CodeChunk] = []  # Typage strict
-
-        # Regex simplifiée pour déclenchement
-        import re
-
-        trigger_code = False
-        if self.agent_code:
-            # On cherche des indices de fichiers ou de structure technique
-            if re.search(r"([a-zA-Z0-9_]+)\.(py|md|yaml|json)", prompt) or re.search(
-                r"(code|fonction|classe|script|bug|erreur)", prompt, re.IGNORECASE
-            ):
-                # Appel à l'AgentCode
-                raw_results = self.agent_code.fournir_contexte(prompt)
-
-                # Conversion des résultats bruts en CodeChunk typés
-                if raw_results:
-                    trigger_code = True
-                    for item in raw_results:
-                        # 1. Extraction Contenu Robuste
-                        contenu = ""
-                        if hasattr(item, "contenu"):
-                            contenu = item.contenu
-                        elif hasattr(item, "code_summary"):
-                            contenu = item.code_summary
-
-                        # --- ✅ AJOUT : PASS-THROUGH DES ERREURS ---
-                        # Si c'est une erreur technique, on bypass le filtre de longueur
-                        is_error = getattr(item, "type", "") == "erreur_technique"
-
-                        # FILTRE : Si le contenu est vide ou < 10 caractères (sauf si erreur), on jette
-                        if not is_error and (not contenu or len(contenu.strip()) < 10):
-                            continue
-
-                        # 2. Extraction Nom (Gestion du Squelette/Souvenir)
-                        # Souvenir utilise 'titre', ContexteCode utilise 'name'
-                        nom_fichier = "Inconnu"
-                        if hasattr(item, "titre"):
-                            nom_fichier = item.titre
-                        elif hasattr(item, "name"):
-                            nom_fichier = item.name
-                        elif hasattr(item, "chemin"):
-                            nom_fichier = item.chemin
-
-                        liste_code_chunks.append(
-                            CodeChunk(
-                                contenu=contenu,
-                                chemin=nom_fichier,  # Maintenant le nom sera correct (ex: SQUELETTE_DYNAMIQUE)
-                                type=getattr(item, "type", "snippet"),
-                                langage="python",
-                            )
-                        )
-
-        # ------------------------------------------------------
-        # 6-BIS. INJECTION FICHIERS ACTIFS (Continuité Session)
+        # 6. RAG CODE + 6-BIS. FICHIERS ACTIFS (lancés en 2-TER)
         # ------------------------------------------------------
-        # On ajoute les fichiers "épinglés" par les tours précédents pour éviter l'amnésie
-        chunks_actifs = []
-        fichiers_a_charger = getattr(self, "fichiers_actifs", [])
-
-        if fichiers_a_charger:
-            self.logger.info(f"📂 Injection contexte actif : {fichiers_a_charger}")
-
-            # On vérifie la présence de l'outil de lecture
-            outil = getattr(self.agent_recherche, "outil_recherche_memoire", None)
-
-            if outil:
-                for fichier in fichiers_a_charger:
-                    try:
-                        # Lecture via la méthode unifiée (celle utilisée par rechercher_memoire)
-                        content = outil.lire_fichier_complet(fichier)
-
-                        if content:
-                            # Création du Chunk avec typage conforme pour AgentParole
-                            chunks_actifs.append(
-                                CodeChunk(
-                                    contenu=content,
-                                    chemin=fichier,
-                                    type="fichier_actif",  # Permet à Parole d'appliquer le formatage spécial
-                                    langage="python",
-                                )
-                            )
-                    except Exception as e:
-                        self.logger.log_warning(
-                            f"⚠️ Impossible de relire le fichier actif {fichier}: {e}"
-                        )
-            else:
-                self.logger.log_error(
-                    "❌ outil_recherche_memoire non disponible pour l'injection active."
-                )
+        liste_code_chunks: List[CodeChunk] = futur_code.result() if futur_code else []
+        chunks_actifs: List[CodeChunk] = futur_actifs.result() if futur_actifs else []
 
         # ------------------------------------------------------
         # ✅ 7. CRÉATION DU PROMPT (MAPPING STRICT)
         # ==========================================================
 
-        prompt_final_obj = None
-
-        # --- A. MODE MANUEL (Priorité Absolue) ---
-        if modificateurs.search_mode == SearchMode.CONTEXTE_MANUEL:
-            self.logger.info("🚨 MODE INJECTION CODE MANUEL ACTIVÉ.")
-            slots_list = (
-                historique_brut
-                if isinstance(historique_brut, list)
-                else [str(historique_brut)]
-            )
-            code_joint = (
-                "\n\n".join(slots_list).strip() if slots_list else "# Aucun code fourni"
-            )
-
-            prompt_final_obj = ManualContextCodePrompt(
-                prompt_original=prompt,
-                instructions_contexte_manuel=self.agent_parole.recuperer_instruction(
-                    "instructions_contexte_manuel"
-                ),
-                contexte_manuel=code_joint,
-                intention=resultat_intention,
-                historique=resultat_contexte.historique,
-                regles=resultat_contexte.regles_actives,
-                fichiers_readme=resultat_contexte.fichiers_readme,
-                modificateurs=modificateurs,
-            )
-
-        # --- B. MODE CARTOGRAPHIE (Nouveau) ---
-        elif next(
-            (
-                s
-                for s in resultat_contexte.contexte_memoire
-                if s.type == "cartographie_projet"
-            ),
-            None,
-        ):
-            self.logger.info("🗺️ MODE DÉTECTÉ : CARTOGRAPHIE")
-            souvenir_map = next(
-                (
-                    s
-                    for s in resultat_contexte.contexte_memoire
-                    if s.type == "cartographie_projet"
-                ),
-                None,
-            )
-            resume = self.agent_parole._recuperer_resume_systeme()
-
-            prompt_final_obj = CartographyPrompt(
-                prompt_original=prompt,
-                instructions_cartographie=self.config.get("prompts", {}).get(
-                    "instructions_cartographie", ""
-                ),
-                cartographie_projet=souvenir_map.contenu,
-                plan_de_bataille=[resume],
-                intention=resultat_intention,
-            )
-
-        # --- C. MODE INSPECTION FICHIER (Nouveau) ---
-        # Si on a un fichier technique chargé ET qu'on veut analyser/coder
-        elif next(
-            (
-                s
-                for s in resultat_contexte.contexte_memoire
-                if s.type in ["fichier_technique", "fichier_brut"]
-            ),
-            None,
-        ) and resultat_intention.categorie in [
-            Categorie.ANALYSER,
-            Categorie.CODER,
-            Categorie.AGENT,
-        ]:
-            souvenir_fichier = next(
-                (
-                    s
-                    for s in resultat_contexte.contexte_memoire
-                    if s.type in ["fichier_technique", "fichier_brut"]
-                ),
-                None,
-            )
-            self.logger.info(f"🔧 MODE DÉTECTÉ : INSPECTION ({souvenir_fichier.titre})")
-            resume = self.agent_parole._recuperer_resume_systeme()
-
-            prompt_final_obj = FileInspectionPrompt(
-                prompt_original=prompt,
-                instructions_inspection=self.config.get("prompts", {}).get(
-                    "instructions_inspection", ""
-                ),
-                fichier_en_cours=souvenir_fichier,
-                notes_precedentes=resume,
-                intention=resultat_intention,
-            )
-
-        # --- D. MODE REVIEW (Nouveau) ---
-        elif (
-            resultat_intention.categorie == Categorie.PLANIFIER
-            and "staging" in prompt.lower()
-        ):
-            self.logger.info("✅ MODE DÉTECTÉ : STAGING REVIEW")
-            resume = self.agent_parole._recuperer_resume_systeme()
-            prompt_final_obj = StagingReviewPrompt(
-                prompt_original=prompt,
-                instructions_review=self.config.get("prompts", {}).get(
-                    "instructions_review", ""
-                ),
-                etat_staging_actuel=resume,
-                derniere_action="Vérification demandée",
-                intention=resultat_intention,
-            )
-
-        # --- E. MODE CODE STANDARD ---
-        elif (trigger_code and liste_code_chunks) or chunks_actifs:
-            self.logger.info(
-                f"💻 MODE CODE ACTIVÉ : {len(liste_code_chunks)} RAG + {len(chunks_actifs)} Actifs."
-            )
-            prompt_final_obj = StandardPromptCode(
-                prompt_original=prompt,
-                instructions_code_prompt=self.agent_parole.recuperer_instruction(
-                    "instructions_code_prompt"
-                )
-                or "Tu es un expert Python.",
-                modificateurs=modificateurs,
-                intention=resultat_intention,
-                historique=resultat_contexte.historique,
-                regles=resultat_contexte.regles_actives,
-                fichiers_readme=resultat_contexte.fichiers_readme,
-                code_chunks=liste_code_chunks + chunks_actifs,
-            )
-
-        # --- F. MODE STANDARD (Défaut) ---
-        else:
-            prompt_final_obj = StandardPrompt(
-                prompt_original=prompt,
-                instructions_systeme=self.agent_parole.recuperer_instruction(
-                    "instructions_systeme"
-                ),
-                modificateurs=modificateurs,
-                intention=resultat_intention,
-                historique=resultat_contexte.historique,
-                contexte_memoire=resultat_contexte.contexte_memoire,
-                regles=resultat_contexte.regles_actives,
-                fichiers_readme=resultat_contexte.fichiers_readme,
-            )
+        # Mode choisi une seule fois, puis constructeur spécialisé (table de dispatch)
+        code_chunks = liste_code_chunks + chunks_actifs
+        mode_prompt = self._classer_mode_prompt(
+            prompt, resultat_intention, souvenirs_par_type, modificateurs, code_chunks
+        )
+        prompt_final_obj = self._CONSTRUCTEURS_PROMPT[mode_prompt](
+            self,
+            prompt=prompt,
+            intention=resultat_intention,
+            contexte=resultat_contexte,
+            souvenirs_par_type=souvenirs_par_type,
+            modificateurs=modificateurs,
+            code_chunks=code_chunks,
+            historique_brut=historique_brut,
+        )
 
         tick("7. Prompt Construit")
         self.derniere_classification = prompt_final_obj.intention
@@ -768,11 +1199,11 @@ class AgentSemi(AgentBase):
 
         t_gen_start = time.time()
         first_token_received = False
-        buffer_detection = ""
-        check_json_done = False
-        is_hidden_json_mode = False
+        detecteur_json = _DetecteurJsonFlux()
 
-        response_generator = self.moteur_llm.generer_stream(prompt_texte)
+        response_generator = self._flux_llm(
+            self.moteur_llm.generer_stream(prompt_texte)
+        )
 
         try:
             for token in response_generator:
@@ -785,22 +1216,16 @@ class AgentSemi(AgentBase):
 
                 final_response_text += token
 
-                # BUFFER JSON
+                # DÉTECTION JSON (décidée dès le premier caractère significatif)
                 if stream:
-                    if not check_json_done:
-                        buffer_detection += token
-                        if len(buffer_detection) > 50:
-                            if re.match(r"^\s*({|```json)", buffer_detection):
-                                is_hidden_json_mode = True
-                            else:
-                                yield buffer_detection
-                            check_json_done = True
-                    else:
-                        if not is_hidden_json_mode:
-                            yield token
+                    texte_visible = detecteur_json.alimenter(token)
+                    if texte_visible:
+                        yield texte_visible
 
-            if stream and not check_json_done and not is_hidden_json_mode:
-                yield buffer_detection
+            if stream:
+                reste = detecteur_json.vider()
+                if reste:
+                    yield reste
 
         except Exception as e:
             self.logger.log_error(
@@ -816,18 +1241,32 @@ class AgentSemi(AgentBase):
         # ==========================================================
         if final_response_text:
             # 1. Nettoyage et Parsing Initial
-            text_to_parse = re.sub(r"```json\s*", "", final_response_text)
-            text_to_parse = re.sub(r"```$", "", text_to_parse.strip())
+            text_to_parse = _RE_JSON_FENCE.sub("", final_response_text)
+            text_to_parse = _RE_TRAIL_FENCE.sub("", text_to_parse.strip())
 
             # Initialisation de la boucle avec le premier résultat
             current_tool_result = self._detecter_et_executer_function_call(
                 text_to_parse
             )
 
+            # Une réponse issue d'outils (web, fichiers...) n'est pas rejouable
+            if current_tool_result:
+                cache_eligible = False
+
             # Limite de sécurité pour éviter les boucles infinies
             max_autonomy_steps = 10
             step_count = 0
 
+            # Résumé système lu une fois pour toute la boucle, relu seulement
+            # après un update_system_summary (seul outil qui le modifie)
+            resume_boucle: Optional[str] = None
+
+            def resume_systeme() -> str:
+                nonlocal resume_boucle
+                if resume_boucle is None:
+                    resume_boucle = self.agent_parole._recuperer_resume_systeme()
+                return resume_boucle
+
             # 2. Démarrage de la Machine à États
             while current_tool_result and step_count < max_autonomy_steps:
                 step_count += 1
@@ -839,7 +1278,7 @@ class AgentSemi(AgentBase):
                 if current_tool_result.get("type") == "FINAL_ANSWER_EXTRACTED":
                     self.logger.info("🏁 SORTIE BOUCLE : Réponse Finale")
                     contenu_final = current_tool_result.get("content", "")
-                    if stream and is_hidden_json_mode:
+                    if stream and detecteur_json.json_cache:
                         yield contenu_final
                     final_response_text = contenu_final
                     break
@@ -853,13 +1292,9 @@ class AgentSemi(AgentBase):
                         self.logger.info("🗺️ ÉTAT: NAVIGATION (CartographyPrompt)")
                         prompt_autonome_obj = CartographyPrompt(
                             prompt_original=prompt,
-                            instructions_cartographie=self.agent_parole.recuperer_instruction(
-                                "instructions_cartographie"
-                            ),
+                            instructions_cartographie=self._instr_cache["instructions_cartographie"],
                             cartographie_projet=item.contenu,
-                            plan_de_bataille=[
-                                self.agent_parole._recuperer_resume_systeme()
-                            ],
+                            plan_de_bataille=[resume_systeme()],
                             intention=resultat_intention,
                         )
 
@@ -869,11 +1304,9 @@ class AgentSemi(AgentBase):
                         )
                         prompt_autonome_obj = FileInspectionPrompt(
                             prompt_original=prompt,
-                            instructions_inspection=self.agent_parole.recuperer_instruction(
-                                "instructions_inspection"
-                            ),
+                            instructions_inspection=self._instr_cache["instructions_inspection"],
                             fichier_en_cours=item,
-                            notes_precedentes=self.agent_parole._recuperer_resume_systeme(),
+                            notes_precedentes=resume_systeme(),
                             intention=resultat_intention,
                         )
 
@@ -884,9 +1317,7 @@ class AgentSemi(AgentBase):
                             )
                             prompt_autonome_obj = MemorySearchFirstPrompt(
                                 prompt_original=prompt,
-                                instructions_first_search=self.agent_parole.recuperer_instruction(
-                                    "instructions_memory_search_first_prompt"
-                                ),
+                                instructions_first_search=self._instr_cache["instructions_memory_search_first_prompt"],
                                 resultats_memoire=payload,
                                 intention=resultat_intention,
                             )
@@ -896,9 +1327,7 @@ class AgentSemi(AgentBase):
                             )
                             prompt_autonome_obj = MemorySearchPrompt(
                                 prompt_original=prompt,
-                                instructions_memory_search_prompt=self.agent_parole.recuperer_instruction(
-                                    "instructions_memory_search_prompt"
-                                ),
+                                instructions_memory_search_prompt=self._instr_cache["instructions_memory_search_prompt"],
                                 resultats_memoire=payload,
                                 raisonnement_precedent=self.active_plan,
                                 intention=resultat_intention,
@@ -907,12 +1336,11 @@ class AgentSemi(AgentBase):
                 # CAS 2 : APRÈS MODIFICATION (Staging Review)
                 elif current_tool_result.get("function") == "update_system_summary":
                     self.logger.info("✅ ÉTAT: REVIEW (StagingReviewPrompt)")
+                    resume_boucle = None  # Le fichier vient d'être modifié
                     prompt_autonome_obj = StagingReviewPrompt(
                         prompt_original=prompt,
-                        instructions_review=self.agent_parole.recuperer_instruction(
-                            "instructions_review"
-                        ),
-                        etat_staging_actuel=self.agent_parole._recuperer_resume_systeme(),
+                        instructions_review=self._instr_cache["instructions_review"],
+                        etat_staging_actuel=resume_systeme(),
                         derniere_action=str(
                             current_tool_result.get("results", "Mise à jour effectuée")
                         ),
@@ -923,9 +1351,7 @@ class AgentSemi(AgentBase):
                 elif "results" in current_tool_result:
                     prompt_autonome_obj = MemorySearchPrompt(
                         prompt_original=prompt,
-                        instructions_memory_search_prompt=self.agent_parole.recuperer_instruction(
-                            "instructions_memory_search_prompt"
-                        ),
+                        instructions_memory_search_prompt=self._instr_cache["instructions_memory_search_prompt"],
                         resultats_memoire=[
                             Souvenir(
                                 contenu=str(current_tool_result["results"]),
@@ -948,14 +1374,23 @@ class AgentSemi(AgentBase):
 
                     # 2. Génération
                     reponse_interne = ""
-                    for token in self.moteur_llm.generer_stream(prompt_txt):
+                    # Même slot + cache_prompt : llama-server ne refait pas le
+                    # prefill du préfixe commun (instructions, intention, mission)
+                    flux_etape = self.moteur_llm.generer_stream(
+                        prompt_txt,
+                        cache_prompt=self.conf_boucle_outils.get("cache_prefixe", True),
+                        id_slot=self.conf_boucle_outils.get("id_slot"),
+                    )
+                    for token in self._flux_llm(flux_etape):
                         reponse_interne += token
                         if stream:
                             yield token
 
                     # 3. Exécution
-                    text_interne_clean = re.sub(r"```json\s*", "", reponse_interne)
-                    text_interne_clean = re.sub(r"```$", "", text_interne_clean.strip())
+                    text_interne_clean = _RE_JSON_FENCE.sub("", reponse_interne)
+                    text_interne_clean = _RE_TRAIL_FENCE.sub(
+                        "", text_interne_clean.strip()
+                    )
 
                     next_tool = self._detecter_et_executer_function_call(
                         text_interne_clean
@@ -974,38 +1409,32 @@ class AgentSemi(AgentBase):
         self.agent_contexte.mettre_a_jour_historique(prompt, final_response_text)
 
         if llm_success:
-            try:
-                interaction_brute = Interaction(
-                    prompt=prompt,
-                    reponse=final_response_text,
-                    system=self.agent_parole.recuperer_instruction(
-                        "instructions_systeme"
-                    ),
-                    intention=prompt_final_obj.intention,
-                    contexte_memoire=[],
-                    meta=MetadataFichier(
-                        id=interaction_id, session_id=session_id, type_memoire="brute"
-                    ),
-                )
-                self.agent_memoire.sauvegarder_interaction_brute(interaction_brute)
-            except Exception as e:
-                self.logger.log_error(f"Erreur sauvegarde brute : {e}")
+            self._sauvegarder_interaction_brute(
+                prompt,
+                final_response_text,
+                prompt_final_obj.intention,
+                interaction_id,
+                session_id,
+            )
 
             self.current_message_turn += 1
             self.derniere_interaction = (prompt, final_response_text, datetime.now())
 
+            if cache_eligible and final_response_text:
+                self._memoriser_reponse_exacte(
+                    cle_exacte, final_response_text, prompt_final_obj.intention
+                )
+
             try:
-                threading.Thread(
-                    target=lambda: self.post_traitement_async(
-                        prompt,
-                        final_response_text,
-                        prompt_final_obj,
-                        meta_pipeline.interaction_id,
-                        self.current_session_id,
-                        self.current_message_turn,
-                    ),
-                    daemon=True,
-                ).start()
+                self._bg_pool.submit(
+                    self.post_traitement_async,
+                    prompt,
+                    final_response_text,
+                    prompt_final_obj,
+                    meta_pipeline.interaction_id,
+                    self.current_session_id,
+                    self.current_message_turn,
+                )
             except Exception as e:
                 self.logger.log_error(
                     f"Erreur thread post-traitement: {e}", exc_info=True
@@ -1014,6 +1443,101 @@ class AgentSemi(AgentBase):
         if not stream:
             yield final_response_text
 
+    def _sauvegarder_interaction_brute(
+        self,
+        prompt: str,
+        reponse: str,
+        intention: ResultatIntention,
+        interaction_id: str,
+        session_id: str,
+    ):
+        """Persiste l'échange brut (pipeline complet ou réponse rejouée du cache)."""
+        try:
+            interaction_brute = Interaction(
+                prompt=prompt,
+                reponse=reponse,
+                system=self._instr_cache["instructions_systeme"],
+                intention=intention,
+                contexte_memoire=[],
+                meta=MetadataFichier(
+                    id=interaction_id, session_id=session_id, type_memoire="brute"
+                ),
+            )
+            self.agent_memoire.sauvegarder_interaction_brute(interaction_brute)
+        except Exception as e:
+            self.logger.log_error(f"Erreur sauvegarde brute : {e}")
+
+    def _flux_llm(self, flux: Iterable[str]) -> Generator[str, None, None]:
+        """Flux du moteur LLM regroupé en morceaux (réglages : configuration.streaming)."""
+        return _regrouper_flux(
+            flux,
+            taille_min=self.conf_streaming.get("taille_min_chunk", 32),
+            delai_max_ms=self.conf_streaming.get("delai_max_ms", 20),
+        )
+
+    def _collecter_code_chunks(self, prompt: str) -> List[CodeChunk]:
+        """RAG Code (Canal Dédié) : convertit les artefacts d'AgentCode en CodeChunk typés."""
+        liste_code_chunks: List[CodeChunk] = []  # Typage strict
+        raw_results = self.agent_code.fournir_contexte(prompt)
+
+        for item in raw_results or []:
+            # 1. Extraction (contenu, nom, type) via l'extracteur de sa classe
+            contenu, nom_fichier, type_item = _extracteur_code(item)(item)
+
+            # --- ✅ AJOUT : PASS-THROUGH DES ERREURS ---
+            # Si c'est une erreur technique, on bypass le filtre de longueur
+            is_error = type_item == "erreur_technique"
+
+            # FILTRE : Si le contenu est vide ou < 10 caractères (sauf si erreur), on jette
+            if not is_error and (not contenu or len(contenu.strip()) < 10):
+                continue
+
+            liste_code_chunks.append(
+                CodeChunk(
+                    contenu=contenu,
+                    chemin=nom_fichier,  # Maintenant le nom sera correct (ex: SQUELETTE_DYNAMIQUE)
+                    type=type_item,
+                    langage="python",
+                )
+            )
+        return liste_code_chunks
+
+    def _charger_fichiers_actifs(self, fichiers_a_charger: List[str]) -> List[CodeChunk]:
+        """
+        Injection des fichiers "épinglés" par les tours précédents (Continuité Session)
+        pour éviter l'amnésie.
+        """
+        chunks_actifs: List[CodeChunk] = []
+        self.logger.info(f"📂 Injection contexte actif : {fichiers_a_charger}")
+
+        # On vérifie la présence de l'outil de lecture
+        outil = getattr(self.agent_recherche, "outil_recherche_memoire", None)
+        if not outil:
+            self.logger.log_error(
+                "❌ outil_recherche_memoire non disponible pour l'injection active."
+            )
+            return chunks_actifs
+
+        try:
+            # Lecture groupée : une localisation pour tout le lot, lectures en parallèle
+            contenus = outil.lire_fichiers_batch(fichiers_a_charger)
+        except Exception as e:
+            self.logger.log_warning(f"⚠️ Impossible de relire les fichiers actifs : {e}")
+            return chunks_actifs
+
+        for fichier, content in contenus.items():
+            if content:
+                # Création du Chunk avec typage conforme pour AgentParole
+                chunks_actifs.append(
+                    CodeChunk(
+                        contenu=content,
+                        chemin=fichier,
+                        type="fichier_actif",  # Permet à Parole d'appliquer le formatage spécial
+                        langage="python",
+                    )
+                )
+        return chunks_actifs
+
     def _gerer_commandes_systeme(self, prompt: str, stream: bool) -> Optional[Dict]:
         """
         [ATOME] Gère les commandes système (+1, -1) et les protocoles (!!!).
@@ -1037,15 +1561,12 @@ class AgentSemi(AgentBase):
 
             # 1. Lancement analyse réflexive en fond (On garde ça pour les stats/logs)
             try:
-                import threading
-
-                threading.Thread(
-                    target=lambda: self.agent_reflexor.lancer_analyse_gouvernance(
+                self._bg_pool.submit(
+                    lambda: self.agent_reflexor.lancer_analyse_gouvernance(
                         prompt_erreur=prompt,
                         historique=self.agent_contexte.get_historique_chat(),
-                    ),
-                    daemon=True,
-                ).start()
+                    )
+                )
             except Exception:
                 pass
 
@@ -1102,21 +1623,17 @@ class AgentSemi(AgentBase):
 
             original_prompt, final_response_text, *_ = self.derniere_interaction
 
-            # Lancer l'enregistrement dans un thread (pas de lambda capturant l'environnement)
+            # Lancer l'enregistrement en tâche de fond (pas de lambda capturant l'environnement)
             try:
-                import threading
-                from functools import partial
-
-                target_fn = partial(
+                self._bg_pool.submit(
                     self.agent_reflexor.enregistrer_feedback_etendu,
                     prompt=original_prompt,
                     reponse=final_response_text,
                     score=score,
                     mot_cle=keyword,
                 )
-                threading.Thread(target=target_fn, daemon=True).start()
                 self.logger.info(
-                    "✅ Enregistrement feedback lancé dans un thread asynchrone."
+                    "✅ Enregistrement feedback lancé en tâche de fond."
                 )
             except Exception as e:
                 self.logger.log_error(f"Échec du lancement du thread de feedback: {e}")
@@ -1134,8 +1651,9 @@ class AgentSemi(AgentBase):
                 # logique existante de sauvegarde (garde comportement synchrone)
                 try:
                     original_prompt, final_response_text, *_ = self.derniere_interaction
+                    maintenant = datetime.now()
                     feedback_data = {
-                        "timestamp": datetime.now().isoformat(),
+                        "timestamp": maintenant.isoformat(),
                         "type": "feedback_pertinence_juge",
                         "score_utilisateur": score,
                         "context": {
@@ -1152,7 +1670,7 @@ class AgentSemi(AgentBase):
                         else "Invalidé par commande vocale (-1 pertinence)",
                     }
                     status = "ok" if score > 0.5 else "bad"
-                    nom_fichier = f"feedback_pertinence/juge_{status}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                    nom_fichier = f"feedback_pertinence/juge_{status}_{maintenant.strftime('%Y%m%d_%H%M%S')}.json"
                     self.agent_memoire.sauvegarder_memoire(
                         contenu=feedback_data,
                         type_memoire="reflexive",
@@ -1186,9 +1704,10 @@ class AgentSemi(AgentBase):
                 # 2. Préparer le contenu
                 # On utilise l'objet ResultatIntention directement pour le JSON
                 original_prompt, _, _ = self.derniere_interaction
+                maintenant = datetime.now()
 
                 feedback_data = {
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": maintenant.isoformat(),
                     "prompt_critique": original_prompt,
                     "classification_predite": asdict(
                         self.derniere_classification
@@ -1200,7 +1719,7 @@ class AgentSemi(AgentBase):
                 dossier = Path(feedback_dir_path)
                 dossier.mkdir(parents=True, exist_ok=True)  # Assurer l'existence
 
-                nom_fichier = f"feedback_intention_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                nom_fichier = f"feedback_intention_{maintenant.strftime('%Y%m%d_%H%M%S')}.json"
                 chemin_fichier = dossier / nom_fichier
 
                 try:
@@ -1282,7 +1801,7 @@ class AgentSemi(AgentBase):
             # ===========================================================
             # 1. EXTRACTION & TRAITEMENT DU CODE (Nouveau Pipeline)
             # ===========================================================
-            if getattr(self, "agent_code", None):
+            if self.agent_code:
                 try:
                     # On demande à l'AgentCode de séparer le texte du code
                     texte_nettoye_api, artefacts = (
@@ -1306,15 +1825,10 @@ class AgentSemi(AgentBase):
             # ===========================================================
             # Même si l'AgentCode a raté son coup, on FORCE le retrait visuel des blocs de code
             # pour ne pas polluer le JSON historique avec des milliers de lignes de code.
-            import re
-
-            pattern_code = r"```[\s\S]*?```"
-            if re.search(pattern_code, reponse_pour_historique):
-                reponse_pour_historique = re.sub(
-                    pattern_code,
-                    "\n\n[... 💾 CODE EXTRAIT ET SAUVEGARDÉ DANS /memoire/code/ ...]\n\n",
-                    reponse_pour_historique,
-                )
+            reponse_pour_historique = _RE_CODE_BLOCK.sub(
+                "\n\n[... 💾 CODE EXTRAIT ET SAUVEGARDÉ DANS /memoire/code/ ...]\n\n",
+                reponse_pour_historique,
+            )
 
             # ===========================================================
             # 2. PRÉPARATION SÉCURISÉE DES DONNÉES (Fix du Crash)
@@ -1353,7 +1867,7 @@ class AgentSemi(AgentBase):
             score_juge = 1.0
             raison_juge = "Pas de juge actif"
 
-            if getattr(self, "agent_juge", None):
+            if self.agent_juge:
                 try:
                     contexte_str = "\n".join([s.contenu for s in souvenirs + docs_objs])
                     res_juge = self.agent_juge.evaluer_coherence_reponse(
@@ -1370,7 +1884,7 @@ class AgentSemi(AgentBase):
             # 4. GÉNÉRATION DU RÉSUMÉ (MiniLLM)
             # ===========================================================
             resume_interaction = "Échange standard."
-            if getattr(self, "moteur_mini_llm", None):
+            if self.moteur_mini_llm:
                 try:
                     p_resume = f"Résumé 1 phrase:\nUser: {prompt[:300]}\nAssistant: {reponse_pour_historique[:300]}"
                     # On consomme le générateur
@@ -1519,10 +2033,11 @@ class AgentSemi(AgentBase):
         """
         Lance le traitement batch (consolidation mémoire) dans un thread séparé.
         Appelé par _verifier_batch_au_demarrage.
+
+        Thread dédié (pas `_bg_pool`) : le batch dure longtemps et ne doit pas
+        retarder les post-traitements des premiers tours.
         """
         try:
-            import threading
-
             threading.Thread(
                 target=self.processeur_batch.traiter_batch_differe, daemon=True
             ).start()
@@ -1588,6 +2103,7 @@ class AgentSemi(AgentBase):
             # 4. Écriture en mode AJOUT ('a')
             with open(f_dest, "a", encoding="utf-8") as f:
                 f.write(bloc_ajout)
+            self.agent_parole.invalider_resume_systeme()
 
             self.logger.info(f"📝 Résumé système mis à jour (Ajout) : {f_dest.name}")
             return f"Succès : Information ajoutée à {f_dest.name}."
@@ -1668,7 +2184,7 @@ class AgentSemi(AgentBase):
             # Cette regex dit : "Remplace le \ par \\ SEULEMENT S'IL N'EST PAS DÉJÀ PRÉCÉDÉ d'un \"
             # Ainsi : "D:\Dev" devient "D:\\Dev" (Fixé)
             # Mais :  "D:\\Dev" reste "D:\\Dev" (Pas touché)
-            json_str_fixed = re.sub(r'(?<!\\)\\(?![/u"\\bfnrt])', r"\\\\", json_str)
+            json_str_fixed = _RE_ANTISLASH_NU.sub(r"\\\\", json_str)
 
             function_call = json.loads(json_str_fixed)
 
@@ -1839,6 +2355,8 @@ _Mise à jour : {datetime.now().strftime("%Y-%m-%d %H:%M")}_
 
             # 5. Écriture
             f_dest.write_text(contenu_final, encoding="utf-8")
+            # mtime parfois trop grossier pour deux écritures rapprochées
+            self.agent_parole.invalider_resume_systeme()
             self.logger.info(f"✅ Résumé mis à jour dans : {f_dest}")
             return True
 
@@ -6,8 +6,14 @@ Cible : agentique/agent_Semi.py
 Objectif : Valider la boucle cognitive, le routage des outils et la gestion de session.
 """
 
+import sys
 import unittest
 import json
+import tempfile
+from pathlib import Path
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch, ANY
 from types import SimpleNamespace
 
@@ -20,6 +26,7 @@ from agentique.base.contrats_interface import (
     Action,
     Categorie,
     Souvenir,
+    SearchMode,
 )
 
 # Import conditionnel
@@ -49,6 +56,7 @@ class TestAgentSemi(unittest.TestCase):
         self.agent.agent_recherche = MagicMock()
         self.agent.agent_memoire = MagicMock()
         self.agent.agent_contexte = MagicMock()
+        self.agent.agent_contexte.get_historique_chat.return_value = []
         self.agent.agent_parole = MagicMock()
         self.agent.agent_juge = MagicMock()
         self.agent.agent_code = MagicMock()
@@ -58,14 +66,26 @@ class TestAgentSemi(unittest.TestCase):
         # Moteurs
         self.agent.moteur_llm = MagicMock()
         self.agent.moteur_mini_llm = MagicMock()
+        self.agent.moteur_vectoriel = MagicMock()
 
         # État interne
         self.agent.current_session_id = "TEST_SESSION"
         self.agent.current_message_turn = 0
-        self.agent.fichiers_actifs = set()
+        self.agent.fichiers_actifs = {}
         self.agent.active_plan = None
+        self.agent.active_protocol_override = None
         self.agent.derniere_interaction = ("Q", "R", "Time")
         self.agent.derniere_classification = MagicMock()
+        self.agent.conf_cache_reponses = {}
+        self.agent.conf_boucle_outils = {}
+        self.agent.conf_streaming = {}
+        self.agent._instr_cache = defaultdict(str)
+        self.agent._cache_exact = OrderedDict()
+        self.agent._verrou_cache_reponses = threading.Lock()
+        self.agent._pool_contexte = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.agent._pool_contexte.shutdown)
+        self.agent._bg_pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.agent._bg_pool.shutdown)
 
     # =========================================================================
     # 1. TEST COMMANDES SYSTÈME (Pre-Flight)
@@ -160,6 +180,94 @@ class TestAgentSemi(unittest.TestCase):
         # Vérifie qu'on n'a PAS appelé l'intention detector (bypass)
         self.agent.intention_detector.intention_detector.assert_not_called()
 
+    def test_cache_reponses_eligible(self):
+        """Pas de cache pour une alerte, un protocole actif ou un mode forcé."""
+        self.assertTrue(self.agent._cache_reponses_eligible("Qui es-tu ?", "auto", None))
+        self.assertFalse(
+            self.agent._cache_reponses_eligible("!!! Qui es-tu ?", "auto", None)
+        )
+        self.assertFalse(self.agent._cache_reponses_eligible("Qui es-tu ?", "web", None))
+        self.agent.active_protocol_override = "PROTOCOLE"
+        self.assertFalse(self.agent._cache_reponses_eligible("Qui es-tu ?", "auto", None))
+
+    def test_penser_cache_reessayer(self):
+        """Relancer le dernier prompt rejoue sa réponse, persistée et comptée comme un tour."""
+        intention = MagicMock()
+        cle = self.agent._cle_cache_exact(
+            "Qui es-tu ?", self.agent._empreinte_historique(["Q", "R"])
+        )
+        self.agent._memoriser_reponse_exacte(cle, "Je suis Semi.", intention)
+        # Historique après l'échange initial
+        self.agent.agent_contexte.get_historique_chat.return_value = [
+            "Q", "R", "Qui es-tu ?", "Je suis Semi."
+        ]
+
+        res = "".join(self.agent.penser("Qui es-tu ?", stream=True))
+
+        self.assertEqual(res, "Je suis Semi.")
+        self.agent.intention_detector.intention_detector.assert_not_called()
+        self.agent.moteur_llm.generer_stream.assert_not_called()
+        # Le tour rejoué est persisté et compté comme un tour normal
+        sauvegarde = self.agent.agent_memoire.sauvegarder_interaction_brute
+        sauvegarde.assert_called_once()
+        self.assertIs(sauvegarde.call_args[0][0].intention, intention)
+        self.assertEqual(self.agent.current_message_turn, 1)
+
+    def test_penser_cache_ignore_prompt_repete_plus_loin(self):
+        """Un « oui » repris après d'autres échanges n'est pas une relance."""
+        self.agent.agent_contexte.get_historique_chat.return_value = [
+            "oui", "R1", "autre", "R2"
+        ]
+        self.agent.intention_detector.intention_detector.side_effect = RuntimeError("stop")
+
+        with patch.object(self.agent, "_chercher_reponse_exacte") as lookup:
+            with self.assertRaisesRegex(RuntimeError, "stop"):
+                list(self.agent.penser("oui"))
+
+        lookup.assert_not_called()
+
+    def test_cle_cache_exact_depend_de_l_historique(self):
+        """Le même « oui » à deux moments de la conversation ne partage pas de clé."""
+        avant = self.agent._cle_cache_exact("oui", self.agent._empreinte_historique([]))
+        apres = self.agent._cle_cache_exact(
+            "oui", self.agent._empreinte_historique(["Q", "R"])
+        )
+
+        self.assertNotEqual(avant, apres)
+
+    def test_callback_viewer_serialise_hors_verrou_et_seulement_si_abonne(self):
+        """Sans client SSE, pas de json.dumps ; avec un client, il reçoit l'instantané."""
+        cache, verrou = {"etat": "ok"}, threading.Lock()
+        self.agent.get_cache = lambda: cache
+        self.agent.get_lock = lambda: verrou
+        self.agent.socketio = None
+        self.agent._setup_callbacks_viewer()
+        callback = self.agent.agent_parole._prompt_callback
+
+        with patch(f"{AgentSemi.__module__}.json.dumps") as dumps:
+            callback("PROMPT 1")
+        dumps.assert_not_called()
+        self.assertEqual(cache["raw_prompt"], "PROMPT 1")
+
+        file_client = self.agent.abonner_prompt_viewer()
+        callback("PROMPT 2")
+        evenement = file_client.get_nowait()
+        self.assertTrue(evenement.startswith("data: "))
+        self.assertEqual(json.loads(evenement[6:])["raw_prompt"], "PROMPT 2")
+
+    def test_collecter_code_chunks_filtre(self):
+        """Les artefacts trop courts sont jetés, sauf les erreurs techniques."""
+        self.agent.agent_code.fournir_contexte.return_value = [
+            Souvenir("def f():\n    return 42", "module.py", "code", 1.0),
+            Souvenir("x", "vide.py", "code", 1.0),
+            Souvenir("KO", "ERREUR", "erreur_technique", 0.0),
+        ]
+
+        chunks = self.agent._collecter_code_chunks("bug dans module.py")
+
+        self.assertEqual([c.chemin for c in chunks], ["module.py", "ERREUR"])
+        self.assertEqual(chunks[1].type, "erreur_technique")
+
     # =========================================================================
     # 3. TEST ROUTAGE OUTILS (Function Calling)
     # =========================================================================
@@ -197,6 +305,80 @@ class TestAgentSemi(unittest.TestCase):
             if res:
                 self.assertIsInstance(res, dict)
 
+    def test_detecteur_json_flux(self):
+        """Le texte passe dès le premier caractère ; le JSON (même fragmenté) reste caché."""
+        Detecteur = sys.modules[AgentSemi.__module__]._DetecteurJsonFlux
+
+        d = Detecteur()
+        self.assertEqual(d.alimenter("  "), "")
+        self.assertEqual(d.alimenter("Bon"), "  Bon")
+        self.assertEqual(d.alimenter("jour"), "jour")
+        self.assertFalse(d.json_cache)
+
+        d = Detecteur()
+        for token in ["\n", "``", "`js", "on\n{", '"a": 1}']:
+            self.assertEqual(d.alimenter(token), "")
+        self.assertTrue(d.json_cache)
+        self.assertEqual(d.vider(), "")
+
+        d = Detecteur()
+        self.assertEqual(d.alimenter("```"), "")
+        self.assertEqual(d.alimenter("python"), "```python")
+
+    def test_regrouper_flux(self):
+        """Premier token seul, puis morceaux d'au moins taille_min caractères."""
+        regrouper = sys.modules[AgentSemi.__module__]._regrouper_flux
+        tokens = ["A", "b", "c", "", "d", "e", "f", "g"]
+
+        morceaux = list(regrouper(iter(tokens), taille_min=3, delai_max_ms=10_000))
+
+        self.assertEqual(morceaux, ["A", "bcd", "efg"])
+        self.assertEqual("".join(morceaux), "".join(tokens))
+
+    def test_classer_mode_prompt(self):
+        """Le mode de prompt est choisi une fois, selon l'ordre de priorité."""
+        intention = MagicMock(categorie=Categorie.AGENT)
+        modif = SimpleNamespace(search_mode=SearchMode.NONE)
+        classer = self.agent._classer_mode_prompt
+
+        self.assertEqual(classer("salut", intention, {}, modif, []), "standard")
+        self.assertEqual(classer("salut", intention, {}, modif, [MagicMock()]), "code")
+        self.assertEqual(
+            classer("salut", intention, {"fichier_brut": [MagicMock()]}, modif, []),
+            "inspection",
+        )
+        self.assertEqual(
+            classer(
+                "salut", intention, {"cartographie_projet": [MagicMock()]}, modif, []
+            ),
+            "cartographie",
+        )
+        modif.search_mode = SearchMode.CONTEXTE_MANUEL
+        self.assertEqual(
+            classer("salut", intention, {"cartographie_projet": []}, modif, []),
+            "manuel",
+        )
+        self.assertEqual(
+            set(self.agent._CONSTRUCTEURS_PROMPT),
+            {"manuel", "cartographie", "inspection", "review", "code", "standard"},
+        )
+
+    def test_tracer_etape_investigation_file_ecriture(self):
+        """La trace passe par la file et est écrite par le thread de fond."""
+        with tempfile.TemporaryDirectory() as dossier:
+            self.agent.auditor.get_path.return_value = dossier
+            self.agent._initialiser_traceur()
+
+            self.agent._tracer_etape_investigation(
+                "Étape 1", "prompt", '{"thought": "je cherche"}', {"ok": True}
+            )
+            self.agent._trace_queue.join()
+
+            contenu = next(Path(dossier).glob("trace_investigation_*.md")).read_text(
+                encoding="utf-8"
+            )
+            self.assertIn("je cherche", contenu)
+
     # =========================================================================
     # 4. TEST PROPRIOCEPTION (Résumé Système)
     # =========================================================================
@@ -9,7 +9,7 @@ import json
 import yaml
 import requests
 from pathlib import Path
-from typing import Generator, Dict, List
+from typing import Generator, Dict, List, Optional
 from agentique.base.META_agent import AgentBase
 
 class MoteurLLM(AgentBase):
@@ -32,9 +32,13 @@ class MoteurLLM(AgentBase):
         if not self.server_url:
              raise ValueError(f"❌ CONFIG: 'server_url' manquant pour le profil {active_profile}")
 
+        # Session HTTP persistante : connexion keep-alive réutilisée d'un appel à l'autre
+        # (pas de handshake TCP par génération, surtout sensible sur les petits prompts)
+        self._session_http = requests.Session()
+
         # 3. Test connexion
         try:
-            health = requests.get(f"{self.server_url}/health", timeout=2)
+            health = self._session_http.get(f"{self.server_url}/health", timeout=2)
             if health.status_code == 200:
                 self.logger.info(f"✅ Connecté au serveur llama-server sur {self.server_url}")
             else:
@@ -60,8 +64,22 @@ class MoteurLLM(AgentBase):
         with open(self.config_path, "r", encoding="utf-8") as f:
             return yaml.safe_load(f)
 
-    def _prepare_payload(self, prompt_text: str, stream: bool = False) -> dict:
-        """Prépare les paramètres de génération en utilisant exclusivement le YAML."""
+    def _prepare_payload(
+        self,
+        prompt_text: str,
+        stream: bool = False,
+        json_mode: bool = False,
+        temperature: Optional[float] = None,
+        cache_prompt: Optional[bool] = None,
+        id_slot: Optional[int] = None,
+    ) -> dict:
+        """Prépare les paramètres de génération en utilisant exclusivement le YAML.
+
+        `json_mode` contraint la sortie à un objet JSON (grammaire llama-server via
+        `json_schema`), `temperature` remplace ponctuellement la valeur du YAML.
+        `cache_prompt` / `id_slot` permettent à un appelant de réutiliser le KV cache
+        d'un slot llama-server (préfixe commun entre appels successifs).
+        """
         gen_cfg = self.model_config.get("generation", {})
 
         # Nettoyage et sécurisation des stop tokens issus du YAML
@@ -70,29 +88,49 @@ class MoteurLLM(AgentBase):
             raw_stop = [raw_stop] if isinstance(raw_stop, str) else ["<|im_end|>", "</s>"]
         clean_stop = [str(s) for s in raw_stop if s]
 
+        if temperature is None:
+            temperature = gen_cfg.get("temperature", 0.7)
+        if cache_prompt is None:
+            cache_prompt = gen_cfg.get("cache_prompt", True)  # Lu depuis YAML
+
         # Construction du payload dynamique
-        return {
+        payload = {
             "prompt": prompt_text,
             "stream": stream,
             "n_predict": int(gen_cfg.get("max_tokens", 1024)),
-            "temperature": float(gen_cfg.get("temperature", 0.7)),
+            "temperature": float(temperature),
             "top_p": float(gen_cfg.get("top_p", 0.9)),
             "stop": clean_stop,
-            "cache_prompt": gen_cfg.get("cache_prompt", True), # Lu depuis YAML
+            "cache_prompt": bool(cache_prompt),
             "do_sample": gen_cfg.get("do_sample", False)       # Lu depuis YAML
         }
-
-    def generer_stream(self, prompt_text: str) -> Generator[str, None, None]:
-        """Génération en mode streaming avec gestion d'erreur robuste."""
+        if json_mode:
+            payload["json_schema"] = {"type": "object"}
+        if id_slot is not None:
+            payload["id_slot"] = int(id_slot)
+        return payload
+
+    def generer_stream(
+        self,
+        prompt_text: str,
+        cache_prompt: Optional[bool] = None,
+        id_slot: Optional[int] = None,
+    ) -> Generator[str, None, None]:
+        """Génération en mode streaming avec gestion d'erreur robuste.
+
+        `cache_prompt` / `id_slot` : voir `_prepare_payload` (None = valeurs du YAML).
+        """
         if not prompt_text:
             yield "[ERREUR: Prompt vide]"
             return
 
-        payload = self._prepare_payload(prompt_text, stream=True)
+        payload = self._prepare_payload(
+            prompt_text, stream=True, cache_prompt=cache_prompt, id_slot=id_slot
+        )
         stop_tokens = payload.get("stop", [])
 
         try:
-            response = requests.post(
+            response = self._session_http.post(
                 f"{self.server_url}/completion",
                 json=payload,
                 stream=True,
@@ -129,11 +167,18 @@ class MoteurLLM(AgentBase):
             self.logger.log_error(f"Erreur streaming critique: {e}")
             yield f"[ERREUR CRITIQUE: {e}]"
 
-    def generer(self, prompt_text: str) -> Dict:
-        """Génération standard (non-streamée)."""
-        payload = self._prepare_payload(prompt_text, stream=False)
+    def generer(
+        self,
+        prompt_text: str,
+        json_mode: bool = False,
+        temperature: Optional[float] = None,
+    ) -> Dict:
+        """Génération standard (non-streamée). `json_mode` force un objet JSON en sortie."""
+        payload = self._prepare_payload(
+            prompt_text, stream=False, json_mode=json_mode, temperature=temperature
+        )
         try:
-            response = requests.post(
+            response = self._session_http.post(
                 f"{self.server_url}/completion",
                 json=payload,
                 timeout=300
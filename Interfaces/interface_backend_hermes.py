@@ -16,6 +16,7 @@ import yaml
 import shutil
 import logging
 import threading
+import queue
 import time
 import webbrowser
 import subprocess
@@ -44,6 +45,14 @@ except ImportError as e:
     print(f"❌ Erreur critique d'import tiers : {e}")
     sys.exit(1)
 
+# Sérialisation rapide des paquets SocketIO (optionnelle, repli sur json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 
 # --- Initialisation du Logger (fait en premier pour être toujours disponible) ---
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] {%(levelname)s} - %(message)s')
@@ -127,7 +136,29 @@ except Exception as e:
 app = Flask(__name__, static_folder='memoire', static_url_path='/static')
 app.json_encoder = CustomJSONEncoder
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+
+class _JsonSocketIO:
+    """
+    Module json de substitution pour SocketIO : orjson (C) avec l'API str de json.
+    Clés non-str acceptées comme json ; un objet non sérialisable lève TypeError
+    comme avec json, au lieu d'être converti silencieusement en str.
+    """
+
+    @staticmethod
+    def dumps(obj, **_kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    @staticmethod
+    def loads(s, **_kwargs):
+        return orjson.loads(s)
+
+
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    json=_JsonSocketIO if ORJSON_AVAILABLE else json,
+)
 app.register_blueprint(router_externes)
 
 # --- Monitoring GPU ---
@@ -986,6 +1017,31 @@ def handle_prompt_viewer_connect():
     logger.info("🔍 Prompt Viewer connecté (SocketIO)")
     emit('connected', {'status': 'viewer_ready'})
 
+@app.route('/events/prompt_viewer', methods=['GET'])
+def stream_prompt_viewer():
+    """
+    Flux SSE (Server-Sent Events) : pousse chaque nouveau prompt au Prompt Viewer
+    dès qu'AgentParole l'assemble, sans polling. Le navigateur se reconnecte seul.
+    """
+    file_client = agent_semi.abonner_prompt_viewer()
+
+    def generate():
+        try:
+            yield ": connecté\n\n"
+            while True:
+                try:
+                    yield file_client.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"  # Commentaire SSE : garde la connexion ouverte
+        finally:
+            agent_semi.desabonner_prompt_viewer(file_client)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/last_prompt', methods=['GET'])
 def get_last_prompt():
     """
@@ -1857,4 +1913,5 @@ if __name__ == '__main__':
         print("\nArrêt du serveur demandé...")
     finally:
         gardien.stop()
+        agent_semi.fermer()
     logger.info("👋 Application terminée.")